@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+예측 파이프라인 오프라인 벤치마크 (benchmark_pipeline.py)
+=====================================================
+네트워크 없이 고정 시드 합성 시세(TICKERS + MACRO 모양)와 주간 현물가로
+피처 생성 → 데이터셋 조립 → 기간 프로필별 워크포워드 → 지표 → 순열 중요도를
+재고, 저장해 둔 기준 결과와 비교해 느려졌거나 출력이 바뀐 단계를 알려 준다.
+벡터화 rolling 커널(CCI 평균절대편차·로그 추세)은 행마다 람다를 부르던 참조
+구현과 값이 같은지(EQUIV_ATOL)와 몇 배 빠른지도 함께 확인한다.
+
+실행
+  python benchmark_pipeline.py --quick                  # 1y·3y만, 수 분 이내
+  python benchmark_pipeline.py --save-baseline bench_baseline.json
+  python benchmark_pipeline.py --baseline bench_baseline.json [--tolerance 0.25]
+
+  기준보다 (1 + tolerance)배 넘게 느린 단계, 출력 지문이 달라진 단계, 참조
+  구현과 값이 다른 커널이 있으면 종료 코드 1을 돌려준다. 시간은 같은 기계에서 만든 기준과만 비교할 것.
+  가격 캐시는 끄고 돌린다(디스크 상태가 시간을 바꾸지 않게).
+"""
+
+from __future__ import annotations
+
+import os
+
+# 모듈 import 전에 꺼야 설정 상수에 반영된다.
+os.environ["MEMORY_PRICE_CACHE"] = ""
+
+import argparse
+import hashlib
+import json
+import platform
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import memory_stock_predict_pro as m
+
+# 짧은 기간 프로필에서 252일 창 피처가 전부 비어 imputer가 매 fold 경고한다.
+warnings.filterwarnings("ignore", category=UserWarning)
+
+BENCH_SCHEMA = 1
+BENCH_END = pd.Timestamp("2026-10-16")   # 합성 시세 마지막 거래일(고정)
+BENCH_YEARS = 15                          # 가장 긴 기간 프로필을 덮는 이력
+QUICK_PERIODS = ("1y", "3y")
+EQUIV_ATOL = 1e-9                         # 벡터화 커널과 참조 구현의 허용 오차
+
+# 지역별 시작 가격, 신규 상장일, 금리·변동성·환율처럼 팩터와 무관한 심볼의 수준
+_LEVEL = {"kr": 60000.0, "jp": 3000.0, "us": 80.0}
+_LISTED = {"SNDK": "2025-02-24", "285A.T": "2024-12-18", "RAM": "2025-04-01"}
+_RATE_LIKE = {"^TNX": 4.0, "^IRX": 4.5, "^VIX": 18.0}
+_FX_LIKE = {"KRW=X": 1300.0, "JPY=X": 140.0, "DX-Y.NYB": 100.0}
+
+
+def _calendar(sym: str, rng: np.random.Generator) -> pd.DatetimeIndex:
+    """지역별 거래일. 한국·일본은 휴장일이 달라 약 3%를 빼 미국과 어긋나게 한다."""
+    idx = pd.bdate_range(end=BENCH_END, periods=252 * BENCH_YEARS)
+    if m.ticker_region(sym) != "us" or sym in ("^KS11", "^N225"):
+        idx = idx[rng.random(len(idx)) > 0.03]
+    listed = _LISTED.get(sym)
+    return idx[idx >= pd.Timestamp(listed)] if listed else idx
+
+
+def synthetic_prices(seed: int = 7) -> dict[str, pd.DataFrame]:
+    """download_prices와 같은 모양의 {심볼: OHLCV} 합성 시세(결정적).
+
+    공통 반도체 팩터 + 시장 팩터 + 고유 잡음으로 종목 간 상관을 만들고,
+    지수·환율·금리는 yfinance처럼 거래량이 비어 있다.
+    """
+    rng = np.random.default_rng(seed)
+    full = pd.bdate_range(end=BENCH_END, periods=252 * BENCH_YEARS)
+    market = pd.Series(rng.normal(0.0003, 0.010, len(full)), index=full)
+    semi = pd.Series(rng.normal(0.0002, 0.015, len(full)), index=full)
+    out: dict[str, pd.DataFrame] = {}
+    for sym in list(m.DEFAULT_TICKERS) + list(m.MACRO):
+        idx = _calendar(sym, rng)
+        n = len(idx)
+        if sym in _RATE_LIKE or sym in _FX_LIKE:
+            level = _RATE_LIKE.get(sym) or _FX_LIKE[sym]
+            r = rng.normal(0.0, 0.006 if sym in _FX_LIKE else 0.02, n)
+        else:
+            beta = 1.6 if sym in m.DEFAULT_TICKERS else rng.uniform(0.2, 1.2)
+            level = _LEVEL[m.ticker_region(sym)]
+            r = (market.reindex(idx).to_numpy()
+                 + beta * semi.reindex(idx).to_numpy()
+                 + rng.normal(0.0, 0.012, n))
+            if sym in m.DEFAULT_DAILY_LEVERAGED:
+                r = 2.0 * r
+        c = level * np.exp(np.cumsum(r))
+        o = c * np.exp(rng.normal(0.0, 0.004, n))
+        h = np.maximum(o, c) * np.exp(np.abs(rng.normal(0.0, 0.007, n)))
+        lo = np.minimum(o, c) * np.exp(-np.abs(rng.normal(0.0, 0.007, n)))
+        v = rng.lognormal(14.0, 0.35, n) * (1.0 + 20.0 * np.abs(r))
+        if sym.startswith("^") or "=" in sym:
+            v[:] = np.nan
+        out[sym] = pd.DataFrame({"Open": o, "High": h, "Low": lo,
+                                 "Close": c, "Volume": v}, index=idx)
+    return out
+
+
+def synthetic_spot(seed: int = 11) -> pd.DataFrame:
+    """TrendForce 캐시와 같은 모양(날짜 + 품목 열)의 주간 현물가."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=BENCH_END, periods=252 * BENCH_YEARS)[::5]
+    cycle = np.cumsum(rng.normal(0.0, 0.03, len(dates)))
+    spot = {"날짜": dates}
+    for i, col in enumerate(m.SPOT_DEFAULT_COLS):
+        own = np.cumsum(rng.normal(0.0, 0.015, len(dates)))
+        spot[col] = (2.0 + i) * np.exp(cycle + own)
+    frame = pd.DataFrame(spot)
+    # DDR5 주간 기사 이력은 최근 2년뿐이다.
+    frame.loc[frame.index[:-104], m.SPOT_DEFAULT_COLS[0]] = np.nan
+    return frame
+
+
+def _slice_period(prices: dict, period: str) -> dict[str, pd.DataFrame]:
+    """download_prices의 기간 절단과 같되 오늘 대신 BENCH_END 기준(재현성)."""
+    start = BENCH_END - pd.DateOffset(years=int(period[:-1]))
+    return {s: df[df.index >= start] for s, df in prices.items()
+            if (df.index >= start).any()}
+
+
+def fingerprint(obj) -> str:
+    """출력이 바뀌었는지 보는 짧은 지문. 부동소수점 합 순서 차이는 반올림으로 흡수."""
+    if obj is None:
+        return "none"
+    if isinstance(obj, dict):
+        obj = pd.Series({k: v for k, v in obj.items()
+                         if isinstance(v, (int, float, np.floating, np.integer))},
+                        dtype=float)
+    if isinstance(obj, pd.Series):
+        obj = obj.to_frame()
+    num = obj.select_dtypes(include=[np.number]).astype(float)
+    parts = [str(obj.shape), ",".join(map(str, obj.columns))]
+    parts += [f"{x:.6g}" for x in np.nansum(num.to_numpy(), axis=0)]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:12]
+
+
+def _timed(prof: m.PipelineProfile, name: str, fn, repeat: int = 1, **counts):
+    """repeat번 실행해 가장 빠른 wall을 기록하고 마지막 결과를 돌려준다."""
+    best = None
+    result = None
+    for _ in range(max(1, repeat)):
+        with prof.stage(name, **counts) as rec:
+            result = fn()
+        if best is None or rec["wall_s"] < best["wall_s"]:
+            best = rec
+        prof.stages.remove(rec)
+    best["repeat"] = max(1, repeat)
+    prof.stages.append(best)
+    return result, best
+
+
+def _reference_mean_abs_dev(s: pd.Series, n: int) -> pd.Series:
+    """벡터화 전 CCI 분모(행마다 파이썬 람다)."""
+    return s.rolling(n).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True)
+
+
+def _reference_log_trend(close: pd.Series, n: int) -> tuple[pd.Series, pd.Series]:
+    """벡터화 전 rolling_log_trend(창마다 기울기·R² 람다)."""
+    xc = np.arange(n, dtype=float) - (n - 1) / 2.0
+    xx = float(np.dot(xc, xc))
+    lp = np.log(close.where(close > 0))
+
+    def slope_fn(y):
+        return float(np.dot(xc, y - y.mean()) / xx) if np.isfinite(y).all() else np.nan
+
+    def r2_fn(y):
+        if not np.isfinite(y).all():
+            return np.nan
+        yc = y - y.mean()
+        yy = float(np.dot(yc, yc))
+        if yy <= 1e-16:
+            return 0.0
+        cov = float(np.dot(xc, yc))
+        return float(np.clip(cov * cov / (xx * yy), 0.0, 1.0))
+
+    slope = lp.rolling(n).apply(slope_fn, raw=True)
+    return (np.expm1((slope * n).clip(-2, 2)),
+            lp.rolling(n).apply(r2_fn, raw=True))
+
+
+def _max_abs_err(new: pd.Series, ref: pd.Series) -> float:
+    """값 차이의 최댓값. 결측 위치가 다르면 inf."""
+    if not (new.isna() == ref.isna()).all():
+        return float("inf")
+    diff = (new - ref).abs().max()
+    return 0.0 if pd.isna(diff) else float(diff)
+
+
+def kernel_checks(prof: m.PipelineProfile, prices: dict, syms,
+                  repeat: int = 3) -> dict[str, dict]:
+    """벡터화 rolling 커널의 참조 구현 대비 동치성과 속도."""
+    out: dict[str, dict] = {}
+    closes = [prices[s]["Close"] for s in syms]
+    typical = [(prices[s]["High"] + prices[s]["Low"] + prices[s]["Close"]) / 3.0
+               for s in syms]
+    cases = {
+        "rolling_mean_abs_dev[20]": (
+            typical, lambda x: m.rolling_mean_abs_dev(x, 20),
+            lambda x: _reference_mean_abs_dev(x, 20)),
+        "rolling_log_trend[20]": (
+            closes, lambda x: m.rolling_log_trend(x, 20),
+            lambda x: _reference_log_trend(x, 20)),
+        "rolling_log_trend[60]": (
+            closes, lambda x: m.rolling_log_trend(x, 60),
+            lambda x: _reference_log_trend(x, 60)),
+    }
+    for name, (inputs, fast, ref) in cases.items():
+        got, rec = _timed(prof, name, lambda: [fast(x) for x in inputs], repeat,
+                          rows=sum(len(x) for x in inputs))
+        started = time.perf_counter()
+        want = [ref(x) for x in inputs]
+        rec["reference_s"] = time.perf_counter() - started
+        pairs = [(g, w) for gs, ws in zip(got, want)
+                 for g, w in (zip(gs, ws) if isinstance(gs, tuple) else [(gs, ws)])]
+        err = max(_max_abs_err(g, w) for g, w in pairs)
+        out[name] = {k: v for k, v in rec.items() if k != "stage"}
+        out[name].update(max_abs_err=err, equivalent=err <= EQUIV_ATOL,
+                         speedup=rec["reference_s"] / max(rec["wall_s"], 1e-9),
+                         digest=fingerprint(pd.concat([g for g, _ in pairs],
+                                                      axis=1, ignore_index=True)))
+    return out
+
+
+def run_benchmarks(periods, horizon: int = m.DEFAULT_HORIZON,
+                   repeat: int = 3) -> dict:
+    """단계별 시간·메모리·출력 지문을 {"benchmarks": {이름: 기록}} 으로."""
+    prof = m.PipelineProfile()
+    prices_all = synthetic_prices()
+    spot = synthetic_spot()
+    universe = dict(m.DEFAULT_TICKERS)
+    results: dict[str, dict] = {}
+
+    def record(name, out, rec):
+        results[name] = {k: v for k, v in rec.items() if k != "stage"}
+        results[name]["digest"] = fingerprint(out)
+
+    tick_syms = [s for s in universe if s in prices_all]
+    feats, rec = _timed(
+        prof, "build_ticker_features",
+        lambda: {s: m.build_ticker_features(prices_all[s]) for s in tick_syms},
+        repeat, rows=sum(len(prices_all[s]) for s in tick_syms))
+    record("build_ticker_features",
+           pd.concat(feats, names=["ticker", "date"]), rec)
+    results.update(kernel_checks(prof, prices_all, tick_syms, repeat))
+
+    for period in periods:
+        profile = m.PERIOD_PROFILES[period]
+        prices = _slice_period(prices_all, period)
+        (data, feat_cols), rec = _timed(
+            prof, f"assemble_dataset[{period}]",
+            lambda: m.assemble_dataset(prices, horizon, spot_data=spot,
+                                       universe=universe), repeat)
+        rec.update(rows=len(data), features=len(feat_cols))
+        record(f"assemble_dataset[{period}]", data[feat_cols], rec)
+        data = m.compact_dataset(data, feat_cols).frame()
+
+        folds_before = len(prof.folds)
+        (oos, final_model), rec = _timed(
+            prof, f"walk_forward[{period}]",
+            lambda: m.walk_forward(
+                data, feat_cols, horizon, step=profile["wf_step"],
+                min_train_days=profile["min_train_days"],
+                calibration_days=profile["calibration_days"],
+                min_calibration_rows=profile["min_calibration_rows"],
+                recency_half_life=profile["recency_half_life"], profile=prof))
+        rec.update(rows=len(oos), folds=len(prof.folds) - folds_before)
+        record(f"walk_forward[{period}]",
+               oos[["date", "ticker", "score"]], rec)
+
+        metrics, rec = _timed(prof, f"compute_metrics[{period}]",
+                              lambda: m.compute_metrics(oos, 55, horizon), repeat)
+        record(f"compute_metrics[{period}]", metrics, rec)
+
+        imp, rec = _timed(prof, f"feature_importance[{period}]",
+                          lambda: m.feature_importance(final_model, data, feat_cols))
+        record(f"feature_importance[{period}]", imp, rec)
+
+    return {
+        "schema": BENCH_SCHEMA,
+        "engine_version": m.VERSION,
+        "horizon": int(horizon),
+        "periods": list(periods),
+        "machine": {"python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "numpy": np.__version__, "pandas": pd.__version__},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "process_peak_rss_mb": m._peak_rss_mb(),
+        "benchmarks": results,
+    }
+
+
+def equivalence_failures(current: dict) -> list[str]:
+    return [f"{name}: 참조 구현과 최대 오차 {rec['max_abs_err']:.3g}"
+            for name, rec in current["benchmarks"].items()
+            if rec.get("equivalent") is False]
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25
+            ) -> tuple[list[str], list[str]]:
+    """(보고 줄, 실패 줄). 기준에 없는 항목은 비교하지 않는다."""
+    lines, failures = [], equivalence_failures(current)
+    base = baseline.get("benchmarks", {})
+    for name, rec in current["benchmarks"].items():
+        old = base.get(name)
+        if old is None:
+            lines.append(f"  {name:<34} {rec['wall_s']:9.3f}s  (기준 없음)")
+            continue
+        ratio = rec["wall_s"] / max(old["wall_s"], 1e-9)
+        flag = ""
+        if ratio > 1.0 + tolerance:
+            flag = "  ← 느려짐"
+            failures.append(f"{name}: {old['wall_s']:.3f}s → {rec['wall_s']:.3f}s")
+        if rec.get("digest") != old.get("digest"):
+            flag += "  ← 출력 변경"
+            failures.append(f"{name}: 출력 지문 {old.get('digest')} → {rec.get('digest')}")
+        lines.append(f"  {name:<34} {old['wall_s']:9.3f}s → {rec['wall_s']:9.3f}s"
+                     f"  ×{ratio:5.2f}{flag}")
+    return lines, failures
+
+
+def main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="합성 데이터 오프라인 파이프라인 벤치마크")
+    ap.add_argument("--quick", action="store_true",
+                    help=f"{'·'.join(QUICK_PERIODS)} 프로필만 잰다")
+    ap.add_argument("--periods", default=None,
+                    help="쉼표로 구분한 기간 프로필 (기본: 전부)")
+    ap.add_argument("--horizon", type=int, default=m.DEFAULT_HORIZON)
+    ap.add_argument("--repeat", type=int, default=3,
+                    help="가벼운 단계의 반복 횟수(최솟값 기록)")
+    ap.add_argument("--baseline", metavar="PATH", help="비교할 기준 JSON")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--save-baseline", metavar="PATH", help="이번 결과를 기준으로 저장")
+    ap.add_argument("--json", metavar="PATH", help="이번 결과를 JSON으로 저장")
+    args = ap.parse_args(argv)
+
+    if args.periods:
+        periods = tuple(p.strip() for p in args.periods.split(",") if p.strip())
+    else:
+        periods = QUICK_PERIODS if args.quick else tuple(m.PERIOD_PROFILES)
+    unknown = [p for p in periods if p not in m.PERIOD_PROFILES]
+    if unknown:
+        ap.error(f"알 수 없는 기간 프로필: {', '.join(unknown)}")
+
+    current = run_benchmarks(periods, args.horizon, args.repeat)
+    payload = m.profile_json(current)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+
+    if not args.baseline:
+        for name, rec in current["benchmarks"].items():
+            extra = (f"  참조 대비 ×{rec['speedup']:.1f}, 오차 {rec['max_abs_err']:.1e}"
+                     if "speedup" in rec else "")
+            print(f"  {name:<34} {rec['wall_s']:9.3f}s  {rec['digest']}{extra}")
+        failures = equivalence_failures(current)
+        if failures:
+            print("\n[bench] 동치성 실패:\n  " + "\n  ".join(failures))
+        return 1 if failures else 0
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    lines, failures = compare(current, baseline, args.tolerance)
+    print("\n".join(lines))
+    if failures:
+        print(f"\n[bench] 회귀 {len(failures)}건:\n  " + "\n  ".join(failures))
+        return 1
+    print("\n[bench] 기준 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
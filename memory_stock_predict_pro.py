@@ -23,11 +23,22 @@
 실행
   pip install streamlit yfinance scikit-learn plotly pandas numpy
   streamlit run memory_dashboard.py --server.address 0.0.0.0
+  python memory_dashboard.py --train-worker [--once]   # 별도 프로세스 주기 재학습
+  python memory_dashboard.py --publish [--horizon 20 --period 10y]  # 뷰어용 published_data
 
 공개 배포
   이 파일과 함께 제공되는 README.md·requirements.txt·Dockerfile을 참고한다.
   기본값은 세션 저장이다. 로컬에서만 CSV 자동 저장을 원하면 환경변수
   MEMORY_DASH_PERSIST_LOCAL=1 을 설정한다.
+  일봉은 MEMORY_PRICE_CACHE(기본 price_cache/)에 심볼별로 보관하고 꼬리만 받는다.
+  학습된 앙상블과 OOS 이력은 MEMORY_MODEL_CACHE(기본 artifacts/models/)에
+  입력 데이터·지평·기간·모델 코드 해시로 저장해, 재시작 후 같은 입력이면 재학습하지 않는다.
+  공개 기사 백필은 MEMORY_ARTICLE_INDEX(기본 article_index/)에 URL별 파싱 결과와
+  원문을 남겨, 다음부터는 새 기사만 받는다.
+  자동 현물가는 MEMORY_SPOT_STORE(기본 spot_store.sqlite)에 출처별 행으로 upsert해
+  여러 워커 프로세스가 함께 써도 안전하며, 읽을 때 출처 순위로 값을 고른다.
+  화면은 저장소 스냅샷만 읽고, 백그라운드 스레드가 MEMORY_SPOT_REFRESH_SEC마다
+  TTL(TrendForce 6시간, MEMORY_SPOT_CSV_URL은 MEMORY_SPOT_CSV_TTL_HOURS)이 지난 출처만 받는다.
 
 주의
   - 점수는 과거 패턴 기반 '확률 추정치'다. 보장된 예측이 아니며,
@@ -39,27 +50,43 @@
 from __future__ import annotations
 
 import concurrent.futures
+import gzip
+import hashlib
 import html
+import http.client
+import inspect
 import io
+import json
+import logging
 import os
+import pickle
 import re
+import shutil
+import sqlite3
+import sys
 import threading
 import time
+import urllib.error
 import urllib.parse
 import urllib.request
 import warnings
-from dataclasses import dataclass
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.base import BaseEstimator, ClassifierMixin
 
 warnings.filterwarnings("ignore", category=FutureWarning)
+# 워커·게시 CLI 진행 기록. 화면(main)에서는 핸들러가 없어 출력되지 않는다.
+log = logging.getLogger("memory_stock_predict_pro")
 
 # ──────────────────────────────────────────────────────────────
 # 설정 (종목을 바꾸고 싶으면 여기만 수정)
 # ──────────────────────────────────────────────────────────────
-TICKERS = {
+DEFAULT_TICKERS = {
     "000660.KS": "SK하이닉스",
     "005930.KS": "삼성전자",
     "SNDK":      "샌디스크",
@@ -67,6 +94,46 @@ TICKERS = {
     "MU":        "마이크론",
     "285A.T":    "키옥시아",
 }
+DEFAULT_DAILY_LEVERAGED = ("RAM",)
+# 반도체 공급망 전체처럼 유니버스를 넓힐 때는 코드를 고치지 않고 JSON으로 바꾼다.
+#   {"tickers": {"MU": "마이크론", "AMAT": "어플라이드"}, "daily_leveraged": ["RAM"]}
+UNIVERSE_CONFIG = os.getenv("MEMORY_UNIVERSE_CONFIG", "universe.json")
+PANEL_CHUNK_SIZE = 32       # wide 피처 엔진이 한 번에 계산하는 종목 수
+ARTIFACT_DIR = os.getenv("MEMORY_ARTIFACT_DIR", "artifacts")
+TRAIN_INTERVAL_SEC = int(os.getenv("MEMORY_TRAIN_INTERVAL", "3600"))
+ARTIFACT_KEEP = 3           # 프로필별로 보관하는 과거 아티팩트 수
+MODEL_CACHE_DIR = os.getenv("MEMORY_MODEL_CACHE", os.path.join(ARTIFACT_DIR, "models"))
+MODEL_CACHE_KEEP = 12       # 입력 해시별 워크포워드 결과 보관 수(지평×기간 조합을 덮음)
+RESULT_CACHE_MB = int(os.getenv("MEMORY_RESULT_CACHE_MB", "1024"))  # 화면 결과 캐시 메모리 예산
+PUBLISH_DIR = os.getenv("MEMORY_PUBLISH_DIR", "published_data")
+PUBLISH_SCHEMA = 1          # streamlit_app.EXPECTED_SCHEMA와 같아야 한다
+PUBLISH_PRICE_BARS = 900    # 뷰어 차트(756봉)와 MA120 워밍업을 덮는 가격 이력
+PUBLISH_CHART_BARS = 756    # 미리 계산해 게시하는 차트 구간
+PUBLISH_EQUITY_THRESHOLDS = tuple(range(52, 71))   # 사이드바 행동 신호 기준 범위
+PUBLISH_EQUITY_COSTS = (0, 10, 25, 50)
+PRICE_CACHE_DIR = os.getenv("MEMORY_PRICE_CACHE", "price_cache")
+PRICE_CACHE_TTL_SEC = 15 * 60   # 이 시간 안에 받은 캐시는 네트워크 없이 재사용
+PRICE_OVERLAP_BARS = 5      # 꼬리 다운로드 시 소급 수정주가 확인용 겹침 봉 수
+
+
+def load_universe(path: str = UNIVERSE_CONFIG
+                  ) -> tuple[dict[str, str], tuple[str, ...]]:
+    """설정 파일의 종목 유니버스. 없거나 깨졌으면 기본 메모리 6종목."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            cfg = json.load(fh)
+        tickers = {str(k).strip(): str(v) for k, v in cfg["tickers"].items()
+                   if str(k).strip()}
+        if tickers:
+            leveraged = tuple(str(x) for x in cfg.get(
+                "daily_leveraged", DEFAULT_DAILY_LEVERAGED))
+            return tickers, leveraged
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return dict(DEFAULT_TICKERS), DEFAULT_DAILY_LEVERAGED
+
+
+TICKERS, DAILY_LEVERAGED = load_universe()
 
 MACRO = {
     "^SOX":  "필라델피아 반도체지수",
@@ -93,6 +160,7 @@ MACRO = {
 CORE_MACRO_SYMBOLS = ("^SOX", "SMH", "NVDA", "KRW=X", "^TNX", "^VIX")
 
 DEFAULT_HORIZON = 20        # 예측 지평 (거래일)
+HORIZON_OPTIONS = (10, 20, 40)
 DEFAULT_PERIOD = "10y"      # 다운로드 기간 (UI에서 1y·3y 포함 선택)
 WF_STEP = 21                # 워크포워드 재학습 주기 (거래일)
 MIN_TRAIN_DAYS = 500        # 첫 예측 전 최소 학습 구간 (합산 달력 기준)
@@ -102,14 +170,31 @@ MIN_CALIBRATION_ROWS = 150
 RECENCY_HALF_LIFE_DAYS = 756 # 최근 3년(약 756거래일)에 가중치 절반
 MACRO_RELEASE_LAG = 1        # 국가별 마감 시차 누수 방지용 보수적 1거래일 지연
 DEFAULT_COST_BPS = 25        # 왕복 수수료+슬리피지 기본값 0.25%
+IMPORTANCE_BATCH = 4        # 순열 중요도: predict_proba 한 번에 묶는 순열 수
 VERSION = "5.0"
 ENTRY_ATR = 1.0             # 조정 시 매수가 = 현재가 − 1.0 × ATR(14)
 STOP_ATR = 2.0              # 손절가 = 기준가 − 2.0 × ATR(14)
 TRIM_ATR = 0.5              # 반등 시 축소가 = 현재가 + 0.5 × ATR(14)
 SPOT_CSV = "spot_prices.csv"
-AUTO_SPOT_CACHE = os.getenv("MEMORY_AUTO_SPOT_CACHE", "auto_spot_prices.csv")
+AUTO_SPOT_CACHE = os.getenv("MEMORY_AUTO_SPOT_CACHE", "auto_spot_prices.csv")  # 옛 CSV(1회 이전용)
+SPOT_STORE = os.getenv("MEMORY_SPOT_STORE", "spot_store.sqlite")
+SPOT_STORE_TIMEOUT = 30.0   # 다른 프로세스가 쓰는 중일 때 기다리는 최대 초
+# 같은 날짜·품목에 여러 출처가 있으면 순위가 높은 값을 쓴다.
+# manual은 세션별 보정값 표기용이며 공유 저장소에는 쓰지 않는다.
+SPOT_SOURCE_RANK = {"legacy": 0, "article": 1, "live": 2, "remote": 3, "manual": 4}
 AUTO_SPOT_TTL_HOURS = 6
+REMOTE_SPOT_TTL_HOURS = float(os.getenv("MEMORY_SPOT_CSV_TTL_HOURS", "1"))
+AUTO_SPOT_REFRESH_SEC = int(os.getenv("MEMORY_SPOT_REFRESH_SEC", "900"))  # 백그라운드 TTL 확인 주기
+AUTO_SPOT_RETRY_SEC = 300   # 실패 후 화면 요청으로 다시 깨우는 최소 간격
+SPOT_REFRESH_WAIT_SEC = 120  # 강제 갱신이 다른 프로세스의 갱신 완료를 기다리는 최대 초
 AUTO_SPOT_NEWS_PAGES = 12
+ARTICLE_INDEX_DIR = os.getenv("MEMORY_ARTICLE_INDEX", "article_index")
+ARTICLE_PARSER_VERSION = "1"    # _parse_spot_article 규칙을 바꾸면 올린다(원문 캐시로 재파싱)
+ARTICLE_FETCH_LIMIT = 80        # 한 번에 새로 받는 기사 수 상한
+SCRAPE_CONCURRENCY = 4      # 수집 클라이언트 전체 동시 요청 수
+SCRAPE_HOST_INTERVAL = float(os.getenv("MEMORY_SCRAPE_INTERVAL", "0.3"))  # 호스트별 요청 간격(초)
+SCRAPE_MAX_BYTES = 4_000_000
+SCRAPE_VALIDATOR_BYTES = 16_000_000  # 조건부 요청용으로 기억하는 본문 총량 상한
 TREND_DRAM_URL = "https://www.trendforce.com/price/dram/dram_spot"
 TREND_NAND_URL = "https://www.trendforce.com/price/flash/flash_spot"
 TREND_NEWS_TAG = "https://www.trendforce.com/news/tag/ddr4/"
@@ -341,6 +426,37 @@ def rolling_zscore(s: pd.Series, n: int,
     return safe_div(s - mu, sd).clip(-8, 8)
 
 
+_WINDOW_BLOCK = 2048         # 한 번에 펼치는 창 수(창×열×n 임시 배열 크기 제한)
+
+
+def _rolling_windows(s, n: int, kernel, outputs: int = 1):
+    """과거 n개 창마다 kernel(windows[..., n]) → outputs개 배열을 벡터로 계산.
+
+    s는 Series이거나 종목을 열로 둔 wide DataFrame이다. rolling(n).apply와
+    같이 창이 다 차지 않은 앞쪽 n−1행은 NaN이다. 창은 sliding_window_view로
+    복사 없이 만들고, 행 블록 단위로 처리해 임시 메모리를 제한한다.
+    """
+    a = s.to_numpy(dtype=float)
+    a2 = a.reshape(len(a), -1)
+    outs = [np.full(a2.shape, np.nan) for _ in range(outputs)]
+    if len(a2) >= n:
+        win = sliding_window_view(a2, n, axis=0)
+        for start in range(0, len(win), _WINDOW_BLOCK):
+            res = kernel(win[start:start + _WINDOW_BLOCK])
+            for out, r in zip(outs, res if outputs > 1 else (res,)):
+                out[n - 1 + start:n - 1 + start + len(r)] = r
+    wrap = (lambda x: pd.Series(x[:, 0], index=s.index)) if a.ndim == 1 else (
+        lambda x: pd.DataFrame(x, index=s.index, columns=s.columns))
+    return tuple(wrap(o) for o in outs) if outputs > 1 else wrap(outs[0])
+
+
+def rolling_mean_abs_dev(s, n: int):
+    """과거 n개 창의 평균절대편차(CCI 분모). 창에 결측이 있으면 NaN."""
+    def mad(w):
+        return np.abs(w - w.mean(axis=-1, keepdims=True)).mean(axis=-1)
+    return _rolling_windows(s, n, mad)
+
+
 def rolling_log_trend(close: pd.Series, n: int) -> tuple[pd.Series, pd.Series]:
     """로그가격 OLS 기울기(창 전체 변화율 환산)와 R².
 
@@ -352,41 +468,39 @@ def rolling_log_trend(close: pd.Series, n: int) -> tuple[pd.Series, pd.Series]:
     xx = float(np.dot(xc, xc))
     lp = np.log(close.where(close > 0))
 
-    def slope_fn(y):
-        if not np.isfinite(y).all():
-            return np.nan
-        return float(np.dot(xc, y - y.mean()) / xx)
-
-    def r2_fn(y):
-        if not np.isfinite(y).all():
-            return np.nan
-        yc = y - y.mean()
-        yy = float(np.dot(yc, yc))
-        if yy <= 1e-16:
-            return 0.0
-        cov = float(np.dot(xc, yc))
-        return float(np.clip(cov * cov / (xx * yy), 0.0, 1.0))
-
-    slope = lp.rolling(n).apply(slope_fn, raw=True)
-    r2 = lp.rolling(n).apply(r2_fn, raw=True)
+    def fit(w):
+        ok = np.isfinite(w).all(axis=-1)
+        yc = w - w.mean(axis=-1, keepdims=True)
+        cov = yc @ xc
+        yy = np.einsum("...i,...i->...", yc, yc)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(yy <= 1e-16, 0.0,
+                          np.clip(cov * cov / (xx * yy), 0.0, 1.0))
+        return np.where(ok, cov / xx, np.nan), np.where(ok, r2, np.nan)
+
+    slope, r2 = _rolling_windows(lp, n, fit, outputs=2)
     return np.expm1((slope * n).clip(-2, 2)), r2
 
 
-def adx_components(df: pd.DataFrame, n: int = 14) -> tuple[pd.Series, ...]:
-    """Wilder 방식 ADX, +DI, -DI. OHLC가 없으면 결측 시리즈를 반환한다."""
-    idx = df.index
-    if not {"High", "Low", "Close"} <= set(df.columns):
-        empty = pd.Series(np.nan, index=idx, dtype=float)
-        return empty, empty.copy(), empty.copy()
-    h, l, c = df["High"], df["Low"], df["Close"]
-    up_move, down_move = h.diff(), -l.diff()
-    plus_dm = pd.Series(np.where((up_move > down_move) & (up_move > 0),
-                                 up_move, 0.0), index=idx)
-    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0),
-                                  down_move, 0.0), index=idx)
+def _column_mask(ok, like):
+    """단일 종목(bool) 또는 wide 패널(종목별 bool Series) 조건을 like 모양으로."""
+    if isinstance(ok, pd.Series):
+        ok = ok.reindex(like.columns).fillna(False).to_numpy(dtype=bool)
+    return np.broadcast_to(np.asarray(ok, dtype=bool), like.shape)
+
+
+def _true_range(h, l, c):
     prev = c.shift()
-    tr = pd.concat([h - l, (h - prev).abs(), (l - prev).abs()], axis=1).max(axis=1)
-    atr = tr.ewm(alpha=1 / n, adjust=False, min_periods=n).mean()
+    # 결측을 건너뛰는 세 값의 최댓값. Series·DataFrame 모두 같은 결과를 낸다.
+    return np.fmax(np.fmax(h - l, (h - prev).abs()), (l - prev).abs())
+
+
+def _adx_kernel(h, l, c, n: int = 14):
+    up_move, down_move = h.diff(), -l.diff()
+    plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0)
+    minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0)
+    atr = _true_range(h, l, c).ewm(alpha=1 / n, adjust=False,
+                                   min_periods=n).mean()
     plus_di = 100 * safe_div(plus_dm.ewm(alpha=1 / n, adjust=False,
                                          min_periods=n).mean(), atr)
     minus_di = 100 * safe_div(minus_dm.ewm(alpha=1 / n, adjust=False,
@@ -396,17 +510,35 @@ def adx_components(df: pd.DataFrame, n: int = 14) -> tuple[pd.Series, ...]:
     return adx, plus_di, minus_di
 
 
-def money_flow_index(df: pd.DataFrame, n: int = 14) -> pd.Series:
-    if not {"High", "Low", "Close", "Volume"} <= set(df.columns):
-        return pd.Series(np.nan, index=df.index, dtype=float)
-    tp = (df["High"] + df["Low"] + df["Close"]) / 3.0
-    flow = tp * df["Volume"]
+def _mfi_kernel(h, l, c, v, n: int = 14):
+    tp = (h + l + c) / 3.0
+    flow = tp * v
     pos = flow.where(tp.diff() > 0, 0.0).rolling(n, min_periods=n).sum()
     neg = flow.where(tp.diff() < 0, 0.0).rolling(n, min_periods=n).sum()
     ratio = safe_div(pos, neg)
     return 100 - 100 / (1 + ratio)
 
 
+def _atr_kernel(h, l, c, n: int = 14, use_hl=True):
+    tr = _true_range(h, l, c).where(_column_mask(use_hl, c), c.diff().abs())
+    return tr.ewm(alpha=1 / n, adjust=False).mean()
+
+
+def adx_components(df: pd.DataFrame, n: int = 14) -> tuple[pd.Series, ...]:
+    """Wilder 방식 ADX, +DI, -DI. OHLC가 없으면 결측 시리즈를 반환한다."""
+    idx = df.index
+    if not {"High", "Low", "Close"} <= set(df.columns):
+        empty = pd.Series(np.nan, index=idx, dtype=float)
+        return empty, empty.copy(), empty.copy()
+    return _adx_kernel(df["High"], df["Low"], df["Close"], n)
+
+
+def money_flow_index(df: pd.DataFrame, n: int = 14) -> pd.Series:
+    if not {"High", "Low", "Close", "Volume"} <= set(df.columns):
+        return pd.Series(np.nan, index=df.index, dtype=float)
+    return _mfi_kernel(df["High"], df["Low"], df["Close"], df["Volume"], n)
+
+
 def _naive_index(df: pd.DataFrame) -> pd.DataFrame:
     """시장별 타임존이 섞이면 비교가 깨지므로 전부 naive datetime으로 통일."""
     idx = pd.to_datetime(df.index)
@@ -434,69 +566,433 @@ def _retry(fn, tries: int = 2):
     raise last
 
 
-def download_prices(period: str = DEFAULT_PERIOD) -> dict[str, pd.DataFrame]:
-    import yfinance as yf
+_YF_SPAN_RANK = {"ytd": 0, "1y": 1, "2y": 2, "5y": 3, "10y": 4, "max": 5}
+
 
-    symbols = list(TICKERS) + list(MACRO)
+def _yf_period(period: str) -> str:
     # yfinance는 3y·15y 문자열을 공식 period로 받지 않는다. 3y는 5y를 받아
     # 절단해 불필요한 max 다운로드를 피하고, 15y만 max를 받아 절단한다.
-    yf_period = "5y" if period == "3y" else (
-        period if period in {"1y", "2y", "5y", "10y", "ytd", "max"} else "max")
-    raw = _retry(lambda: yf.download(
-        symbols, period=yf_period, auto_adjust=True,
-        group_by="ticker", progress=False, threads=True,
-    ))
-    out: dict[str, pd.DataFrame] = {}
+    return "5y" if period == "3y" else (
+        period if period in _YF_SPAN_RANK else "max")
+
+
+def _slice_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """캐시된 전체 이력에서 요청 기간만 잘라낸다."""
+    today = pd.Timestamp.today().normalize()
+    if period.endswith("y") and period[:-1].isdigit():
+        return df[df.index >= today - pd.DateOffset(years=int(period[:-1]))]
+    if period == "ytd":
+        return df[df.index >= pd.Timestamp(today.year, 1, 1)]
+    return df
+
+
+def _bars_from_download(raw: pd.DataFrame, sym: str) -> pd.DataFrame | None:
+    try:
+        if isinstance(raw.columns, pd.MultiIndex):
+            df = raw[sym]
+        else:  # 심볼 1개만 성공한 경우 등
+            df = raw
+        df = df.dropna(how="all")
+        if df.empty or "Close" not in df.columns:
+            return None
+        keep = df[["Close"]].copy()
+        for c in ("Open", "High", "Low", "Volume"):
+            keep[c] = df[c] if c in df.columns else np.nan
+        keep = _naive_index(keep.dropna(subset=["Close"]))
+        return keep if not keep.empty else None
+    except Exception:
+        return None
+
+
+def _price_cache_paths(sym: str) -> tuple[str, str]:
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", sym)
+    digest = hashlib.sha1(sym.encode("utf-8")).hexdigest()[:8]
+    base = os.path.join(PRICE_CACHE_DIR, f"{safe}-{digest}")
+    return f"{base}.parquet", f"{base}.json"
+
+
+def _read_price_cache(sym: str) -> tuple[pd.DataFrame, dict] | None:
+    if not PRICE_CACHE_DIR:
+        return None
+    bars_path, meta_path = _price_cache_paths(sym)
+    try:
+        if not (os.path.exists(bars_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, encoding="utf-8") as fh:
+            meta = json.load(fh)
+        bars = pd.read_parquet(bars_path)
+        return (bars, meta) if not bars.empty else None
+    except Exception:
+        return None
+
+
+def _write_price_cache(sym: str, bars: pd.DataFrame, span: str) -> None:
+    if not PRICE_CACHE_DIR:
+        return
+    bars_path, meta_path = _price_cache_paths(sym)
+    suffix = f".tmp-{os.getpid()}-{threading.get_ident()}"
+    meta = {"symbol": sym, "span": span, "fetched_at": time.time(),
+            "rows": int(len(bars)), "last_date": str(bars.index[-1].date())}
+    try:
+        os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+        bars.to_parquet(bars_path + suffix)
+        with open(meta_path + suffix, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(bars_path + suffix, bars_path)
+        os.replace(meta_path + suffix, meta_path)
+    except Exception:
+        for tmp in (bars_path + suffix, meta_path + suffix):
+            try:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _merge_tail(cached: pd.DataFrame, tail: pd.DataFrame) -> pd.DataFrame | None:
+    """캐시 끝부분과 새로 받은 꼬리를 겹침 창으로 대조해 이어 붙인다.
+
+    수정주가(배당·분할)가 소급 반영되면 겹치는 종가가 달라지므로 None을
+    돌려 전체 재다운로드를 유도한다. 캐시의 마지막 봉은 장중 미완성일 수
+    있어 대조에서 빼고 새 값으로 덮어쓴다.
+    """
+    if tail is None or tail.empty:
+        return None
+    settled = cached.iloc[:-1]
+    common = settled.index.intersection(tail.index)
+    if common.empty and tail.index[0] > cached.index[-1]:
+        return None  # 겹침 창이 비면 소급 변경을 확인할 수 없다
+    if not np.allclose(settled.loc[common, "Close"].to_numpy(float),
+                       tail.loc[common, "Close"].to_numpy(float),
+                       rtol=1e-6, atol=0.0, equal_nan=True):
+        return None
+    return pd.concat([cached[cached.index < tail.index[0]], tail])
+
+
+def download_prices(period: str = DEFAULT_PERIOD,
+                    universe: dict[str, str] | None = None
+                    ) -> dict[str, pd.DataFrame]:
+    """종목·관련 지표 일봉을 받아 기간만큼 잘라 돌려준다.
+
+    심볼마다 PRICE_CACHE_DIR에 전체 OHLCV를 보관하고, 이미 받은 구간은 다시
+    받지 않고 마지막 PRICE_OVERLAP_BARS개 봉부터 꼬리만 받는다(같은 시작일끼리
+    한 요청으로 묶는다). 기간 절단은 로컬 캐시에서 한다. Yahoo가 실패·제한하면 마지막 캐시로 계속 동작한다.
+    """
+    import yfinance as yf
+
+    symbols = list(dict.fromkeys([*(universe or TICKERS), *MACRO]))
+    yf_period = _yf_period(period)
+    need = _YF_SPAN_RANK[yf_period]
+    now = time.time()
+
+    cached: dict[str, pd.DataFrame] = {}
+    spans: dict[str, str] = {}
+    full: dict[str, str] = {}   # 전체 재다운로드할 심볼 → 받을 yf period
+    delta = []
     for sym in symbols:
+        hit = _read_price_cache(sym)
+        if hit is None or _YF_SPAN_RANK.get(hit[1].get("span"), -1) < need:
+            full[sym] = yf_period
+            if hit is not None:
+                cached[sym] = hit[0]
+            continue
+        cached[sym], spans[sym] = hit[0], hit[1]["span"]
+        if now - float(hit[1].get("fetched_at", 0)) >= PRICE_CACHE_TTL_SEC:
+            delta.append(sym)
+
+    fresh: dict[str, pd.DataFrame] = {}
+    # 심볼마다 자기 겹침 구간부터 받는다. 가장 오래된 시작일 하나로 묶으면
+    # 오래 갱신 안 된 심볼 하나 때문에 나머지도 긴 꼬리를 받고 병합한다.
+    by_start: dict[str, list[str]] = {}
+    for sym in delta:
+        start = cached[sym].index[-min(PRICE_OVERLAP_BARS, len(cached[sym]))]
+        by_start.setdefault(start.strftime("%Y-%m-%d"), []).append(sym)
+    for start, syms in by_start.items():
         try:
-            if isinstance(raw.columns, pd.MultiIndex):
-                df = raw[sym]
-            else:  # 심볼 1개만 성공한 경우 등
-                df = raw
-            df = df.dropna(how="all")
-            if df.empty or "Close" not in df.columns:
-                continue
-            keep = df[["Close"]].copy()
-            for c in ("Open", "High", "Low", "Volume"):
-                keep[c] = df[c] if c in df.columns else np.nan
-            keep = _naive_index(keep.dropna(subset=["Close"]))
-            if period.endswith("y") and period[:-1].isdigit():
-                cutoff = pd.Timestamp.today().normalize() - pd.DateOffset(
-                    years=int(period[:-1]))
-                keep = keep[keep.index >= cutoff]
-            out[sym] = keep
+            raw = _retry(lambda: yf.download(
+                syms, start=start, auto_adjust=True,
+                group_by="ticker", progress=False, threads=True,
+            ))
+        except Exception:
+            raw = None
+        for sym in syms:
+            tail = _bars_from_download(raw, sym) if raw is not None else None
+            if tail is None:
+                continue  # 꼬리 수신 실패 → 기존 캐시 사용
+            merged = _merge_tail(cached[sym], tail)
+            if merged is None:
+                # 소급 수정: 요청 기간이 아니라 캐시가 덮던 더 긴 구간을 다시
+                # 받아야 max 캐시가 짧은 요청 하나로 줄어들지 않는다.
+                full[sym] = spans[sym]
+            else:
+                fresh[sym] = merged
+                _write_price_cache(sym, merged, spans[sym])
+
+    by_span: dict[str, list[str]] = {}
+    for sym, span in full.items():
+        by_span.setdefault(span, []).append(sym)
+    for span, syms in by_span.items():
+        try:
+            raw = _retry(lambda: yf.download(
+                syms, period=span, auto_adjust=True,
+                group_by="ticker", progress=False, threads=True,
+            ))
         except Exception:
+            raw = None
+        for sym in syms:
+            bars = _bars_from_download(raw, sym) if raw is not None else None
+            if bars is None:
+                continue
+            fresh[sym] = bars
+            _write_price_cache(sym, bars, span)
+
+    out: dict[str, pd.DataFrame] = {}
+    for sym in symbols:
+        bars = fresh.get(sym, cached.get(sym))
+        if bars is None:
             continue
+        bars = _slice_period(bars, period)
+        if not bars.empty:
+            out[sym] = bars
     return out
 
 
 # ──────────────────────────────
 # DRAM/NAND 현물가 자동 수집
 # ──────────────────────────────
-_AUTO_SPOT_LOCK = threading.Lock()
 
+def _gunzip_prefix(body: bytes, limit: int) -> tuple[bytes, bool]:
+    """gzip 본문을 limit 바이트까지 푼다. (풀린 본문, 잘렸는지).
 
-def _http_text(url: str, timeout: int = 20) -> str:
-    """공개 페이지만 읽는 가벼운 HTTP 클라이언트.
-
-    외부 requests/lxml 의존성을 추가하지 않아 기존 배포환경에서도 작동한다.
-    로그인·유료 다운로드 URL은 접근하지 않는다.
+    SCRAPE_MAX_BYTES에서 잘린 압축 본문은 gzip.decompress가 실패하므로
+    스트림으로 받은 앞부분까지만 풀어, 비압축 응답을 자를 때와 같게 다룬다.
     """
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": (
-                "Mozilla/5.0 (compatible; MemoryStockDashboard/4.1; "
-                "+https://www.trendforce.com/)"
-            ),
-            "Accept": "text/html,application/xhtml+xml,text/csv;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-        },
-    )
-    with urllib.request.urlopen(req, timeout=timeout) as response:
-        raw = response.read(4_000_000)
-        charset = response.headers.get_content_charset() or "utf-8"
-    return raw.decode(charset, errors="replace")
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        out = inflater.decompress(body, limit)
+    except zlib.error as exc:
+        raise urllib.error.URLError(f"gzip 본문 해제 실패: {exc}") from exc
+    return out, not inflater.eof or bool(inflater.unconsumed_tail)
+
+
+class ScrapeClient:
+    """공개 페이지 수집용 HTTP 클라이언트(표준 라이브러리만 사용).
+
+    호스트별 keep-alive 연결을 재사용하고, 전체 동시 요청 수(concurrency)와
+    호스트별 최소 요청 간격(host_interval)을 지켜 같은 사이트에 연결이 몰리지
+    않게 한다. 한 번 받은 URL은 ETag/Last-Modified를 기억해 조건부 요청하고,
+    304면 기억한 본문을 돌려준다. 기억하는 본문은 총 max_validator_bytes까지만
+    두고 오래 안 쓴 URL부터 버린다. 본문은 SCRAPE_MAX_BYTES에서 자르며, 잘린
+    gzip 본문은 받은 앞부분까지만 풀고 기억하지 않는다. 외부 requests/lxml 의존성을 추가하지 않아
+    기존 배포환경에서도 작동한다. 로그인·유료 다운로드 URL은 접근하지 않는다.
+    """
+
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (compatible; MemoryStockDashboard/4.1; "
+            "+https://www.trendforce.com/)"
+        ),
+        "Accept": "text/html,application/xhtml+xml,text/csv;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept-Encoding": "gzip",
+    }
+
+    def __init__(self, concurrency: int = SCRAPE_CONCURRENCY,
+                 host_interval: float = SCRAPE_HOST_INTERVAL,
+                 retries: int = 1,
+                 max_validator_bytes: int = SCRAPE_VALIDATOR_BYTES):
+        self.concurrency = max(1, int(concurrency))
+        self.host_interval = max(0.0, float(host_interval))
+        self.retries = retries
+        self.max_validator_bytes = max(0, int(max_validator_bytes))
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._next_at: dict[str, float] = {}
+        # url -> (ETag, Last-Modified, 본문, 본문 바이트 수)
+        self._validators: dict[str, tuple[str | None, str | None, str, int]] = {}
+        self._validator_bytes = 0
+        self.stats = {"requests": 0, "not_modified": 0, "connections": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    # 연결 풀 ------------------------------------------------------------
+    def _connect(self, scheme: str, host: str, timeout: float):
+        with self._lock:
+            idle = self._idle.get((scheme, host))
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.stats["connections"] += 1
+        cls = (http.client.HTTPSConnection if scheme == "https"
+               else http.client.HTTPConnection)
+        return cls(host, timeout=timeout), False
+
+    def _release(self, scheme: str, host: str, conn) -> None:
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host), [])
+            if len(idle) < self.concurrency:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for conn in idle:
+                conn.close()
+
+    def _pace(self, host: str) -> None:
+        """호스트별 최소 간격. 대기열 순서대로 다음 허용 시각을 예약한다."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at.get(host, 0.0))
+            self._next_at[host] = start + self.host_interval
+        if start > now:
+            time.sleep(start - now)
+
+    # 요청 ---------------------------------------------------------------
+    def _once(self, url: str, headers: dict, timeout: float):
+        parts = urllib.parse.urlsplit(url)
+        scheme, host = parts.scheme.lower(), parts.netloc
+        if scheme not in ("http", "https") or not host:
+            raise urllib.error.URLError(f"지원하지 않는 URL: {url}")
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        for attempt in (0, 1):
+            conn, reused = self._connect(scheme, host, timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read(SCRAPE_MAX_BYTES + 1)
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                # 서버가 닫아 둔 keep-alive 연결이면 새 연결로 한 번 더.
+                if reused and attempt == 0:
+                    continue
+                raise
+            truncated = len(body) > SCRAPE_MAX_BYTES
+            if resp.isclosed() and not resp.will_close and not truncated:
+                self._release(scheme, host, conn)
+            else:
+                conn.close()
+            return resp, body[:SCRAPE_MAX_BYTES], truncated
+        raise urllib.error.URLError(f"연결 실패: {url}")
+
+    def get_text(self, url: str, timeout: float = 20) -> str:
+        """본문 텍스트. 304면 기억한 본문, 4xx/5xx면 urllib.error.HTTPError."""
+        cached = self._validators.get(url)
+        headers = dict(self.headers)
+        if cached is not None:
+            if cached[0]:
+                headers["If-None-Match"] = cached[0]
+            if cached[1]:
+                headers["If-Modified-Since"] = cached[1]
+        for attempt in range(self.retries + 1):
+            target = url
+            try:
+                with self._slots:
+                    for _ in range(5):   # 리다이렉트
+                        self._pace(urllib.parse.urlsplit(target).netloc)
+                        resp, body, truncated = self._once(target, headers, timeout)
+                        self._count("requests")
+                        location = resp.getheader("Location")
+                        if resp.status in (301, 302, 303, 307, 308) and location:
+                            target = urllib.parse.urljoin(target, location)
+                            continue
+                        break
+            except (OSError, http.client.HTTPException):
+                if attempt >= self.retries:
+                    raise
+                time.sleep(1.5 * (attempt + 1))   # 동시 요청 슬롯 밖에서 물러난다
+                continue
+            if resp.status == 304 and cached is not None:
+                self._count("not_modified")
+                with self._lock:
+                    if url in self._validators:      # 최근 사용으로
+                        self._validators[url] = self._validators.pop(url)
+                return cached[2]
+            if resp.status == 200:
+                if (resp.getheader("Content-Encoding") or "").lower() == "gzip":
+                    body, partial = _gunzip_prefix(body, SCRAPE_MAX_BYTES)
+                    truncated = truncated or partial
+                charset = resp.headers.get_content_charset() or "utf-8"
+                text = body.decode(charset, errors="replace")
+                if truncated:
+                    # 잘린 본문을 304 응답으로 계속 돌려주지 않도록 기억하지 않는다.
+                    self._forget(url)
+                else:
+                    self._remember(url, resp, text, len(body))
+                return text
+            if resp.status in (429, 500, 502, 503, 504) and attempt < self.retries:
+                try:
+                    wait = float(resp.getheader("Retry-After") or 0)
+                except ValueError:
+                    wait = 0.0
+                time.sleep(min(10.0, max(wait, 1.5 * (attempt + 1))))
+                continue
+            raise urllib.error.HTTPError(target, resp.status, resp.reason,
+                                         resp.headers, None)
+        raise urllib.error.URLError(f"재시도 초과: {url}")
+
+    def _forget(self, url: str) -> None:
+        with self._lock:
+            old = self._validators.pop(url, None)
+            if old is not None:
+                self._validator_bytes -= old[3]
+
+    def _remember(self, url: str, resp, text: str, size: int) -> None:
+        """조건부 요청용 검증값과 본문을 기억한다(본문 총량은 max_validator_bytes 이하)."""
+        etag, modified = resp.getheader("ETag"), resp.getheader("Last-Modified")
+        self._forget(url)
+        if not (etag or modified) or size > self.max_validator_bytes:
+            return
+        with self._lock:
+            self._validators[url] = (etag, modified, text, size)
+            self._validator_bytes += size
+            while self._validator_bytes > self.max_validator_bytes:
+                oldest = self._validators.pop(next(iter(self._validators)))
+                self._validator_bytes -= oldest[3]
+
+    def map(self, fn, items) -> list[tuple[object, object, BaseException | None]]:
+        """fn(item)을 동시 요청 한도 안에서 병렬 실행. 입력 순서의 (item, 결과, 예외)."""
+        items = list(items)
+        if not items:
+            return []
+        out = []
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.concurrency, len(items))) as pool:
+            futures = [pool.submit(fn, item) for item in items]
+            for item, future in zip(items, futures):
+                try:
+                    out.append((item, future.result(), None))
+                except Exception as exc:  # noqa: BLE001
+                    out.append((item, None, exc))
+        return out
+
+
+_SCRAPER: ScrapeClient | None = None
+_SCRAPER_LOCK = threading.Lock()
+
+
+def scrape_client() -> ScrapeClient:
+    """프로세스 공용 수집 클라이언트(연결 풀·속도 제한 공유)."""
+    global _SCRAPER
+    if _SCRAPER is None:
+        with _SCRAPER_LOCK:
+            if _SCRAPER is None:
+                _SCRAPER = ScrapeClient()
+    return _SCRAPER
+
+
+def _http_text(url: str, timeout: int = 20) -> str:
+    """공개 페이지 본문. 공용 ScrapeClient를 거친다(재시도·조건부 요청 포함)."""
+    return scrape_client().get_text(url, timeout=timeout)
 
 
 def _plain_html(fragment: str) -> str:
@@ -531,65 +1027,167 @@ def _normalise_spot_data(df: pd.DataFrame | None) -> pd.DataFrame:
         if isinstance(out.index, pd.DatetimeIndex):
             out = out.reset_index()
         out = out.rename(columns={out.columns[0]: "날짜"})
-    out["날짜"] = pd.to_datetime(out["날짜"], errors="coerce").dt.normalize()
+    dates = pd.to_datetime(out["날짜"], errors="coerce")
+    if dates.isna().any():
+        # 첫 값으로 형식을 추론하므로 '2025-01-13 15:30'과 '2025-01-20'처럼
+        # 형식이 섞인 수동 입력은 나머지 행이 NaT로 버려진다. 행마다 다시 읽는다.
+        dates = pd.to_datetime(out["날짜"], errors="coerce", format="mixed")
+    out["날짜"] = dates.dt.normalize()
     out = out.dropna(subset=["날짜"])
     for col in [c for c in out.columns if c != "날짜"]:
-        out[col] = pd.to_numeric(out[col], errors="coerce")
+        if not pd.api.types.is_numeric_dtype(out[col]):
+            out[col] = pd.to_numeric(out[col], errors="coerce")
+    if out["날짜"].is_monotonic_increasing and out["날짜"].is_unique:
+        return out.reset_index(drop=True)   # 이미 날짜별 한 행이면 groupby 생략
     return (out.sort_values("날짜").groupby("날짜", as_index=False)
                .last().reset_index(drop=True))
 
 
 def merge_spot_data(*frames: pd.DataFrame | None) -> pd.DataFrame:
-    """앞에서 뒤 순서로 병합하며, 뒤의 프레임이 같은 날짜·컬럼을 덮어쓴다."""
-    merged: pd.DataFrame | None = None
-    for frame in frames:
-        clean = _normalise_spot_data(frame)
-        if clean.empty:
-            continue
-        indexed = clean.set_index("날짜")
-        merged = indexed if merged is None else indexed.combine_first(merged)
-    if merged is None:
+    """앞에서 뒤 순서로 병합하며, 뒤의 프레임이 같은 날짜·컬럼을 덮어쓴다.
+
+    combine_first를 거듭하지 않고 입력마다 한 번만 정규화한 뒤, 날짜·컬럼
+    합집합 격자 하나에 순위 순서대로 NaN이 아닌 값만 덮어쓴다(입력 크기에
+    선형). 뒤 프레임의 NaN은 앞의 값을 지우지 않고, 값이 모두 빈 날짜 행과
+    컬럼 순서(combine_first와 같은 합집합 순서)도 그대로 유지한다.
+    """
+    cleaned = [clean for clean in map(_normalise_spot_data, frames) if not clean.empty]
+    if not cleaned:
         return _normalise_spot_data(None)
-    merged.index.name = "날짜"
-    return _normalise_spot_data(merged.reset_index())
-
-
-def _quote_from_table(page_html: str, item_pattern: str) -> dict | None:
-    """TrendForce HTML 표에서 해당 품목의 Session Average를 추출."""
-    table_re = re.compile(r"<table\b[^>]*>(.*?)</table>", re.I | re.S)
-    row_re = re.compile(r"<tr\b[^>]*>(.*?)</tr>", re.I | re.S)
-    cell_re = re.compile(r"<t[dh]\b[^>]*>(.*?)</t[dh]>", re.I | re.S)
-    for table_match in table_re.finditer(page_html):
-        rows = []
-        for row_html in row_re.findall(table_match.group(1)):
-            cells = [_plain_html(x) for x in cell_re.findall(row_html)]
-            if cells:
-                rows.append(cells)
-        if len(rows) < 2 or "Item" not in rows[0]:
+    if len(cleaned) == 1:
+        return cleaned[0]
+    columns: pd.Index | None = None
+    for clean in cleaned:
+        values = clean.columns.drop("날짜")
+        columns = values if columns is None else values.union(columns)
+    dates = pd.DatetimeIndex(
+        np.concatenate([clean["날짜"].to_numpy() for clean in cleaned])
+    ).unique().sort_values()
+    grid = np.full((len(dates), len(columns)), np.nan)
+    for clean in cleaned:   # 정규화로 프레임 안의 날짜는 이미 유일하다
+        values = clean.columns.drop("날짜")
+        block = clean[values].to_numpy(float)
+        cell = np.ix_(dates.get_indexer(clean["날짜"]), columns.get_indexer(values))
+        grid[cell] = np.where(np.isnan(block), grid[cell], block)
+    wide = pd.DataFrame(grid, columns=columns)
+    wide.insert(0, "날짜", dates)
+    return wide
+
+
+_LAST_UPDATE_RE = re.compile(r"Last\s*Update\s*:?[ ]*(\d{4}-\d{2}-\d{2})", re.I)
+_UPDATE_HINT_RE = re.compile(r"update", re.I)
+_UPDATE_LOOKBACK = 30_000   # 표 시작 전 이 글자 수 안에 나온 날짜만 그 표의 기준일로 본다
+# 표 구조에 필요한 태그와 통째로 버릴 script/style만 멈추는 토크나이저.
+_TABLE_TOKEN_RE = re.compile(
+    r"<(script|style)\b.*?</\1\s*>|<(/?)(table|tr|td|th)\b[^>]*>", re.I | re.S)
+
+
+def _page_tables(page_html: str) -> list[dict]:
+    """페이지를 한 번 훑어 모든 표와 각 표 직전의 'Last Update' 날짜를 모은다.
+
+    반환은 문서 순서의 [{"rows": [[셀 평문, ...], ...], "update": "YYYY-MM-DD"
+    또는 None}]. 날짜는 직전 행·표 경계 이후 쌓인 평문(셀 경계를 넘어,
+    예: <td>Last Update</td><td>2024-05-01</td>)에서 찾고, 표 시작 전
+    _UPDATE_LOOKBACK 글자 안에서 마지막으로 나온 것만 쓴다. 품목마다 페이지를
+    다시 정규식으로 훑지 않도록 _quote_from_table은 이 결과만 본다.
+    """
+    tables: list[dict] = []
+    stack: list[dict] = []      # 열린 표(중첩 대비): {"table", "row", "cell"}
+    update: tuple[str, int] | None = None   # (날짜, 찾은 위치)
+    recent: list[tuple[int, str]] = []   # 직전 행·표 경계 이후 (시작 위치, 텍스트)
+    opened = 0
+    pos = 0
+
+    def scan_recent() -> None:
+        nonlocal update
+        chunk = " ".join(text for _, text in recent)
+        if _UPDATE_HINT_RE.search(chunk):
+            dates = _LAST_UPDATE_RE.findall(_plain_html(chunk))
+            if dates:
+                at = recent[-1][0]
+                for start, text in reversed(recent):
+                    if dates[-1] in text:
+                        at = start + text.rindex(dates[-1])
+                        break
+                update = (dates[-1], at)
+        recent.clear()
+
+    def close_cell(frame):
+        if frame["cell"] is not None and frame["row"] is not None:
+            frame["row"].append(_plain_html("".join(frame["cell"])))
+        frame["cell"] = None
+
+    def close_row(frame):
+        close_cell(frame)
+        if frame["row"]:
+            frame["table"]["rows"].append(frame["row"])
+        frame["row"] = None
+
+    for token in _TABLE_TOKEN_RE.finditer(page_html):
+        text, start = page_html[pos:token.start()], pos
+        pos = token.end()
+        if stack and stack[-1]["cell"] is not None:
+            stack[-1]["cell"].append(text)
+        recent.append((start, text))
+        if token.group(1):                       # script/style 블록
+            continue
+        closing, tag = token.group(2) == "/", token.group(3).lower()
+        if tag in ("table", "tr"):
+            scan_recent()
+        top = stack[-1] if stack else None
+        if tag == "table":
+            if not closing:
+                found = (update[0] if update is not None
+                         and token.start() - update[1] <= _UPDATE_LOOKBACK else None)
+                stack.append({"table": {"rows": [], "update": found,
+                                        "order": opened},
+                              "row": None, "cell": None})
+                opened += 1
+            elif top is not None:
+                close_row(top)
+                tables.append(stack.pop()["table"])
+        elif top is None:
+            continue
+        elif tag == "tr":
+            close_row(top)
+            if not closing:
+                top["row"] = []
+        elif closing:
+            close_cell(top)
+        else:
+            close_cell(top)
+            if top["row"] is None:
+                top["row"] = []
+            top["cell"] = []
+    while stack:                                  # 닫히지 않은 표
+        close_row(stack[-1])
+        tables.append(stack.pop()["table"])
+    # 중첩 표는 안쪽이 먼저 닫히므로 여는 순서로 되돌린다.
+    return sorted(tables, key=lambda t: t["order"])
+
+
+def _quote_from_table(tables: list[dict], item_pattern: str) -> dict | None:
+    """_page_tables로 한 번 파싱한 표에서 해당 품목의 Session Average를 추출."""
+    item_re = re.compile(item_pattern, re.I)
+    for table in tables:
+        rows = [r for r in table["rows"] if r]
+        if len(rows) < 2 or "Item" not in rows[0] or not table["update"]:
             continue
         header = rows[0]
         for row in rows[1:]:
-            if not row or not re.fullmatch(item_pattern, row[0], flags=re.I):
+            if not item_re.fullmatch(row[0]):
                 continue
             mapped = {header[i]: row[i] for i in range(min(len(header), len(row)))}
             value = _number(mapped.get("Session Average", mapped.get("Average")))
             if value is None or value <= 0:
                 continue
-            before = _plain_html(page_html[max(0, table_match.start() - 30000):
-                                           table_match.start()])
-            dates = re.findall(
-                r"Last\s*Update\s*:?[ ]*(\d{4}-\d{2}-\d{2})", before,
-                flags=re.I,
-            )
-            if not dates:
-                continue
             change_text = str(mapped.get(
                 "Session Change", mapped.get("Average Change", "")))
             change = _number(change_text)
             if change is not None and "▼" in change_text and change > 0:
                 change = -change
             return {
-                "date": pd.Timestamp(dates[-1]).normalize(),
+                "date": pd.Timestamp(table["update"]).normalize(),
                 "value": float(value),
                 "change_pct": change,
                 "item": row[0],
@@ -602,21 +1200,13 @@ def _current_trendforce_spot() -> tuple[pd.DataFrame, dict, list[str]]:
     pages: dict[str, str] = {}
     errors: list[str] = []
 
-    def get_page(name_url):
-        name, url = name_url
-        return name, _retry(lambda: _http_text(url), tries=1)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
-        futures = {
-            pool.submit(get_page, item): item[0]
-            for item in (("dram", TREND_DRAM_URL), ("nand", TREND_NAND_URL))
-        }
-        for future, name in futures.items():
-            try:
-                key, value = future.result()
-                pages[key] = value
-            except Exception as exc:  # noqa: BLE001
-                errors.append(f"{name} 페이지: {type(exc).__name__}")
+    for (name, _), page, exc in scrape_client().map(
+            lambda item: _http_text(item[1]),
+            (("dram", TREND_DRAM_URL), ("nand", TREND_NAND_URL))):
+        if exc is None:
+            pages[name] = page
+        else:
+            errors.append(f"{name} 페이지: {type(exc).__name__}")
 
     specs = (
         ("DRAM_DDR5_16Gb", "dram", r"DDR5\s+16Gb\s+\(2Gx8\)\s+4800/5600"),
@@ -625,8 +1215,9 @@ def _current_trendforce_spot() -> tuple[pd.DataFrame, dict, list[str]]:
     )
     records: list[dict] = []
     updates: dict[str, str] = {}
+    tables = {key: _page_tables(page) for key, page in pages.items()}
     for col, page_key, pattern in specs:
-        quote = _quote_from_table(pages.get(page_key, ""), pattern)
+        quote = _quote_from_table(tables.get(page_key, []), pattern)
         if quote is None:
             errors.append(f"{col} 표 파싱 실패")
             continue
@@ -640,8 +1231,13 @@ def _current_trendforce_spot() -> tuple[pd.DataFrame, dict, list[str]]:
     return _normalise_spot_data(pd.DataFrame(records)), updates, errors
 
 
-def _trendforce_article_urls(page_count: int) -> tuple[list[str], list[str]]:
-    """DRAM 태그 페이지의 공개 Memory Spot Price Update 기사 URL."""
+def _trendforce_article_urls(page_count: int, seen: set[str] | None = None
+                             ) -> tuple[list[str], list[str]]:
+    """DRAM 태그 페이지의 공개 Memory Spot Price Update 기사 URL.
+
+    seen을 주면 최신 페이지부터 차례로 읽다가 이미 본 기사가 나온 페이지에서
+    멈춘다(목록은 최신순이므로 그 뒤는 모두 색인에 있다).
+    """
     page_urls = [TREND_NEWS_TAG] + [
         urllib.parse.urljoin(TREND_NEWS_TAG, f"page/{page}/")
         for page in range(2, page_count + 1)
@@ -649,7 +1245,7 @@ def _trendforce_article_urls(page_count: int) -> tuple[list[str], list[str]]:
     errors: list[str] = []
 
     def parse_page(url: str) -> list[str]:
-        page_html = _retry(lambda: _http_text(url), tries=1)
+        page_html = _http_text(url)
         found: list[str] = []
         for href in re.findall(r'''href=["']([^"']+)["']''', page_html, re.I):
             absolute = urllib.parse.urljoin(url, html.unescape(href))
@@ -665,25 +1261,36 @@ def _trendforce_article_urls(page_count: int) -> tuple[list[str], list[str]]:
         return found
 
     collected: list[str] = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
-        futures = {pool.submit(parse_page, url): url for url in page_urls}
-        for future, url in futures.items():
+    if seen:
+        for url in page_urls:
             try:
-                collected.extend(future.result())
+                found = parse_page(url)
             except Exception as exc:  # noqa: BLE001
                 errors.append(
                     f"기사 목록 {url.rstrip('/').rsplit('/', 1)[-1]}: "
                     f"{type(exc).__name__}"
                 )
+                break
+            collected.extend(found)
+            if any(u in seen for u in found):
+                break
+        return list(dict.fromkeys(collected)), errors
+    for url, found, exc in scrape_client().map(parse_page, page_urls):
+        if exc is None:
+            collected.extend(found)
+        else:
+            errors.append(
+                f"기사 목록 {url.rstrip('/').rsplit('/', 1)[-1]}: "
+                f"{type(exc).__name__}"
+            )
     return list(dict.fromkeys(collected)), errors
 
 
-def _spot_from_article(url: str) -> dict | None:
+def _parse_spot_article(url: str, page_html: str) -> dict | None:
     """공개 주간 기사 본문의 명시적인 USD 현물가만 추출."""
     match = re.search(r"/news/(\d{4})/(\d{2})/(\d{2})/", url)
     if not match:
         return None
-    page_html = _retry(lambda: _http_text(url), tries=1)
     paragraphs = [
         _plain_html(block)
         for block in re.findall(r"<p\b[^>]*>(.*?)</p>", page_html, re.I | re.S)
@@ -718,65 +1325,302 @@ def _spot_from_article(url: str) -> dict | None:
     return record if len(record) > 1 else None
 
 
+# ──────────────────────────────────────────────────────────────
+# 공개 기사 색인 (URL → 파싱 결과·수집 시각·파서 버전, 원문 gzip)
+# ──────────────────────────────────────────────────────────────
+_ARTICLE_INDEX_LOCK = threading.Lock()
+
+
+def _article_index_path() -> str:
+    return os.path.join(ARTICLE_INDEX_DIR, "index.json")
+
+
+def _article_raw_path(url: str) -> str:
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(ARTICLE_INDEX_DIR, "raw", f"{digest}.html.gz")
+
+
+def _load_article_index() -> dict:
+    """{"backfill_pages": 백필을 끝낸 목록 페이지 수, "articles": {url: 항목}}."""
+    if ARTICLE_INDEX_DIR:
+        try:
+            with open(_article_index_path(), encoding="utf-8") as fh:
+                index = json.load(fh)
+            if isinstance(index.get("articles"), dict):
+                return index
+        except (OSError, ValueError, AttributeError):
+            pass
+    return {"backfill_pages": 0, "articles": {}}
+
+
+def _save_article_index(index: dict) -> None:
+    if not ARTICLE_INDEX_DIR:
+        return
+    path = _article_index_path()
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.makedirs(ARTICLE_INDEX_DIR, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(index, fh, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _read_article_raw(url: str) -> str | None:
+    if not ARTICLE_INDEX_DIR:
+        return None
+    try:
+        with open(_article_raw_path(url), "rb") as fh:
+            return gzip.decompress(fh.read()).decode("utf-8")
+    except (OSError, ValueError):
+        return None
+
+
+def _write_article_raw(url: str, page_html: str) -> None:
+    if not ARTICLE_INDEX_DIR:
+        return
+    path = _article_raw_path(url)
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as fh:
+            fh.write(gzip.compress(page_html.encode("utf-8"), mtime=0))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _article_entry(record: dict | None) -> dict:
+    """색인 항목. 현물가가 없는 기사도 남겨 다시 받지 않는다."""
+    if record is not None:
+        record = {**record, "날짜": record["날짜"].strftime("%Y-%m-%d")}
+    return {"record": record, "fetched_at": time.time(),
+            "parser": ARTICLE_PARSER_VERSION}
+
+
+def _spot_from_article(url: str) -> dict | None:
+    """기사를 받아 원문을 색인 캐시에 남기고 현물가를 추출."""
+    page_html = _http_text(url)
+    _write_article_raw(url, page_html)
+    return _parse_spot_article(url, page_html)
+
+
 def _trendforce_public_history() -> tuple[pd.DataFrame, list[str]]:
-    """공개 주간 기사로 초기 학습용 이력을 백필(유료 이력 우회 안 함)."""
+    """공개 주간 기사로 초기 학습용 이력을 백필(유료 이력 우회 안 함).
+
+    파싱한 기사는 색인에 남는다. 백필이 한 번 끝나면 목록은 이미 본 기사가
+    나올 때까지만 읽고 새 기사만 받으며, ARTICLE_PARSER_VERSION이 바뀐
+    항목은 네트워크 없이 저장된 원문으로 다시 파싱한다.
+    """
     try:
         page_count = int(os.getenv("MEMORY_SPOT_NEWS_PAGES", AUTO_SPOT_NEWS_PAGES))
     except ValueError:
         page_count = AUTO_SPOT_NEWS_PAGES
     page_count = min(20, max(1, page_count))
-    urls, errors = _trendforce_article_urls(page_count)
-    records: list[dict] = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as pool:
-        futures = {pool.submit(_spot_from_article, url): url for url in urls[:80]}
-        for future, url in futures.items():
-            try:
-                record = future.result()
-                if record:
-                    records.append(record)
-            except Exception as exc:  # noqa: BLE001
+    with _ARTICLE_INDEX_LOCK:
+        index = _load_article_index()
+        articles: dict[str, dict] = index["articles"]
+        backfilled = int(index.get("backfill_pages", 0)) >= page_count
+        urls, errors = _trendforce_article_urls(
+            page_count, seen=set(articles) if backfilled else None)
+
+        changed = False
+        for url, entry in articles.items():
+            if entry.get("parser") == ARTICLE_PARSER_VERSION:
+                continue
+            page_html = _read_article_raw(url)
+            if page_html is not None:
+                entry.update(_article_entry(_parse_spot_article(url, page_html)))
+                changed = True
+        # 원문이 없어 재파싱하지 못한 옛 항목은 새 기사와 함께 다시 받는다.
+        pending = list(dict.fromkeys(
+            [u for u in urls if u not in articles]
+            + [u for u, e in articles.items()
+               if e.get("parser") != ARTICLE_PARSER_VERSION]))
+        for url, record, exc in scrape_client().map(
+                _spot_from_article, pending[:ARTICLE_FETCH_LIMIT]):
+            if exc is not None:
                 errors.append(
                     f"기사 {url.rstrip('/').rsplit('/', 1)[-1][:32]}: "
                     f"{type(exc).__name__}"
                 )
+            else:
+                articles[url] = _article_entry(record)
+                changed = True
+        # 목록·기사를 빠짐없이 받은 뒤에만 백필 완료로 본다(남은 기사는 다음 호출).
+        if (not backfilled and not errors
+                and len(pending) <= ARTICLE_FETCH_LIMIT):
+            index["backfill_pages"] = page_count
+            changed = True
+        if changed:
+            _save_article_index(index)
+        records = [e["record"] for e in articles.values() if e.get("record")]
     return _normalise_spot_data(pd.DataFrame(records)), errors
 
 
-def _read_auto_spot_cache(path: str = AUTO_SPOT_CACHE) -> pd.DataFrame:
+# ──────────────────────────────────────────────────────────────
+# 현물가 저장소 (SQLite, 행 단위 upsert·출처 기록)
+# ──────────────────────────────────────────────────────────────
+# 공개 시세는 개인정보가 아니므로 세션·프로세스 간 공유해 요청을 최소화한다.
+# 여러 Streamlit 워커 프로세스가 동시에 써도 SQLite 잠금(WAL + BEGIN
+# IMMEDIATE)이 직렬화하므로, 전체 파일을 다시 쓰던 CSV처럼 서로 덮어쓰지 않는다.
+_SPOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spot_prices (
+    date TEXT NOT NULL,
+    series TEXT NOT NULL,
+    source TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    value REAL NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (date, series, source)
+);
+CREATE INDEX IF NOT EXISTS spot_prices_pick ON spot_prices (date, series, rank);
+CREATE TABLE IF NOT EXISTS spot_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+# 날짜·품목마다 순위가 가장 높은 출처 한 행(merge_spot_data의 '뒤가 덮어씀'과 같음).
+# :hidden 출처는 고르지 않는다(원격 CSV URL을 지운 뒤 남은 remote 행).
+_SPOT_RESOLVED_SQL = """
+SELECT date, series, value, source, fetched_at FROM (
+    SELECT date, series, value, source, fetched_at,
+           ROW_NUMBER() OVER (PARTITION BY date, series
+                              ORDER BY rank DESC, fetched_at DESC) AS pick
+    FROM spot_prices WHERE source <> :hidden
+) WHERE pick = 1
+"""
+
+
+@contextmanager
+def _spot_store(path: str | None = None):
+    """스키마를 보장한 연결. 블록이 정상 종료하면 커밋한다."""
+    conn = sqlite3.connect(path or SPOT_STORE, timeout=SPOT_STORE_TIMEOUT, isolation_level=None)
     try:
-        if os.path.exists(path):
-            return _normalise_spot_data(pd.read_csv(path))
-    except Exception:
-        pass
-    return _normalise_spot_data(None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA busy_timeout={int(SPOT_STORE_TIMEOUT * 1000)}")
+        conn.executescript(_SPOT_SCHEMA)
+        _import_legacy_spot_csv(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _spot_meta(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM spot_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _spot_rows(df: pd.DataFrame | None, source: str, fetched_at: float) -> list[tuple]:
+    clean = _normalise_spot_data(df)
+    if clean.empty:
+        return []
+    long = clean.melt(id_vars="날짜", var_name="series", value_name="value").dropna()
+    rank = SPOT_SOURCE_RANK[source]
+    return [(d.strftime("%Y-%m-%d"), str(col), source, rank, float(v), fetched_at)
+            for d, col, v in long.itertuples(index=False)]
+
+
+def _upsert_spot_rows(conn: sqlite3.Connection, rows: list[tuple]) -> None:
+    conn.executemany(
+        "INSERT INTO spot_prices (date, series, source, rank, value, fetched_at) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (date, series, source) DO UPDATE SET "
+        "rank = excluded.rank, value = excluded.value, fetched_at = excluded.fetched_at",
+        rows,
+    )
 
 
-def _save_auto_spot_cache(df: pd.DataFrame, path: str = AUTO_SPOT_CACHE) -> bool:
-    """공개 시세 캐시는 개인정보가 아니므로 세션 간 공유해 요청을 최소화."""
-    if df.empty:
+def _import_legacy_spot_csv(conn: sqlite3.Connection) -> None:
+    """예전 auto_spot_prices.csv가 있으면 최하위 출처로 한 번만 옮긴다."""
+    if _spot_meta(conn, "legacy_imported") is not None:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    if _spot_meta(conn, "legacy_imported") is None:
+        legacy = None
+        try:
+            if AUTO_SPOT_CACHE and os.path.exists(AUTO_SPOT_CACHE):
+                legacy = pd.read_csv(AUTO_SPOT_CACHE)
+        except Exception:
+            pass
+        _upsert_spot_rows(conn, _spot_rows(legacy, "legacy", time.time()))
+        if legacy is not None:
+            # 옛 캐시의 나이를 이어받아 이전 직후 불필요한 재수집을 막는다.
+            conn.execute("INSERT OR IGNORE INTO spot_meta VALUES ('refreshed_at', ?)",
+                         (str(os.path.getmtime(AUTO_SPOT_CACHE)),))
+        conn.execute("INSERT OR REPLACE INTO spot_meta VALUES ('legacy_imported', ?)",
+                     (str(time.time()),))
+    conn.commit()
+
+
+def save_spot_sources(frames: dict[str, pd.DataFrame | None],
+                      meta: dict[str, str] | None = None,
+                      replace: tuple[str, ...] = ()) -> bool:
+    """출처별 프레임과 메타(갱신 시각·상태)를 한 트랜잭션으로 upsert한다.
+
+    replace에 든 출처는 기존 행을 모두 지우고 이번 프레임으로 바꾼다. 원격
+    CSV처럼 매번 전체를 다시 받는 출처에서 사라지거나 고쳐진 날짜가 남지 않게 한다.
+    """
+    now = time.time()
+    rows = [row for source, frame in frames.items()
+            for row in _spot_rows(frame, source, now)]
+    if not rows and not meta and not replace:
         return False
-    tmp = f"{path}.tmp-{os.getpid()}"
     try:
-        with _AUTO_SPOT_LOCK:
-            _normalise_spot_data(df).to_csv(tmp, index=False)
-            os.replace(tmp, path)
+        with _spot_store() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM spot_prices WHERE source = ?",
+                             [(source,) for source in replace])
+            _upsert_spot_rows(conn, rows)
+            conn.executemany("INSERT OR REPLACE INTO spot_meta VALUES (?, ?)",
+                             list((meta or {}).items()))
         return True
-    except Exception:
-        try:
-            if os.path.exists(tmp):
-                os.remove(tmp)
-        except OSError:
-            pass
+    except (sqlite3.Error, OSError):
         return False
 
 
+def read_spot_store(with_sources: bool = False):
+    """출처 순위로 고른 현물가(wide)와 저장소 메타(spot_meta 전체, 문자열 값).
+
+    with_sources=True면 값마다 채택된 출처·수집 시각을 담은 long 프레임도 돌려준다.
+    """
+    # URL을 지우면 남은 원격 행은 다음 갱신에서 지워지기 전까지도 쓰지 않는다.
+    hidden = "" if os.getenv("MEMORY_SPOT_CSV_URL", "").strip() else "remote"
+    try:
+        with _spot_store() as conn:
+            picked = pd.read_sql_query(_SPOT_RESOLVED_SQL, conn,
+                                       params={"hidden": hidden})
+            meta = dict(conn.execute("SELECT key, value FROM spot_meta").fetchall())
+    except (sqlite3.Error, OSError):
+        picked = pd.DataFrame(columns=["date", "series", "value", "source", "fetched_at"])
+        meta = {}
+    if picked.empty:
+        wide = _normalise_spot_data(None)
+    else:
+        wide = (picked.pivot(index="date", columns="series", values="value")
+                      .rename_axis(index="날짜", columns=None))
+        ordered = ([c for c in SPOT_DEFAULT_COLS if c in wide.columns]
+                   + sorted(c for c in wide.columns if c not in SPOT_DEFAULT_COLS))
+        wide = _normalise_spot_data(wide[ordered].reset_index())
+    if with_sources:
+        return wide, meta, picked
+    return wide, meta
+
+
 def _remote_spot_csv() -> tuple[pd.DataFrame, str | None]:
     """선택: 라이선스 내역/Google Sheets 등 게시 CSV URL을 자동 병합."""
     url = os.getenv("MEMORY_SPOT_CSV_URL", "").strip()
     if not url:
         return _normalise_spot_data(None), None
     try:
-        csv_text = _retry(lambda: _http_text(url), tries=1)
+        csv_text = _http_text(url)
         return _normalise_spot_data(pd.read_csv(io.StringIO(csv_text))), None
     except Exception as exc:  # noqa: BLE001
         return _normalise_spot_data(None), f"원격 CSV: {type(exc).__name__}"
@@ -789,94 +1633,281 @@ def _history_is_sufficient(df: pd.DataFrame) -> bool:
     )
 
 
-def fetch_auto_spot_prices(force: bool = False) -> tuple[pd.DataFrame, dict]:
+def _spot_due(meta: dict, now: float) -> tuple[bool, bool]:
+    """(TrendForce 재수집 필요, 원격 CSV 재수집 필요) — 저장소 메타의 시각 기준."""
+    def age(key: str) -> float:
+        try:
+            return now - float(meta[key])
+        except (KeyError, TypeError, ValueError):
+            return np.inf
+    remote_url_set = bool(os.getenv("MEMORY_SPOT_CSV_URL", "").strip())
+    return (age("refreshed_at") > AUTO_SPOT_TTL_HOURS * 3600,
+            remote_url_set and age("remote_fetched_at") > REMOTE_SPOT_TTL_HOURS * 3600)
+
+
+def _spot_refresh_lock() -> str:
+    return f"{SPOT_STORE}.refresh.lock"
+
+
+def _spot_refresh_owner() -> str:
+    return f"{SPOT_STORE}.refresh.owner"
+
+
+@contextmanager
+def _spot_refresh_guard(wait: float = 0.0):
+    """갱신 잠금을 잡고, 잡은 동안 소유자 파일(pid·시각)을 남긴다.
+
+    소유자 파일은 잠금을 잡은 뒤 쓰고 놓기 전에 지우므로, 있으면 누군가
+    갱신 중이다. _spot_refresh_busy는 잠금 대신 이 파일만 읽는다.
     """
-    최신값 → 공개 기사 백필 → 캐시 폴백을 하나의 DataFrame으로 만든다.
+    with _file_lock(_spot_refresh_lock(), wait=wait) as acquired:
+        if not acquired:
+            yield False
+            return
+        owner = _spot_refresh_owner()
+        tmp = f"{owner}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"pid": os.getpid(), "at": time.time()}, fh)
+            os.replace(tmp, owner)
+        except OSError:
+            pass
+        try:
+            yield True
+        finally:
+            try:
+                os.remove(owner)
+            except OSError:
+                pass
+
+
+def _spot_refresh_busy() -> bool:
+    """다른 스레드·프로세스가 지금 현물가를 갱신 중인지.
 
-    MEMORY_SPOT_CSV_URL을 설정하면 사용자가 정상적으로 구매/공유받은
-    이력 CSV가 가장 높은 우선순위로 덮어쓴다.
+    잠금을 잠깐 잡아 보면 그 순간 wait=0으로 들어온 백그라운드 갱신이 한
+    주기를 건너뛰므로, 잠금은 건드리지 않고 소유자 파일만 읽는다. 비정상
+    종료로 남은 파일은 pid가 없거나(POSIX) 갱신 대기 상한을 넘긴 시각이면
+    무시한다.
     """
-    cache = _read_auto_spot_cache()
     try:
-        age_hours = (time.time() - os.path.getmtime(AUTO_SPOT_CACHE)) / 3600
-    except OSError:
-        age_hours = np.inf
-    remote_url_set = bool(os.getenv("MEMORY_SPOT_CSV_URL", "").strip())
-    if (not force and not remote_url_set and not cache.empty
-            and age_hours <= AUTO_SPOT_TTL_HOURS):
-        latest = pd.to_datetime(cache["날짜"]).max()
-        return cache, {
-            "state": "cached", "rows": len(cache), "latest_date": latest,
-            "history_ready": _history_is_sufficient(cache), "errors": [],
-            "message": f"{AUTO_SPOT_TTL_HOURS}시간 이내 자동 캐시",
-        }
+        with open(_spot_refresh_owner(), encoding="utf-8") as fh:
+            owner = json.load(fh)
+        pid, at = int(owner["pid"]), float(owner["at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name != "nt":
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass            # 권한 없음: 살아 있는 다른 사용자의 프로세스
+        return True
+    # Windows의 os.kill(pid, 0)은 신호를 보내므로 시각으로만 판단한다.
+    return time.time() - at < AUTO_SPOT_TTL_HOURS * 3600
+
+
+def refresh_auto_spot_prices(force: bool = False,
+                             wait: float | None = None) -> bool:
+    """TTL이 지난 출처만 네트워크로 받아 저장소에 upsert한다.
+
+    최신값 → 공개 기사 백필(이력 부족 시) 순서로 TrendForce를 읽고,
+    MEMORY_SPOT_CSV_URL은 REMOTE_SPOT_TTL_HOURS마다 따로 받는다. 다른
+    프로세스가 이미 갱신 중이면 최대 wait초(기본: force면
+    SPOT_REFRESH_WAIT_SEC, 아니면 0) 그 갱신이 끝나기를 기다린 뒤, 방금 받은
+    값이 있으므로 TTL 기준으로만 다시 판단한다. 끝내 못 잡으면 False.
+    """
+    if wait is None:
+        wait = SPOT_REFRESH_WAIT_SEC if force else 0.0
+    with _spot_refresh_guard() as acquired:
+        if acquired:
+            return _refresh_spot_store(force)
+    if wait <= 0:
+        return False
+    with _spot_refresh_guard(wait=wait) as acquired:
+        return acquired and _refresh_spot_store(False)
+
+
+def _refresh_spot_store(force: bool) -> bool:
+    """refresh_auto_spot_prices 본체 — 갱신 잠금을 잡은 상태에서만 부른다."""
+    cache, meta = read_spot_store()
+    now = time.time()
+    trend_due, remote_due = _spot_due(meta, now)
+    if force:
+        trend_due = True
+        remote_due = bool(os.getenv("MEMORY_SPOT_CSV_URL", "").strip())
+    if not trend_due and not remote_due:
+        return False
 
     errors: list[str] = []
-    remote, remote_error = _remote_spot_csv()
-    if remote_error:
-        errors.append(remote_error)
-    seed = merge_spot_data(cache, remote)
+    stamps: dict[str, str] = {}
+    remote = _normalise_spot_data(None)
+    # 원격 CSV는 받을 때마다 그 출처 행 전체를 교체하고, URL이 없으면 비운다.
+    # 받기에 실패하면 직전 행을 그대로 둔다.
+    replace: tuple[str, ...] = ()
+    if not os.getenv("MEMORY_SPOT_CSV_URL", "").strip():
+        replace = ("remote",)
+    elif remote_due:
+        remote, remote_error = _remote_spot_csv()
+        if remote_error:
+            errors.append(remote_error)
+        else:
+            stamps["remote_fetched_at"] = str(now)
+            replace = ("remote",)
+
+    history = current = _normalise_spot_data(None)
+    if trend_due:
+        if not _history_is_sufficient(merge_spot_data(cache, remote)):
+            history, history_errors = _trendforce_public_history()
+            errors.extend(history_errors)
+        updates: dict[str, str] = {}
+        try:
+            current, updates, current_errors = _current_trendforce_spot()
+            errors.extend(current_errors)
+        except Exception as exc:  # noqa: BLE001
+            errors.append(f"최신 현물가: {type(exc).__name__}")
+        if not current.empty or not history.empty:
+            stamps["refreshed_at"] = str(now)
+        if not current.empty:
+            state, message = "live", "TrendForce 공개 현물가 갱신 완료"
+        elif not cache.empty:
+            state, message = "stale", "수집 장애로 마지막 정상 캐시 사용"
+        elif not history.empty or not remote.empty:
+            state, message = "partial", "공개 이력만 부분 수집"
+        else:
+            state, message = "failed", "자동 현물가를 받지 못함"
+        stamps["refresh_status"] = json.dumps({
+            "state": state, "message": message, "updates": updates,
+            "errors": errors[:8], "at": now}, ensure_ascii=False)
+    return save_spot_sources(
+        {"article": history, "live": current, "remote": remote}, stamps, replace)
 
-    history = _normalise_spot_data(None)
-    if not _history_is_sufficient(seed):
-        history, history_errors = _trendforce_public_history()
-        errors.extend(history_errors)
 
-    current = _normalise_spot_data(None)
-    updates: dict[str, str] = {}
+def read_auto_spot_snapshot(refreshing: bool = False) -> tuple[pd.DataFrame, dict]:
+    """저장소의 최신 현물가와 상태. 네트워크를 쓰지 않으므로 즉시 끝난다.
+
+    status["stale"]이 참이면 TTL이 지난 출처가 있다는 뜻이며, 값은 그래도
+    마지막 정상 스냅샷이다(stale-while-revalidate). 다른 스레드·프로세스가
+    갱신 중이면 refreshing으로 알린다(잠금은 잡아 보지 않는다).
+    """
+    refreshing = refreshing or _spot_refresh_busy()
+    cache, meta, picked = read_spot_store(with_sources=True)
+    trend_due, remote_due = _spot_due(meta, time.time())
     try:
-        current, updates, current_errors = _current_trendforce_spot()
-        errors.extend(current_errors)
-    except Exception as exc:  # noqa: BLE001
-        errors.append(f"최신 현물가: {type(exc).__name__}")
-
-    merged = merge_spot_data(cache, history, current, remote)
-    fetched_any = not current.empty or not history.empty or not remote.empty
-    saved = _save_auto_spot_cache(merged) if fetched_any else False
-
-    if not current.empty:
-        state = "live"
-        message = "TrendForce 공개 현물가 갱신 완료"
-    elif not cache.empty:
-        state = "stale"
-        message = "수집 장애로 마지막 정상 캐시 사용"
-    elif not merged.empty:
-        state = "partial"
-        message = "공개 이력만 부분 수집"
+        last = json.loads(meta.get("refresh_status") or "{}")
+    except ValueError:
+        last = {}
+    pending = "백그라운드 갱신 중" if refreshing else "백그라운드 갱신 대기"
+    if cache.empty:
+        state = "warming" if refreshing or not last else last.get("state", "failed")
+        message = (f"현물가 첫 수집 · {pending}" if state == "warming"
+                   else last.get("message", "자동 현물가를 받지 못함"))
+    elif trend_due:
+        state, message = "stale", f"마지막 정상 캐시 사용 · {pending}"
+    elif last.get("state", "live") == "live":
+        state = "cached"
+        message = f"{AUTO_SPOT_TTL_HOURS}시간 이내 자동 캐시"
+        if refreshing:
+            message += " · 다른 작업이 갱신 중"
     else:
-        state = "failed"
-        message = "자동 현물가를 받지 못함"
-    latest = pd.to_datetime(merged["날짜"]).max() if not merged.empty else None
-    return merged, {
-        "state": state, "rows": len(merged), "latest_date": latest,
-        "history_ready": _history_is_sufficient(merged),
-        "updates": updates, "saved": saved,
-        "errors": errors[:8], "message": message,
+        state, message = last["state"], last.get("message", "-")
+    latest = pd.to_datetime(cache["날짜"]).max() if not cache.empty else None
+    return cache, {
+        "state": state, "rows": len(cache), "latest_date": latest,
+        "history_ready": _history_is_sufficient(cache),
+        "updates": last.get("updates", {}), "stale": trend_due or remote_due,
+        "refreshing": refreshing,
+        "sources": picked["source"].value_counts().to_dict(),
+        "errors": list(last.get("errors", [])), "message": message,
     }
 
 
+def fetch_auto_spot_prices(force: bool = False,
+                           wait: float | None = None) -> tuple[pd.DataFrame, dict]:
+    """동기 갱신 후 스냅샷. 워커·CLI·즉시 새로고침용이며 화면 경로는
+    SpotRefresher.snapshot으로 기다리지 않는다. 진행 중인 다른 갱신을 wait초
+    기다려도 안 끝나면 status["refreshing"]이 참이다."""
+    refresh_auto_spot_prices(force=force, wait=wait)
+    return read_auto_spot_snapshot()
+
+
+class SpotRefresher:
+    """자동 현물가 저장소를 요청 경로 밖에서 따뜻하게 유지하는 데몬 스레드.
+
+    snapshot()은 저장소의 마지막 값을 바로 돌려주고, TTL이 지났으면 스레드를
+    깨운다. 스레드는 interval마다 refresh_auto_spot_prices로 TTL이 지난
+    출처만 받는다. 실패 직후 화면이 다시 그려질 때마다 수집하지 않도록
+    깨우기는 AUTO_SPOT_RETRY_SEC 간격으로 제한한다.
+    """
+
+    def __init__(self, interval: float = AUTO_SPOT_REFRESH_SEC):
+        self.interval = interval
+        self.refreshing = False
+        self.last_error: str | None = None
+        self._attempted = 0.0
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="spot-refresher",
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self.refreshing = True
+            self._attempted = time.time()
+            try:
+                refresh_auto_spot_prices()
+                self.last_error = None
+            except Exception as exc:  # noqa: BLE001 — 스레드가 죽으면 갱신이 멈춘다
+                self.last_error = f"{type(exc).__name__}: {exc}"
+            finally:
+                self.refreshing = False
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def kick(self) -> None:
+        if time.time() - self._attempted >= AUTO_SPOT_RETRY_SEC:
+            self._wake.set()
+
+    def snapshot(self) -> tuple[pd.DataFrame, dict]:
+        auto, status = read_auto_spot_snapshot(refreshing=self.refreshing)
+        if status["stale"] and not status["refreshing"]:
+            self.kick()
+        if self.last_error:
+            status["errors"] = status["errors"] + [f"백그라운드 갱신: {self.last_error}"]
+        return auto, status
+
+
+def start_spot_refresher() -> SpotRefresher:
+    """화면에서 st.cache_resource로 감싸 프로세스당 하나만 띄운다."""
+    return SpotRefresher()
+
+
 # ──────────────────────────────────────────────────────────────
 # 피처 생성
 # ──────────────────────────────────────────────────────────────
-def build_peer_features(prices: dict, master: pd.DatetimeIndex) -> pd.DataFrame:
+def build_peer_features(prices: dict, master: pd.DatetimeIndex,
+                        universe: dict[str, str] | None = None) -> pd.DataFrame:
     """같은 메모리 그룹 내 상대강도 — 그날 또래 5종목 평균 대비 초과수익률.
 
     기존 rel_sox20(광범위 반도체지수 대비 강도)보다 좁고 실전적인 비교다.
     '어느 메모리주가 더 강한가'를 직접 겨냥하는 신호이며, 대시보드의
     '상대 최강/최약' 카드와도 취지가 맞다. 교차시장 시차 누수를 막기 위해
     매크로 피처와 동일하게 1거래일 지연한다."""
-    syms = [s for s in TICKERS if s in prices]
+    syms = [s for s in (universe or TICKERS) if s in prices]
     if len(syms) < 2:
         return pd.DataFrame(index=master)
+    closes = pd.DataFrame({s: prices[s]["Close"].reindex(master).ffill(limit=3)
+                           for s in syms}, index=master)
     out = {}
     for h, tag in ((5, "5"), (20, "20"), (60, "60")):
-        wide = pd.DataFrame(
-            {s: pchg(prices[s]["Close"].reindex(master).ffill(limit=3), h)
-             for s in syms}, index=master)
+        wide = pchg(closes, h)
         group_mean = wide.mean(axis=1, skipna=True)  # 그날 살아있는 종목들의 평균
-        for s in syms:
-            out[f"__peer{tag}__{s}"] = wide[s] - group_mean
-    return pd.DataFrame(out, index=master).shift(MACRO_RELEASE_LAG)
+        rel = wide.sub(group_mean, axis=0)
+        rel.columns = [f"__peer{tag}__{s}" for s in syms]
+        out[tag] = rel
+    return pd.concat(out.values(), axis=1).shift(MACRO_RELEASE_LAG)
 
 
 def build_macro_features(prices: dict, master: pd.DatetimeIndex) -> pd.DataFrame:
@@ -1026,18 +2057,15 @@ def load_spot_features(master: pd.DatetimeIndex,
     return out if len(out.columns) else None
 
 
-def build_ticker_features(df: pd.DataFrame) -> pd.DataFrame:
-    """가격·추세·모멘텀·변동성·거래량을 다섯 축으로 기술적 피처화.
+def _technical_features(c, o, h, l, v, dow, month,
+                        has_hl=True, has_v=True) -> dict:
+    """build_ticker_features의 계산 본체.
 
-    절대 가격 대신 비율/오실레이터를 사용해 원화·달러·엔 종목을 한 모델로
-    풀링해도 스케일이 섞이지 않게 한다. 모든 지표는 해당 일 종가까지만 사용한다.
+    입력은 한 종목의 Series이거나, 종목을 열로 둔 wide DataFrame이다. 모든
+    연산이 열 단위 rolling/ewm이므로 두 경우가 같은 값을 낸다. 종목별 분기
+    (고가·저가·거래량 유무)는 has_hl·has_v를 bool 또는 종목별 bool Series로 준다.
     """
-    c = df["Close"].astype(float)
-    o = df["Open"].astype(float) if "Open" in df.columns else c
-    h = df["High"].astype(float) if "High" in df.columns else c
-    l = df["Low"].astype(float) if "Low" in df.columns else c
-    v = df["Volume"].astype(float) if "Volume" in df.columns else None
-    f = pd.DataFrame(index=df.index)
+    f: dict[str, object] = {}
     r = c.pct_change(fill_method=None)
     log_r = np.log(c.where(c > 0)).diff()
 
@@ -1080,15 +2108,15 @@ def build_ticker_features(df: pd.DataFrame) -> pd.DataFrame:
     f["stoch_d"] = f["stoch_k"].rolling(3).mean()
     f["williams_r"] = -safe_div(hi14 - c, hi14 - lo14)
 
-    adx, plus_di, minus_di = adx_components(df, 14)
+    hl_mask = _column_mask(has_hl, c)
+    adx, plus_di, minus_di = (x.where(hl_mask) for x in _adx_kernel(h, l, c, 14))
     f["adx14"] = adx / 100.0
     f["plus_di14"] = plus_di / 100.0
     f["minus_di14"] = minus_di / 100.0
     f["di_spread"] = (plus_di - minus_di) / 100.0
     typical = (h + l + c) / 3.0
     tp_ma = typical.rolling(20).mean()
-    mean_dev = typical.rolling(20).apply(
-        lambda x: np.mean(np.abs(x - np.mean(x))), raw=True)
+    mean_dev = rolling_mean_abs_dev(typical, 20)
     f["cci20"] = safe_div(typical - tp_ma, 0.015 * mean_dev) / 100.0
 
     # 변동성·캔들 구조·가격 범위 내 위치
@@ -1109,7 +2137,8 @@ def build_ticker_features(df: pd.DataFrame) -> pd.DataFrame:
     f["vol_ratio"] = safe_div(r.rolling(5).std(), r.rolling(20).std())
     f["down_vol20"] = r.clip(upper=0).rolling(20).std() * np.sqrt(252)
     f["drawdown60"] = c / c.rolling(60).max() - 1.0
-    f["atr_pct14"] = atr_series(df, 14) / c
+    atr_hl = has_hl & (h.notna().sum() > 14)
+    f["atr_pct14"] = _atr_kernel(h, l, c, 14, use_hl=atr_hl) / c
     f["positive_days20"] = (r > 0).rolling(20).mean()
     f["skew20"] = r.rolling(20).skew()
     f["kurt60"] = r.rolling(60).kurt()
@@ -1119,81 +2148,226 @@ def build_ticker_features(df: pd.DataFrame) -> pd.DataFrame:
         low_n, high_n = l.rolling(n).min(), h.rolling(n).max()
         f[f"range_pos{n}"] = safe_div(c - low_n, high_n - low_n)
 
-    # 거래량·자금흐름
-    if v is not None and v.notna().sum() > 60:
-        f["volu_ratio"] = safe_div(v.rolling(5).mean(), v.rolling(60).mean())
-        f["volu_z20"] = rolling_zscore(np.log1p(v.clip(lower=0)), 20, 10)
-        dollar_volume = (c * v).where(lambda x: x > 0)
-        f["dollar_vol_chg20"] = np.log(dollar_volume).diff(20)
-        amihud = safe_div(r.abs(), dollar_volume)
-        amihud_log = np.log(amihud.where(amihud > 0))
-        f["amihud20"] = rolling_zscore(amihud_log.rolling(20).mean(), 252, 60)
-        f["mfi14"] = money_flow_index(df, 14) / 100.0
-        obv = (np.sign(c.diff()).fillna(0.0) * v.fillna(0.0)).cumsum()
-        f["obv_mom20"] = safe_div(obv.diff(20), obv.abs().rolling(60).mean())
-    else:
-        f["volu_ratio"] = np.nan
-        f["volu_z20"] = np.nan
-        f["dollar_vol_chg20"] = np.nan
-        f["amihud20"] = np.nan
-        f["mfi14"] = np.nan
-        f["obv_mom20"] = np.nan
+    # 거래량·자금흐름 (거래량 이력이 60개 이하인 종목은 결측으로 둔다)
+    vol_mask = _column_mask(has_v & (v.notna().sum() > 60), c)
+    vol: dict[str, object] = {}
+    vol["volu_ratio"] = safe_div(v.rolling(5).mean(), v.rolling(60).mean())
+    vol["volu_z20"] = rolling_zscore(np.log1p(v.clip(lower=0)), 20, 10)
+    dollar_volume = (c * v).where(lambda x: x > 0)
+    vol["dollar_vol_chg20"] = np.log(dollar_volume).diff(20)
+    amihud = safe_div(r.abs(), dollar_volume)
+    amihud_log = np.log(amihud.where(amihud > 0))
+    vol["amihud20"] = rolling_zscore(amihud_log.rolling(20).mean(), 252, 60)
+    vol["mfi14"] = _mfi_kernel(h, l, c, v, 14).where(hl_mask) / 100.0
+    obv = (np.sign(c.diff()).fillna(0.0) * v.fillna(0.0)).cumsum()
+    vol["obv_mom20"] = safe_div(obv.diff(20), obv.abs().rolling(60).mean())
+    for name, value in vol.items():
+        f[name] = value.where(vol_mask)
 
     # 일정 효과는 미래를 보지 않는 알려진 달력 변수다. sin/cos로 연말 경계를 연속화한다.
-    dow = pd.Series(f.index.dayofweek, index=f.index, dtype=float)
-    month = pd.Series(f.index.month, index=f.index, dtype=float)
     f["dow_sin"] = np.sin(2 * np.pi * dow / 5.0)
     f["dow_cos"] = np.cos(2 * np.pi * dow / 5.0)
     f["month_sin"] = np.sin(2 * np.pi * (month - 1.0) / 12.0)
     f["month_cos"] = np.cos(2 * np.pi * (month - 1.0) / 12.0)
-    return f.replace([np.inf, -np.inf], np.nan)
+    return f
+
+
+def build_ticker_features(df: pd.DataFrame) -> pd.DataFrame:
+    """가격·추세·모멘텀·변동성·거래량을 다섯 축으로 기술적 피처화.
+
+    절대 가격 대신 비율/오실레이터를 사용해 원화·달러·엔 종목을 한 모델로
+    풀링해도 스케일이 섞이지 않게 한다. 모든 지표는 해당 일 종가까지만 사용한다.
+    """
+    c = df["Close"].astype(float)
+    o = df["Open"].astype(float) if "Open" in df.columns else c
+    h = df["High"].astype(float) if "High" in df.columns else c
+    l = df["Low"].astype(float) if "Low" in df.columns else c
+    v = (df["Volume"].astype(float) if "Volume" in df.columns
+         else pd.Series(np.nan, index=df.index))
+    dow = pd.Series(df.index.dayofweek, index=df.index, dtype=float)
+    month = pd.Series(df.index.month, index=df.index, dtype=float)
+    f = _technical_features(
+        c, o, h, l, v, dow, month,
+        has_hl={"High", "Low"} <= set(df.columns),
+        has_v="Volume" in df.columns)
+    return pd.DataFrame(f, index=df.index).replace([np.inf, -np.inf], np.nan)
+
+
+def _panel_frame(frames: dict[str, pd.DataFrame], col: str,
+                 fallback: str = "Close") -> pd.DataFrame:
+    """종목별 시계열을 각자의 거래일 순번(행 위치)으로 맞춘 wide 프레임."""
+    return pd.DataFrame({
+        sym: pd.Series(pd.to_numeric(
+            df[col] if col in df.columns else df[fallback],
+            errors="coerce").to_numpy(dtype=float))
+        for sym, df in frames.items()})
+
+
+def build_panel_features(prices: dict, symbols=None,
+                         chunk_size: int = PANEL_CHUNK_SIZE
+                         ) -> dict[str, pd.DataFrame]:
+    """N종목 기술적 피처를 (거래일 순번 × 종목) wide 배열로 한꺼번에 계산.
+
+    날짜축(합집합)으로 맞추면 휴장일 결측이 rolling 창을 깨뜨리므로, 각 열은
+    그 종목 자신의 거래일 순서대로 왼쪽 정렬하고 끝을 결측으로 채운다.
+    종목 블록(chunk_size) 단위로 계산해 유니버스가 커져도 메모리를 제한한다.
+    결과는 종목마다 build_ticker_features(prices[sym])와 같다.
+    """
+    syms = [s for s in (symbols if symbols is not None else list(prices))
+            if s in prices and not prices[s].empty]
+    out: dict[str, pd.DataFrame] = {}
+    step = max(1, int(chunk_size))
+    for start in range(0, len(syms), step):
+        frames = {s: prices[s] for s in syms[start:start + step]}
+        c = _panel_frame(frames, "Close")
+        calendar = {s: df.index for s, df in frames.items()}
+        dow = pd.DataFrame({s: pd.Series(idx.dayofweek, dtype=float)
+                            for s, idx in calendar.items()})
+        month = pd.DataFrame({s: pd.Series(idx.month, dtype=float)
+                              for s, idx in calendar.items()})
+        has_hl = pd.Series({s: {"High", "Low"} <= set(df.columns)
+                            for s, df in frames.items()})
+        has_v = pd.Series({s: "Volume" in df.columns
+                           for s, df in frames.items()})
+        f = _technical_features(
+            c, _panel_frame(frames, "Open"), _panel_frame(frames, "High"),
+            _panel_frame(frames, "Low"),
+            _panel_frame(frames, "Volume").where(_column_mask(has_v, c)),
+            dow, month, has_hl=has_hl, has_v=has_v)
+        names = list(f)
+        cube = np.stack([f[name].to_numpy(dtype=float) for name in names],
+                        axis=1)
+        cube[~np.isfinite(cube)] = np.nan
+        for j, sym in enumerate(c.columns):
+            idx = frames[sym].index
+            out[sym] = pd.DataFrame(cube[:len(idx), :, j], index=idx,
+                                    columns=names)
+    return out
+
+
+ASIA_SAME_DAY_MACRO = ("kospi_", "nikkei_", "krw_", "jpy_")
+# 지역별로 '그 시장 마감 때 이미 확정된' 매크로 접두어. None이면 지연 없음.
+REGION_SAME_DAY_MACRO: dict[str, tuple[str, ...] | None] = {
+    "us": None, "kr": ASIA_SAME_DAY_MACRO, "jp": ASIA_SAME_DAY_MACRO,
+}
+
+
+def ticker_region(sym: str) -> str:
+    if sym.endswith((".KS", ".KQ")):
+        return "kr"
+    if sym.endswith(".T"):
+        return "jp"
+    return "us"
+
+
+def build_region_macro_views(macro: pd.DataFrame,
+                             regions) -> dict[str, pd.DataFrame]:
+    """지역별 매크로 지연 변형을 규칙당 한 번만 만든다.
+
+    아시아 장 마감 때 아직 확정되지 않은 미국 종가 파생변수만 지연한다.
+    같은 날 이미 닫힌 KOSPI/Nikkei 및 현지 FX까지 불필요하게 버리지 않는다.
+    같은 규칙(KR·JP)은 같은 프레임을 공유하고, 종목에서는 index로 join만 한다.
+    """
+    by_rule: dict[tuple[str, ...] | None, pd.DataFrame] = {}
+    views: dict[str, pd.DataFrame] = {}
+    for region in sorted(regions):
+        rule = REGION_SAME_DAY_MACRO.get(region)
+        if rule not in by_rule:
+            if rule is None:
+                by_rule[rule] = macro
+            else:
+                view = macro.copy()
+                lag_cols = [c for c in view if not c.startswith(rule)]
+                view[lag_cols] = view[lag_cols].shift(MACRO_RELEASE_LAG)
+                by_rule[rule] = view
+        views[region] = by_rule[rule]
+    return views
+
+
+def rolling_sox_stats(stock_ret: dict[str, pd.Series],
+                      sox_ret: dict[str, pd.Series],
+                      n: int = 60) -> dict[str, pd.DataFrame]:
+    """전 종목의 SOX rolling cov·var·corr을 한 번의 wide 연산으로 계산.
+
+    종목마다 거래일이 달라 날짜축으로 맞추면 휴장일 결측이 창을 깨뜨린다.
+    대신 각 종목 자신의 거래일 순번(행 위치)으로 열을 정렬해, 종목별
+    rolling과 같은 창을 유지하면서 종목 수만큼의 반복을 없앤다.
+    """
+    stock = pd.DataFrame({s: pd.Series(r.to_numpy(dtype=float))
+                          for s, r in stock_ret.items()})
+    sox = pd.DataFrame({s: pd.Series(r.to_numpy(dtype=float))
+                        for s, r in sox_ret.items()})
+    roll = stock.rolling(n)
+    return {"cov": roll.cov(sox, pairwise=False),
+            "corr": roll.corr(sox, pairwise=False),
+            "var": sox.rolling(n).var()}
+
+
+def price_calendar(prices: dict) -> pd.DatetimeIndex:
+    """모든 심볼 거래일의 합집합(매크로·현물가 피처의 기준 달력)."""
+    return pd.DatetimeIndex(
+        sorted(set().union(*[set(prices[s].index) for s in prices]))
+    )
 
 
 def assemble_dataset(prices: dict, horizon: int,
-                     spot_data: pd.DataFrame | None = None):
-    """(날짜 × 종목) long 형태 데이터셋과 피처 컬럼 목록을 만든다."""
-    tick_syms = [s for s in TICKERS if s in prices]
+                     spot_data: pd.DataFrame | None = None,
+                     universe: dict[str, str] | None = None):
+    """(날짜 × 종목) long 형태 데이터셋과 피처 컬럼 목록을 만든다.
+
+    universe를 주지 않으면 설정 파일(MEMORY_UNIVERSE_CONFIG)의 TICKERS를 쓴다.
+    현물가와 무관한 본체(assemble_base_dataset)와 현물가 피처
+    (load_spot_features → attach_spot_features)를 나눠 계산하므로, 화면에서는
+    두 계층을 따로 캐시해 현물가 수정이 가격·기술적 피처를 다시 만들지 않는다.
+    """
+    base = assemble_base_dataset(prices, horizon, universe)
+    spot = load_spot_features(price_calendar(prices), spot_data=spot_data)
+    return attach_spot_features(base, spot)
+
+
+def assemble_base_dataset(prices: dict, horizon: int,
+                          universe: dict[str, str] | None = None) -> pd.DataFrame:
+    """현물가 피처를 뺀 long 데이터셋. 피처 선택 전이라 열 필터링은 하지 않는다."""
+    universe = universe or TICKERS
+    tick_syms = [s for s in universe if s in prices]
     if not tick_syms:
         raise RuntimeError("종목 가격 데이터를 하나도 받지 못했습니다.")
 
-    master = pd.DatetimeIndex(
-        sorted(set().union(*[set(prices[s].index) for s in prices]))
-    )
+    master = price_calendar(prices)
     macro = build_macro_features(prices, master)
-    spot = load_spot_features(master, spot_data=spot_data)
-    peer = build_peer_features(prices, master)
+    peer = build_peer_features(prices, master, universe)
+
+    macro_views = build_region_macro_views(
+        macro, {ticker_region(s) for s in tick_syms})
+    technical = build_panel_features(prices, tick_syms)
+    base: dict[str, pd.DataFrame] = {}
+    for sym in tick_syms:
+        df = prices[sym]
+        X = technical.pop(sym)
+        X = pd.concat([X, macro_views[ticker_region(sym)].reindex(df.index)],
+                      axis=1)
+        base[sym] = X
+    sox_stats = (rolling_sox_stats(
+        {s: X["ret1"] for s, X in base.items()},
+        {s: X["sox_ret1"] for s, X in base.items()}, 60)
+        if all("sox_ret1" in X.columns for X in base.values()) else None)
 
     frames = []
     for sym in tick_syms:
         df = prices[sym]
-        X = build_ticker_features(df)
-        macro_view = macro.copy()
-        if sym.endswith((".KS", ".KQ", ".T")):
-            # 아시아 장 마감 때 아직 확정되지 않은 미국 종가 파생변수만 지연한다.
-            # 같은 날 이미 닫힌 KOSPI/Nikkei 및 현지 FX까지 불필요하게 버리지 않는다.
-            same_day_known = ("kospi_", "nikkei_", "krw_", "jpy_")
-            lag_cols = [c for c in macro_view if not c.startswith(same_day_known)]
-            macro_view.loc[:, lag_cols] = macro_view[lag_cols].shift(
-                MACRO_RELEASE_LAG)
-        X = pd.concat([X, macro_view.reindex(df.index)], axis=1)
-        if spot is not None:
-            X = pd.concat([X, spot.reindex(df.index)], axis=1)
+        X = base.pop(sym)
         if "sox_ret20" in X.columns:
             X["rel_sox20"] = X["ret20"] - X["sox_ret20"]
-        if "sox_ret1" in X.columns:
-            stock_r = X["ret1"]
-            sox_r = X["sox_ret1"]
-            cov = stock_r.rolling(60).cov(sox_r)
-            var = sox_r.rolling(60).var()
-            X["corr_sox60"] = stock_r.rolling(60).corr(sox_r)
-            X["beta_sox60"] = safe_div(cov, var).clip(-3, 5)
+        if sox_stats is not None:
+            mine = {k: pd.Series(v[sym].to_numpy()[:len(X)], index=X.index)
+                    for k, v in sox_stats.items()}
+            X["corr_sox60"] = mine["corr"]
+            X["beta_sox60"] = safe_div(mine["cov"], mine["var"]).clip(-3, 5)
             if "sox_ret20" in X:
                 X["idiosyncratic_ret20"] = (
                     X["ret20"] - X["beta_sox60"] * X["sox_ret20"])
         if "regime_risk_off" in X:
             X["momentum_x_risk_off"] = X["ret20"] * X["regime_risk_off"]
-        if "spot_dram_breadth20" in X:
-            X["spot_cycle_x_momentum"] = X["spot_dram_breadth20"] * X["ret20"]
         for h, tag in ((5, "5"), (20, "20"), (60, "60")):
             col = f"__peer{tag}__{sym}"
             if col in peer.columns:
@@ -1221,11 +2395,11 @@ def assemble_dataset(prices: dict, horizon: int,
         frames.append(X.reset_index())
 
     data = pd.concat(frames, ignore_index=True).sort_values("date")
-    for sym in TICKERS:  # 종목 원핫 (풀링 학습용)
+    for sym in universe:  # 종목 원핫 (풀링 학습용)
         data[f"tk_{sym}"] = (data["ticker"] == sym).astype(int)
     data["region_kr"] = data["ticker"].str.endswith((".KS", ".KQ")).astype(int)
     data["region_jp"] = data["ticker"].str.endswith(".T").astype(int)
-    data["is_daily_leveraged"] = (data["ticker"] == "RAM").astype(int)
+    data["is_daily_leveraged"] = data["ticker"].isin(DAILY_LEVERAGED).astype(int)
 
     # Gu·Kelly·Xiu(2020)가 강조한 횡단면 모멘텀·유동성·변동성 정보를
     # 메모리주 내부 상대순위로 추가한다. 국제 장 마감 시차 때문에 순위는
@@ -1238,7 +2412,36 @@ def assemble_dataset(prices: dict, horizon: int,
         raw_rank = data.groupby("date")[col].rank(pct=True) - 0.5
         data[f"xrank_{col}"] = raw_rank.groupby(data["ticker"]).shift(1)
 
-    data = data[data["ret20"].notna()].reset_index(drop=True)
+    return data[data["ret20"].notna()].reset_index(drop=True)
+
+
+# 현물가 열은 종목별 매크로 열 뒤, 상호작용 열은 모멘텀×위험회피 뒤에 온다.
+# 열 순서가 곧 모델 입력 순서이므로 한 번에 조립하던 때와 같은 위치에 끼운다.
+_SPOT_ANCHORS = ("rel_sox20", "corr_sox60", "beta_sox60", "idiosyncratic_ret20",
+                 "momentum_x_risk_off", "spot_cycle_x_momentum",
+                 "peer_rel5", "peer_rel20", "peer_rel60", "entry_px")
+
+
+def attach_spot_features(base: pd.DataFrame, spot: pd.DataFrame | None):
+    """assemble_base_dataset 결과에 날짜 기준 현물가 피처를 붙이고 피처 목록을 고른다.
+
+    현물가 피처는 같은 날짜면 모든 종목이 같은 값이라 date로 정렬만 하면 된다.
+    """
+    data = base
+    if spot is not None:
+        cols = {c: spot[c].reindex(base["date"]).to_numpy() for c in spot.columns}
+        if "spot_dram_breadth20" in cols:
+            cols["spot_cycle_x_momentum"] = (cols["spot_dram_breadth20"]
+                                             * base["ret20"].to_numpy())
+        order = list(base.columns)
+        # 두 묶음을 각자 기준 열 앞에 끼워 넣는다.
+        for group, anchors in ((list(spot.columns), _SPOT_ANCHORS),
+                               (["spot_cycle_x_momentum"], _SPOT_ANCHORS[6:])):
+            group = [c for c in group if c in cols]
+            at = next((order.index(a) for a in anchors if a in order), len(order))
+            order[at:at] = group
+        data = pd.concat([base, pd.DataFrame(cols, index=base.index)],
+                         axis=1)[order]
     candidate_cols = [c for c in data.columns if c not in META_COLS]
     # 다운로드 실패·상장이력 부족으로 사실상 비어 있는 지표는 제거한다.
     # 결측 자체는 HistGradientBoosting이 분기 정보로 안전하게 처리한다.
@@ -1249,6 +2452,227 @@ def assemble_dataset(prices: dict, horizon: int,
     return data, feat_cols
 
 
+DATASET_FLAG_COLS = ("region_kr", "region_jp", "is_daily_leveraged")
+DATASET_PRICE_COLS = ("entry_px", "exit_px", "fwd_ret", "y")
+
+
+@dataclass
+class CompactDataset:
+    """st.cache_data에 오래 머무는 assemble_dataset 결과의 압축 표현.
+
+    feat_cols는 순서 그대로 float32 한 블록(열 우선 배치)의 앞 열에 두고,
+    피처가 아닌 수치 열이 그 뒤를 잇는다. 종목은 범주 코드, 피처가 아닌 0/1
+    플래그는 int8로 보관하고, 가격·라벨처럼 백테스트 정밀도가 필요한 값만
+    float64로 남긴다. 절감 폭은 float64→float32 몫이라 대략 2배다.
+
+    frame()은 데이터셋마다 한 번만 만들어 재사용하고, feature_view로 그
+    앞 열을 자르면 values 블록이 복사 없이 모델 입력이 된다.
+    """
+
+    dates: np.ndarray
+    label_known_dates: np.ndarray
+    ticker_codes: np.ndarray
+    tickers: tuple[str, ...]
+    onehot_tickers: tuple[str, ...]
+    values: np.ndarray
+    value_cols: list[str]
+    flags: np.ndarray
+    flag_cols: list[str]
+    prices: np.ndarray
+    feat_cols: list[str]
+    dense_nbytes: int = 0
+    _frame: pd.DataFrame | None = field(default=None, init=False,
+                                        repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getstate__(self) -> dict:
+        # 파생 프레임은 다시 만들 수 있으므로 pickle·캐시 파일에 넣지 않는다.
+        state = dict(self.__dict__)
+        state["_frame"] = None
+        return state
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in (
+            self.dates, self.label_known_dates, self.ticker_codes,
+            self.values, self.flags, self.prices)))
+
+    def memory_report(self) -> dict:
+        dense = float(self.dense_nbytes)
+        compact = float(self.nbytes)
+        return {"dense_mb": dense / 2**20, "compact_mb": compact / 2**20,
+                "saved_mb": max(0.0, dense - compact) / 2**20,
+                "ratio": dense / compact if compact > 0 else np.nan}
+
+    def frame(self) -> pd.DataFrame:
+        """모델·UI용 DataFrame. 처음 한 번 만들어 두고 같은 객체를 돌려준다.
+
+        values·prices·flags 블록은 복사 없이 감싸고, 종목명과 피처가 아닌
+        원핫 열만 새로 만든다. 여러 곳이 공유하므로 고치려면 copy()한다.
+        """
+        cached = getattr(self, "_frame", None)
+        if cached is not None:
+            return cached
+        extra = {"date": pd.DatetimeIndex(self.dates),
+                 "label_known_date": pd.DatetimeIndex(self.label_known_dates),
+                 "ticker": np.asarray(self.tickers, dtype=object)[self.ticker_codes]}
+        for sym in self.onehot_tickers:
+            code = self.tickers.index(sym) if sym in self.tickers else -1
+            extra[f"tk_{sym}"] = (self.ticker_codes == code).astype(np.int8)
+        out = pd.concat([
+            pd.DataFrame(self.values, columns=self.value_cols, copy=False),
+            pd.DataFrame(self.prices, columns=list(DATASET_PRICE_COLS), copy=False),
+            pd.DataFrame(extra, copy=False),
+            pd.DataFrame(self.flags, columns=self.flag_cols, copy=False),
+        ], axis=1, copy=False)
+        if not self.values.flags.writeable:
+            _freeze(out)           # 공유 결과에 나중에 붙은 프레임도 막는다
+        self._frame = out
+        return out
+
+
+def feature_view(frame: pd.DataFrame, feat_cols: list[str]) -> pd.DataFrame:
+    """모델 입력 열. CompactDataset.frame()과 그 행 부분집합처럼 앞 열이
+    feat_cols인 float32 블록이면 그 블록을 복사 없이 감싸고, 아니면 열 선택을 쓴다.
+
+    여러 블록이 섞인 프레임에서 pandas의 iloc 열 슬라이스·열 선택은 매번
+    블록을 복사하므로, 학습·예측 루프에서는 블록 버퍼를 직접 넘긴다.
+    """
+    k = len(feat_cols)
+    if k and frame.columns[:k].tolist() == list(feat_cols):
+        block = frame._mgr.blocks[frame._mgr.blknos[0]]
+        locs = block.mgr_locs.indexer
+        if (isinstance(block.values, np.ndarray) and isinstance(locs, slice)
+                and locs.start in (0, None) and locs.step in (1, None)
+                and locs.stop >= k):
+            return pd.DataFrame(block.values[:k].T, index=frame.index,
+                                columns=list(feat_cols), copy=False)
+        return frame.iloc[:, :k]
+    return frame[feat_cols]
+
+
+def compact_dataset(data: pd.DataFrame, feat_cols: list[str]) -> CompactDataset:
+    """assemble_dataset의 long DataFrame을 CompactDataset으로 변환."""
+    feat_cols = list(feat_cols)
+    in_feats = set(feat_cols)
+    onehot = tuple(c[3:] for c in data.columns if c.startswith("tk_"))
+    tickers = tuple(dict.fromkeys([*onehot, *data["ticker"].unique()]))
+    codes = pd.Categorical(data["ticker"], categories=list(tickers)).codes
+    # 피처로 쓰이는 원핫·플래그 열은 values 블록에 두고, 나머지만 코드·int8로 줄인다.
+    onehot_rest = tuple(s for s in onehot if f"tk_{s}" not in in_feats)
+    flag_cols = [c for c in DATASET_FLAG_COLS if c in data and c not in in_feats]
+    skip = {"date", "ticker", "label_known_date", *DATASET_PRICE_COLS,
+            *flag_cols, *(f"tk_{s}" for s in onehot)}
+    value_cols = feat_cols + [c for c in data.columns
+                              if c not in skip and c not in in_feats]
+    values = np.empty((len(data), len(value_cols)), dtype=np.float32, order="F")
+    for j, col in enumerate(value_cols):
+        values[:, j] = pd.to_numeric(data[col], errors="coerce").to_numpy(
+            dtype=np.float32, na_value=np.nan)
+    flags = (data[flag_cols].to_numpy(dtype=np.int8) if flag_cols
+             else np.zeros((len(data), 0), dtype=np.int8))
+    prices = np.column_stack([
+        pd.to_numeric(data[c], errors="coerce").to_numpy(dtype=float)
+        if c in data else np.full(len(data), np.nan)
+        for c in DATASET_PRICE_COLS])
+    return CompactDataset(
+        dates=pd.to_datetime(data["date"]).to_numpy(dtype="datetime64[ns]"),
+        label_known_dates=pd.to_datetime(data["label_known_date"]).to_numpy(
+            dtype="datetime64[ns]"),
+        ticker_codes=codes.astype(np.int8 if len(tickers) < 128 else np.int16),
+        tickers=tickers, onehot_tickers=onehot_rest,
+        values=values, value_cols=value_cols,
+        flags=flags, flag_cols=flag_cols, prices=prices,
+        feat_cols=feat_cols,
+        dense_nbytes=int(data.memory_usage(deep=True).sum()),
+    )
+
+
+# ──────────────────────────────────────────────────────────────
+# 실행 계측 (단계별 시간·메모리)
+# ──────────────────────────────────────────────────────────────
+def _peak_rss_mb() -> float | None:
+    """프로세스 최대 RSS(MB). resource 모듈이 없는 Windows에서는 None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _current_rss_mb() -> float | None:
+    """현재 RSS(MB). /proc가 있는 Linux에서만 읽고, 그 밖에는 None."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            pages = int(fh.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+@dataclass
+class PipelineProfile:
+    """run_pipeline 단계별 wall/CPU 시간·RSS 변화·행/피처 수와 fold별 학습 시간.
+
+    단계마다 perf_counter·process_time·RSS만 읽는 가벼운 계측이라 항상 켜 둔다
+    (tracemalloc은 할당마다 비용이 들어 쓰지 않는다). 단계 기록의 rss_delta_mb는
+    그 단계 동안의 현재 RSS 변화, new_peak_rss_mb는 그 단계가 프로세스 최대
+    RSS를 새로 올렸을 때만 그 값이다. 프로세스 평생 최대값은 단계와 무관하므로
+    to_dict()의 process_peak_rss_mb로 따로 싣는다.
+    """
+
+    stages: list[dict] = field(default_factory=list)
+    folds: list[dict] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @contextmanager
+    def stage(self, name: str, **counts):
+        """with 블록 하나를 한 단계로 기록. 내준 dict에 행·피처 수를 덧붙인다."""
+        rec = {"stage": name, **counts}
+        rss, peak = _current_rss_mb(), _peak_rss_mb()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec["wall_s"] = time.perf_counter() - wall
+            rec["cpu_s"] = time.process_time() - cpu
+            rss_end, peak_end = _current_rss_mb(), _peak_rss_mb()
+            rec["rss_mb"] = rss_end
+            rec["rss_delta_mb"] = (rss_end - rss if rss is not None
+                                   and rss_end is not None else None)
+            rec["new_peak_rss_mb"] = (peak_end if peak is not None
+                                      and peak_end is not None and peak_end > peak
+                                      else None)
+            self.stages.append(rec)
+
+    def fold(self, **info) -> None:
+        self.folds.append({"fold": len(self.folds), **info})
+
+    def to_dict(self) -> dict:
+        models: dict[str, list[float]] = {}
+        for f in self.folds:
+            for name, sec in f.get("fit_s", {}).items():
+                models.setdefault(name, []).append(sec)
+        return {
+            "engine_version": VERSION,
+            "total_wall_s": time.perf_counter() - self.started,
+            "process_peak_rss_mb": _peak_rss_mb(),
+            "stages": [dict(r) for r in self.stages],
+            "folds": [dict(f) for f in self.folds],
+            "models": {name: {"fits": len(v), "total_s": float(sum(v)),
+                              "mean_s": float(np.mean(v)), "max_s": float(max(v))}
+                       for name, v in models.items()},
+        }
+
+
+def profile_json(timings: dict) -> str:
+    """계측 결과를 회귀 비교용 JSON 문자열로."""
+    return json.dumps(_plain_json(timings), ensure_ascii=False, indent=1)
+
+
 # ──────────────────────────────────────────────────────────────
 # 모델 · 워크포워드 백테스트
 # ──────────────────────────────────────────────────────────────
@@ -1352,14 +2776,19 @@ def training_weights(train: pd.DataFrame,
 
 
 def _fit_family(models: dict[str, object], X: pd.DataFrame, y: pd.Series,
-                sample_weight: np.ndarray) -> dict[str, object]:
+                sample_weight: np.ndarray,
+                timings: dict[str, float] | None = None) -> dict[str, object]:
     """한 모델의 환경 호환 문제로 전체 예측이 중단되지 않게 독립 학습."""
     fitted: dict[str, object] = {}
     for name, model in models.items():
+        started = time.perf_counter()
         try:
             fitted[name] = _fit_estimator(model, X, y, sample_weight)
         except Exception:
             continue
+        finally:
+            if timings is not None:
+                timings[name] = time.perf_counter() - started
     if not fitted:
         raise RuntimeError("앙상블 기본 모델을 하나도 학습하지 못했습니다.")
     return fitted
@@ -1487,9 +2916,10 @@ def fit_probability_model(train: pd.DataFrame,
         if (len(core) >= MIN_TRAIN_ROWS and len(cal) >= required_cal
                 and core["y"].nunique() == 2 and cal["y"].nunique() == 2):
             core_models = _fit_family(
-                make_model_family(), core[feat_cols], core["y"],
+                make_model_family(), feature_view(core, feat_cols), core["y"],
                 training_weights(core, recency_half_life, horizon))
-            names, matrix = _probability_matrix(core_models, cal[feat_cols])
+            names, matrix = _probability_matrix(core_models,
+                                                feature_view(cal, feat_cols))
             cal_w = recency_weights(cal, recency_half_life)
             blend_weights, validation_losses = _validation_blend(
                 names, matrix, cal["y"].to_numpy(dtype=int), cal_w)
@@ -1503,7 +2933,7 @@ def fit_probability_model(train: pd.DataFrame,
             cal_rows = len(cal)
 
     estimators = _fit_family(
-        make_model_family(), tr[feat_cols], tr["y"],
+        make_model_family(), feature_view(tr, feat_cols), tr["y"],
         training_weights(tr, recency_half_life, horizon))
     if not blend_weights:
         blend_weights = {name: 1.0 / len(estimators) for name in estimators}
@@ -1579,11 +3009,13 @@ def walk_forward(data: pd.DataFrame, feat_cols: list[str], horizon: int,
                  step: int = WF_STEP, min_train_days: int = MIN_TRAIN_DAYS,
                  calibration_days: int = CALIBRATION_DAYS,
                  min_calibration_rows: int = MIN_CALIBRATION_ROWS,
-                 recency_half_life: int = RECENCY_HALF_LIFE_DAYS):
+                 recency_half_life: int = RECENCY_HALF_LIFE_DAYS,
+                 profile: PipelineProfile | None = None):
     """step 거래일마다 확정 라벨로 재학습 → 다음 구간 prequential 예측.
 
     모델별 가중치와 확률 보정도 그 시점까지 정답이 확정된 과거 OOS 예측만
     사용한다. 반환 예측은 모델 선택/보정까지 완전 아웃오브샘플이다.
+    profile을 주면 fold별 학습·예측 시간과 모델별 fit 시간을 기록한다.
     """
     dates = np.array(sorted(data["date"].unique()))
     chunks = []
@@ -1599,19 +3031,22 @@ def walk_forward(data: pd.DataFrame, feat_cols: list[str], horizon: int,
         test = data[(data["date"] > t) & (data["date"] <= t_next)]
         if test.empty:
             continue
+        fold_started = time.perf_counter()
+        fit_s: dict[str, float] = {}
         estimators = _fit_family(
-            make_model_family(), train[feat_cols], train["y"],
-            training_weights(train, recency_half_life, horizon))
+            make_model_family(), feature_view(train, feat_cols), train["y"],
+            training_weights(train, recency_half_life, horizon), timings=fit_s)
         history = (pd.concat(probability_history, ignore_index=True)
                    if probability_history else pd.DataFrame())
         mdl = probability_model_from_oos_history(
             estimators, train, history, t, calibration_days,
             min_calibration_rows, recency_half_life)
-        p = mdl.predict_proba(test[feat_cols])[:, 1]
+        predict_started = time.perf_counter()
+        p = mdl.predict_proba(feature_view(test, feat_cols))[:, 1]
         chunk = test[["date", "ticker", "entry_px", "exit_px",
                       "fwd_ret", "y", "label_known_date"]].copy()
         chunk["score"] = p * 100.0
-        names, matrix = _probability_matrix(estimators, test[feat_cols])
+        names, matrix = _probability_matrix(estimators, feature_view(test, feat_cols))
         for j, name in enumerate(names):
             chunk[f"p__{name}"] = matrix[:, j]
         probability_history.append(chunk[[
@@ -1619,6 +3054,11 @@ def walk_forward(data: pd.DataFrame, feat_cols: list[str], horizon: int,
             *[f"p__{name}" for name in names]]].copy())
         chunks.append(chunk[["date", "ticker", "entry_px", "exit_px",
                              "fwd_ret", "y", "score"]])
+        if profile is not None:
+            profile.fold(train_end=t, train_rows=len(train), test_rows=len(test),
+                         fit_s=fit_s,
+                         predict_s=time.perf_counter() - predict_started,
+                         wall_s=time.perf_counter() - fold_started)
 
     oos = (pd.concat(chunks, ignore_index=True)
            if chunks else pd.DataFrame(columns=["date", "ticker", "fwd_ret", "y", "score"]))
@@ -1628,27 +3068,130 @@ def walk_forward(data: pd.DataFrame, feat_cols: list[str], horizon: int,
     final_train = data[(data["label_known_date"].notna()) & (data["y"].notna())]
     final_model = None
     if len(final_train) >= MIN_TRAIN_ROWS:
+        fold_started = time.perf_counter()
+        fit_s = {}
         final_estimators = _fit_family(
-            make_model_family(), final_train[feat_cols], final_train["y"],
-            training_weights(final_train, recency_half_life, horizon))
+            make_model_family(), feature_view(final_train, feat_cols), final_train["y"],
+            training_weights(final_train, recency_half_life, horizon), timings=fit_s)
         final_history = (pd.concat(probability_history, ignore_index=True)
                          if probability_history else pd.DataFrame())
         final_model = probability_model_from_oos_history(
             final_estimators, final_train, final_history, dates[-1],
             calibration_days, min_calibration_rows, recency_half_life)
+        if profile is not None:
+            profile.fold(train_end=dates[-1], train_rows=len(final_train),
+                         test_rows=0, fit_s=fit_s, predict_s=0.0,
+                         wall_s=time.perf_counter() - fold_started, final=True)
     return oos, final_model
 
 
+# ──────────────────────────────────────────────────────────────
+# 학습 결과 캐시 (입력 해시 키)
+# ──────────────────────────────────────────────────────────────
+# 워크포워드 결과를 좌우하는 코드. 이 중 하나라도 바뀌면 저장본은 무효다.
+_MODEL_CODE = ("make_model_family", "_fit_estimator", "recency_weights",
+               "training_weights", "_fit_family", "_probability_matrix",
+               "_validation_blend", "ProbabilityModel", "fit_probability_model",
+               "probability_model_from_oos_history", "walk_forward",
+               "feature_view")
+
+
+def _model_code_hash() -> str:
+    import sklearn
+
+    h = hashlib.sha256(f"{VERSION}|{sklearn.__version__}".encode())
+    for name in _MODEL_CODE:
+        try:
+            h.update(inspect.getsource(globals()[name]).encode())
+        except (OSError, TypeError, KeyError):
+            h.update(name.encode())   # 소스를 못 읽는 배포본은 이름·버전만으로
+    return h.hexdigest()
+
+
+def model_cache_key(dataset: CompactDataset, feat_cols: list[str],
+                    horizon: int, profile: dict) -> str:
+    """데이터 내용·피처 목록·지평·기간 프로필·모델 코드의 해시."""
+    h = hashlib.sha256()
+    for arr in (dataset.dates, dataset.label_known_dates, dataset.ticker_codes,
+                dataset.values, dataset.flags, dataset.prices):
+        h.update(str(arr.shape).encode())
+        h.update(np.ascontiguousarray(arr).view(np.uint8).data)
+    meta = {"tickers": list(dataset.tickers), "value_cols": dataset.value_cols,
+            "flag_cols": dataset.flag_cols, "feat_cols": list(feat_cols),
+            "horizon": int(horizon),
+            "profile": {k: v for k, v in profile.items() if k != "label"},
+            "code": _model_code_hash()}
+    h.update(json.dumps(meta, sort_keys=True).encode())
+    return h.hexdigest()[:32]
+
+
+def _model_cache_path(key: str) -> str:
+    return os.path.join(MODEL_CACHE_DIR, f"wf-{key}.pkl")
+
+
+def load_walk_forward(key: str) -> tuple[pd.DataFrame, object] | None:
+    """키가 같은 저장본의 (oos, final_model). 없거나 읽을 수 없으면 None."""
+    if not MODEL_CACHE_DIR:
+        return None
+    try:
+        with open(_model_cache_path(key), "rb") as fh:
+            saved = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError,
+            ImportError, ValueError):
+        return None
+    if saved.get("key") != key or saved.get("version") != VERSION:
+        return None
+    return saved["oos"], saved["final_model"]
+
+
+def save_walk_forward(key: str, oos: pd.DataFrame, final_model,
+                      feat_cols: list[str]) -> bool:
+    """적합된 ProbabilityModel(추정기·혼합 가중치·보정기)과 OOS 이력을 저장."""
+    if not MODEL_CACHE_DIR:
+        return False
+    path = _model_cache_path(key)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as fh:
+            pickle.dump({"key": key, "version": VERSION, "created_at": time.time(),
+                         "feat_cols": list(feat_cols), "oos": oos,
+                         "final_model": final_model},
+                        fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except (OSError, pickle.PicklingError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+    saved = sorted((os.path.join(MODEL_CACHE_DIR, f) for f in os.listdir(MODEL_CACHE_DIR)
+                    if f.startswith("wf-") and f.endswith(".pkl")),
+                   key=os.path.getmtime)
+    for old in saved[:-MODEL_CACHE_KEEP]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return True
+
+
 def current_scores(data: pd.DataFrame, feat_cols: list[str], final_model):
     if final_model is None:
         return pd.DataFrame()
     latest = data.sort_values("date").groupby("ticker").tail(1).copy()
-    latest["score"] = final_model.predict_proba(latest[feat_cols])[:, 1] * 100.0
+    latest["score"] = final_model.predict_proba(
+        feature_view(latest, feat_cols))[:, 1] * 100.0
     latest["calibration_rows"] = getattr(final_model, "calibration_rows", 0)
     return latest[["date", "ticker", "score", "calibration_rows"]].reset_index(drop=True)
 
 
 def compute_metrics(oos: pd.DataFrame, thr: int = 55, horizon: int = 20):
+    return threshold_metrics(metrics_base(oos, horizon), thr)
+
+
+def metrics_base(oos: pd.DataFrame, horizon: int = 20) -> dict | None:
+    """행동 기준(thr)과 무관한 검증 지표. run_pipeline에서 한 번만 계산해 둔다."""
     from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
 
     m = oos.dropna(subset=["y"]).sort_values("date").copy()
@@ -1683,11 +3226,11 @@ def compute_metrics(oos: pd.DataFrame, thr: int = 55, horizon: int = 20):
     block_stats = m.groupby("_block")["hit"].agg(["sum", "count"])
     if len(block_stats) >= 5:
         rng = np.random.default_rng(42)
-        draws = []
         arr = block_stats[["sum", "count"]].to_numpy(dtype=float)
-        for _ in range(800):
-            picked = arr[rng.integers(0, len(arr), len(arr))]
-            draws.append(float(picked[:, 0].sum() / picked[:, 1].sum()))
+        # 800회 재표집을 한 번의 (800 × 블록수) 추첨과 행 합으로 계산한다.
+        # 같은 시드에서 반복 호출과 동일한 난수열이라 구간 값도 그대로다.
+        picked = rng.integers(0, len(arr), size=(800, len(arr)))
+        draws = arr[picked, 0].sum(axis=1) / arr[picked, 1].sum(axis=1)
         acc_lo, acc_hi = np.quantile(draws, [0.025, 0.975])
     else:
         n_obs, z = len(m), 1.96
@@ -1712,11 +3255,6 @@ def compute_metrics(oos: pd.DataFrame, thr: int = 55, horizon: int = 20):
                    실제상승비율=("actual_up", "mean"),
                    표본수=("hit", "size")))
 
-    up_calls = m[m["score"] >= thr]
-    dn_calls = m[m["score"] <= 100 - thr]
-    prec_up = float(up_calls["actual_up"].mean()) if len(up_calls) else np.nan
-    prec_dn = float(1 - dn_calls["actual_up"].mean()) if len(dn_calls) else np.nan
-
     roll = m[["date"]].copy()
     roll["모델 적중률"] = m["hit"].rolling(250, min_periods=100).mean().values
     roll["무조건 상승 적중률"] = m["actual_up"].rolling(250, min_periods=100).mean().values
@@ -1728,12 +3266,25 @@ def compute_metrics(oos: pd.DataFrame, thr: int = 55, horizon: int = 20):
         "brier": brier, "brier_base": brier_base, "brier_skill": brier_skill,
         "log_loss": ll, "auc": auc, "ece": ece, "calibration": cal_df,
         "per_ticker": per_ticker, "band": band,
-        "prec_up": prec_up, "n_up": int(len(up_calls)),
-        "prec_dn": prec_dn, "n_dn": int(len(dn_calls)),
         "rolling": roll,
+        "calls": m[["score", "actual_up"]].reset_index(drop=True),
     }
 
 
+def threshold_metrics(base: dict | None, thr: int = 55) -> dict | None:
+    """슬라이더(thr)에 따라 바뀌는 방향별 적중 정밀도만 덧붙인다."""
+    if base is None:
+        return None
+    score = base["calls"]["score"].to_numpy(dtype=float)
+    actual_up = base["calls"]["actual_up"].to_numpy(dtype=float)
+    up = actual_up[score >= thr]
+    dn = actual_up[score <= 100 - thr]
+    return {**base,
+            "prec_up": float(up.mean()) if len(up) else np.nan, "n_up": int(len(up)),
+            "prec_dn": float(1 - dn.mean()) if len(dn) else np.nan,
+            "n_dn": int(len(dn))}
+
+
 def score_evidence(oos: pd.DataFrame, ticker: str, score: float,
                    width: float = 10.0, horizon: int = 20) -> dict:
     """현재 점수 근처의 과거 실제 상승률과 Wilson 구간을 반환."""
@@ -1766,7 +3317,46 @@ def equity_curve(oos: pd.DataFrame, ticker: str, horizon: int, thr: int = 55,
     """비중복 구간 백테스트: t일 신호→t+1일 시가 진입, 비용 차감."""
     g = (oos[oos["ticker"] == ticker]
          .dropna(subset=["fwd_ret"]).sort_values("date"))
-    g = g.iloc[::horizon]
+    return _equity_from_group(g.iloc[::horizon], horizon, thr, cost_bps)
+
+
+def equity_grid(oos: pd.DataFrame, horizon: int, thresholds, costs
+                ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """게시용: 종목별로 한 번만 거른 뒤 기준점수×비용 조합의 곡선을 모두 계산.
+
+    곡선은 긴 형식(ticker·threshold·cost_bps·date), 성과는 조합당 한 행
+    (strategy_total·benchmark_mdd 식의 평탄한 컬럼)이다. 값은 equity_curve와 같다.
+    """
+    curves, stats = [], []
+    for ticker, g in oos.dropna(subset=["fwd_ret"]).groupby("ticker", sort=False):
+        g = g.sort_values("date").iloc[::horizon]
+        for thr in thresholds:
+            for cost in costs:
+                bt = _equity_from_group(g, horizon, thr, cost)
+                if bt is None:
+                    continue
+                curve, st_ = bt
+                curves.append(curve.assign(ticker=ticker, threshold=int(thr),
+                                           cost_bps=int(cost)))
+                stats.append({"ticker": ticker, "threshold": int(thr),
+                              "cost_bps": int(cost),
+                              **{f"{side}_{k}": v for side in ("strategy", "benchmark")
+                                 for k, v in st_[side].items()},
+                              "trades": st_["trades"], "exposure": st_["exposure"],
+                              "win_rate": st_["win_rate"]})
+    if not curves:
+        return pd.DataFrame(), pd.DataFrame(stats)
+    long = pd.concat(curves, ignore_index=True)
+    keys = ["threshold", "cost_bps"]
+    long[keys] = long[keys].astype(np.int16)
+    table = pd.DataFrame(stats)
+    table[keys] = table[keys].astype(np.int16)
+    return long[["ticker", "threshold", "cost_bps", "date",
+                 "시그널 추종", "단순 보유"]], table
+
+
+def _equity_from_group(g: pd.DataFrame, horizon: int, thr: int,
+                       cost_bps: int):
     if len(g) < 6:
         return None
     cost = float(cost_bps) / 10_000.0
@@ -1800,10 +3390,10 @@ def equity_curve(oos: pd.DataFrame, ticker: str, horizon: int, thr: int = 55,
 
 
 def feature_importance(final_model, data: pd.DataFrame, feat_cols: list[str],
-                       n_rows: int = 800, max_candidates: int = 40):
+                       n_rows: int = 800, max_candidates: int = 40,
+                       grouped: bool = False):
     if final_model is None:
         return None
-    from sklearn.metrics import log_loss
 
     lab = data.dropna(subset=["y"]).sort_values("date").tail(n_rows)
     if len(lab) < 200:
@@ -1826,7 +3416,7 @@ def feature_importance(final_model, data: pd.DataFrame, feat_cols: list[str],
             if values.sum() > 0:
                 screening += (float(final_model.blend_weights.get(name, 0.0))
                               * values / values.sum())
-    numeric_lab = lab[feat_cols].apply(pd.to_numeric, errors="coerce")
+    numeric_lab = feature_view(lab, feat_cols).apply(pd.to_numeric, errors="coerce")
     corr = numeric_lab.corrwith(lab["y"].astype(float)).abs().fillna(0.0)
     if corr.sum() > 0:
         screening += 0.20 * corr / corr.sum()
@@ -1834,22 +3424,66 @@ def feature_importance(final_model, data: pd.DataFrame, feat_cols: list[str],
     if not candidates:
         return None
 
-    y = lab["y"].to_numpy(dtype=int)
-    base = np.clip(final_model.predict_proba(lab[feat_cols])[:, 1], 1e-4, 1 - 1e-4)
+    if grouped:
+        # 같은 계열(ret5·ret20·…) 후보는 같은 행 순열로 함께 섞어, 서로 대체 가능한
+        # 상관 피처가 중요도를 나눠 먹는 현상을 줄인다.
+        families: dict[str, list[str]] = {}
+        for col in candidates:
+            families.setdefault(feature_family(col), []).append(col)
+        groups = list(families.values())
+        names = list(families)
+    else:
+        groups = [[col] for col in candidates]
+        names = [feat_label(col) for col in candidates]
+    col_pos = {c: i for i, c in enumerate(feat_cols)}
+    scores = permutation_losses(
+        final_model, feature_view(lab, feat_cols).to_numpy(dtype=np.float32), feat_cols,
+        lab["y"].to_numpy(dtype=int),
+        [[col_pos[c] for c in group] for group in groups])
+    return pd.Series(scores, index=names).sort_values(ascending=False)
+
+
+def feature_family(col: str) -> str:
+    """피처 이름의 계열 접두어 (ret20 → ret, ma60_gap → ma, spot_x → spot)."""
+    m = re.match(r"[A-Za-z]+", col)
+    return m.group(0) if m else col
+
+
+def permutation_losses(model, X: np.ndarray, columns: list[str], y: np.ndarray,
+                       groups: list[list[int]], repeats: int = 2, seed: int = 0,
+                       batch: int = IMPORTANCE_BATCH) -> np.ndarray:
+    """그룹별 순열 log-loss 증가량(반복 평균).
+
+    X(float32)를 batch장 쌓은 재사용 버퍼에 각 슬롯의 열만 제자리에서 섞고,
+    쌓인 행 전체를 predict_proba 한 번으로 계산한 뒤 해당 열만 되돌린다.
+    행 단위 예측이라 하나씩 계산한 값과 같고, 순열도 같은 난수열을 쓴다.
+    """
+    from sklearn.metrics import log_loss
+
+    n = len(X)
+    base = np.clip(model.predict_proba(pd.DataFrame(X, columns=columns))[:, 1],
+                   1e-4, 1 - 1e-4)
     base_loss = float(log_loss(y, base, labels=[0, 1]))
-    rng = np.random.default_rng(0)
-    result = {}
-    for col in candidates:
-        losses = []
-        for _ in range(2):
-            shuffled = lab[feat_cols].copy()
-            shuffled[col] = rng.permutation(shuffled[col].to_numpy())
-            p = np.clip(final_model.predict_proba(shuffled)[:, 1], 1e-4, 1 - 1e-4)
-            losses.append(float(log_loss(y, p, labels=[0, 1])) - base_loss)
-        result[col] = float(np.mean(losses))
-    imp = pd.Series(result)
-    imp.index = [feat_label(c) for c in imp.index]
-    return imp.sort_values(ascending=False)
+    rng = np.random.default_rng(seed)
+    jobs = [(g, rng.permutation(n)) for g in range(len(groups))
+            for _ in range(repeats)]
+    losses = np.zeros(len(groups), dtype=float)
+    size = max(1, min(int(batch), len(jobs)))
+    buf = np.tile(X, (size, 1))
+    for start in range(0, len(jobs), size):
+        chunk = jobs[start:start + size]
+        for slot, (g, perm) in enumerate(chunk):
+            rows = slice(slot * n, (slot + 1) * n)
+            for c in groups[g]:
+                buf[rows, c] = X[perm, c]
+        frame = pd.DataFrame(buf[:len(chunk) * n], columns=columns, copy=False)
+        p = np.clip(model.predict_proba(frame)[:, 1], 1e-4, 1 - 1e-4)
+        for slot, (g, _) in enumerate(chunk):
+            rows = slice(slot * n, (slot + 1) * n)
+            losses[g] += float(log_loss(y, p[rows], labels=[0, 1])) - base_loss
+            for c in groups[g]:
+                buf[rows, c] = X[:, c]
+    return losses / repeats
 
 
 def horizon_return_stats(data: pd.DataFrame) -> dict:
@@ -1912,12 +3546,10 @@ ACTION_META = {
 def atr_series(pdf: pd.DataFrame, n: int = 14) -> pd.Series:
     """ATR(14). 고가/저가가 없으면 종가 변동폭으로 근사."""
     c = pdf["Close"]
-    if {"High", "Low"} <= set(pdf.columns) and pdf["High"].notna().sum() > n:
-        h, l, pc = pdf["High"], pdf["Low"], c.shift()
-        tr = pd.concat([h - l, (h - pc).abs(), (l - pc).abs()], axis=1).max(axis=1)
-    else:
-        tr = c.diff().abs()
-    return tr.ewm(alpha=1 / n, adjust=False).mean()
+    if {"High", "Low"} <= set(pdf.columns):
+        return _atr_kernel(pdf["High"], pdf["Low"], c, n,
+                           use_hl=pdf["High"].notna().sum() > n)
+    return _atr_kernel(c, c, c, n, use_hl=False)
 
 
 def px_round(v, ccy: str):
@@ -2400,29 +4032,318 @@ def save_spot_editor(df: pd.DataFrame, path: str = SPOT_CSV) -> None:
 # ──────────────────────────────────────────────────────────────
 # 파이프라인 (Streamlit 캐시 대상)
 # ──────────────────────────────────────────────────────────────
+# 화면은 가격 → 기본 피처 → 현물가 피처 → 모델 네 계층을 따로 캐시한다.
+# 현물가 수동 보정은 현물가 계층만 다시 계산하고, 그 피처 내용이 실제로
+# 바뀐 경우에만 모델 계층(run_pipeline)이 다시 학습한다.
+def prices_digest(prices: dict[str, pd.DataFrame]) -> str:
+    """가격 데이터 내용 해시. 세션마다 다른 새로고침 토큰과 무관하게 같은 시세면 같다."""
+    h = hashlib.sha256()
+    for sym in sorted(prices):
+        df = prices[sym]
+        h.update(f"{sym}|{','.join(map(str, df.columns))}|".encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()[:24]
+
+
+def prices_layer(period: str, refresh_token: int = 0) -> dict:
+    """{"prices": 심볼별 OHLCV, "digest": 내용 해시}."""
+    del refresh_token  # 즉시 새로고침 때만 바뀌는 캐시 키
+    prices = download_prices(period)
+    return {"prices": prices, "digest": prices_digest(prices)}
+
+
+def base_layer(horizon: int, price_digest: str, _prices: dict) -> pd.DataFrame:
+    """현물가와 무관한 데이터셋 본체. 키는 가격 내용 해시라 세션 간에 공유된다."""
+    del price_digest
+    return assemble_base_dataset(_prices, horizon)
+
+
+def spot_layer(period: str, price_digest: str | None = None,
+               refresh_token: int = 0,
+               spot_data: pd.DataFrame | None = None,
+               auto_spot: pd.DataFrame | None = None,
+               _prices: dict | None = None, force_spot: bool = False) -> dict:
+    """자동 수집값 + 세션 수동값 병합 → 가격 달력 위 현물가 피처와 그 내용 해시.
+
+    auto_spot을 주면(화면: SpotRefresher 스냅샷) 저장소를 다시 읽지 않는다.
+    주지 않으면 저장소 스냅샷을 쓰고, force_spot일 때만 동기 수집한다.
+    학습 창 밖 날짜를 고친 수정은 피처를 바꾸지 않으므로 digest도 그대로다.
+    price_digest는 캐시 키 전용이다: _prices는 해시되지 않으므로, 가격 계층이
+    새 봉을 받으면 이 값이 바뀌어 피처가 옛 달력에 머무르지 않게 한다.
+    """
+    del price_digest, refresh_token
+    if auto_spot is not None:
+        status: dict = {}
+    elif force_spot:
+        auto_spot, status = fetch_auto_spot_prices(force=True)
+    else:
+        auto_spot, status = read_auto_spot_snapshot()
+    # 자동값이 기본이고, 사용자 세션의 수동 값이 같은 날짜·품목만 덮어쓴다.
+    merged = merge_spot_data(auto_spot, spot_data)
+    # 병합은 수동 품목 열을 앞에 두므로 자동 수집 순서로 되돌린다. 열 순서가
+    # 모델 입력 순서라, 값이 같은 보정이 재학습을 부르지 않게 한다.
+    first = [c for c in _normalise_spot_data(auto_spot).columns if c in merged]
+    merged = merged[first + [c for c in merged.columns if c not in first]]
+    prices = _prices if _prices is not None else download_prices(period)
+    features = load_spot_features(price_calendar(prices), spot_data=merged)
+    h = hashlib.sha256()
+    if features is not None:
+        h.update(",".join(features.columns).encode())
+        h.update(pd.util.hash_pandas_object(features, index=True).to_numpy().tobytes())
+    return {"merged": merged, "status": status, "features": features,
+            "digest": h.hexdigest()[:24]}
+
+
+def pipeline_key(horizon: int, period: str, price_digest: str,
+                 spot_digest: str) -> str:
+    """파이프라인 결과의 내용 주소. 입력 내용이 같으면 세션·토큰과 무관하게 같다."""
+    return f"h{int(horizon)}-{period}-{price_digest}-{spot_digest}"
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+
+class ResultRegistry:
+    """프로세스 전체가 공유하는 내용 주소 결과 저장소(single-flight, 메모리 예산 LRU).
+
+    같은 키를 여러 세션이 동시에 요청하면 처음 온 하나만 계산하고 나머지는
+    그 계산이 끝나기를 기다려 같은 객체를 받는다. 계산이 실패하면 기다리던
+    요청도 같은 예외를 받고 저장은 하지 않는다. 결과는 복사 없이 공유되므로
+    freeze_result로 모든 버퍼를 읽기 전용으로 만든 뒤 넣는다. 항목 크기 합이
+    max_bytes를 넘으면 가장 오래 안 쓴 항목부터 내보내고, 혼자서 예산을 넘는
+    결과는 요청한 쪽에만 돌려주고 보관하지 않는다.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 16,
+                 max_bytes: int | None = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, object, int]] = {}
+        self._flights: dict[str, _Flight] = {}
+        self.stats = {"hits": 0, "computes": 0, "waits": 0, "evictions": 0}
+
+    def get(self, key: str):
+        with self._lock:
+            return self._fresh(key)
+
+    def _fresh(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            self._drop(key)
+            return None
+        # 최근 사용 순서 유지(dict 삽입 순서를 LRU 큐로 쓴다).
+        self._entries[key] = self._entries.pop(key)
+        return entry[1]
+
+    def _drop(self, key: str) -> None:
+        self.nbytes -= self._entries.pop(key)[2]
+
+    def _store(self, key: str, value, size: int) -> None:
+        if key in self._entries:
+            self._drop(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic(), value, size)
+        self.nbytes += size
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            self._drop(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def get_or_compute(self, key: str, compute):
+        with self._lock:
+            value = self._fresh(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats["computes"] += 1
+            else:
+                self.stats["waits"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+            size = result_nbytes(flight.value)   # 잠금 밖에서 잰다(모델 직렬화 포함)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, flight.value, size)
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def memory_report(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "mb": self.nbytes / 2**20,
+                    "budget_mb": (None if self.max_bytes is None
+                                  else self.max_bytes / 2**20), **self.stats}
+
+
+def result_nbytes(obj) -> int:
+    """파이프라인 결과의 대략적 메모리 크기. 배열·프레임은 버퍼 크기, 모델은 직렬화 크기."""
+    if isinstance(obj, CompactDataset):
+        return obj.nbytes
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, dict):
+        return sum(result_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(result_nbytes(v) for v in obj)
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if obj is None or isinstance(obj, (int, float, bool, np.generic)):
+        return 16
+    try:
+        return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(obj)
+
+
+def _freeze(obj) -> None:
+    """배열·프레임(블록 버퍼)·CompactDataset을 제자리에서 읽기 전용으로 만든다.
+
+    object 배열(종목명 등 문자열 열)은 그대로 둔다. pandas의 Cython 경로
+    (memory_usage(deep=True) 등)가 읽기 전용 object 버퍼를 받지 못한다.
+    """
+    if isinstance(obj, np.ndarray):
+        if obj.dtype != object:
+            obj.flags.writeable = False
+    elif isinstance(obj, CompactDataset):
+        for name in ("dates", "label_known_dates", "ticker_codes",
+                     "values", "flags", "prices"):
+            _freeze(getattr(obj, name))
+        _freeze(getattr(obj, "_frame", None))
+    elif isinstance(obj, pd.DataFrame):
+        for block in obj._mgr.blocks:
+            # DatetimeArray 등 확장 배열은 내부 ndarray를 막는다.
+            _freeze(getattr(block.values, "_ndarray", block.values))
+    elif isinstance(obj, pd.Series):
+        _freeze(getattr(obj._values, "_ndarray", obj._values))
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            _freeze(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            _freeze(value)
+
+
+def freeze_result(out: dict) -> dict:
+    """세션이 공유할 결과의 버퍼를 모두 읽기 전용으로 만든다(복사 없음).
+
+    oos·scores·prices·spot_data 같은 프레임은 숫자·날짜 블록 버퍼를, CompactDataset은
+    피처 블록을 막으므로, 공유 결과를 제자리에서 고치면(iloc/loc 대입, +=,
+    to_numpy 뷰에 쓰기) 다른 세션을 오염시키는 대신 ValueError가 난다.
+    가공이 필요하면 copy()한 뒤에 한다.
+    """
+    _freeze(out)
+    return out
+
+
+def pipeline_registry() -> ResultRegistry:
+    """화면에서 st.cache_resource로 감싸 프로세스당 하나만 만든다."""
+    # 프로필마다 모델 결과와 기본 피처(base:) 두 항목을 둔다.
+    return ResultRegistry(
+        ttl=3600, max_entries=2 * len(HORIZON_OPTIONS) * len(PERIOD_PROFILES),
+        max_bytes=RESULT_CACHE_MB * 2**20)
+
+
 def run_pipeline(horizon: int, period: str,
                  spot_data: pd.DataFrame | None = None,
                  refresh_token: int = 0,
-                 force_spot: bool = False):
-    auto_spot, spot_status = fetch_auto_spot_prices(force=force_spot)
-    # 자동값이 기본이고, 사용자 세션의 수동 값이 같은 날짜·품목만 덮어쓴다.
-    merged_spot = merge_spot_data(auto_spot, spot_data)
+                 force_spot: bool = False,
+                 layers: dict | None = None):
+    """가격·피처·워크포워드·지표 전체를 계산한다.
+
+    layers에 "prices"·"base"·"spot" 계층 값을 내는 인자 없는 함수를 주면 그
+    단계를 직접 계산하지 않는다(Streamlit 계층 캐시). "spot"을 주면 spot_data는
+    쓰지 않는다.
+    """
+    layers = layers or {}
     del refresh_token  # 캐시 키만 바꾸기 위한 사용자 세션별 토큰
+    prof = PipelineProfile()
     profile = PERIOD_PROFILES.get(period, PERIOD_PROFILES[DEFAULT_PERIOD])
-    prices = download_prices(period)
+    with prof.stage("prices") as rec:
+        prices = (layers["prices"]() if "prices" in layers
+                  else download_prices(period))
+        rec.update(symbols=len(prices), rows=sum(len(v) for v in prices.values()))
+    with prof.stage("spot") as rec:
+        spot = (layers["spot"]() if "spot" in layers
+                else spot_layer(period, spot_data=spot_data, _prices=prices,
+                                force_spot=force_spot))
+        merged_spot, spot_status = spot["merged"], spot["status"]
+        rec["rows"] = len(merged_spot)
     # 선택형 프록시 하나의 일시적 실패가 긴 경고 목록을 만들지 않게 핵심만 경고한다.
     missing = [s for s in list(TICKERS) + list(CORE_MACRO_SYMBOLS)
                if s not in prices]
-    data, feat_cols = assemble_dataset(prices, horizon, spot_data=merged_spot)
-    oos, final_model = walk_forward(
-        data, feat_cols, horizon, step=profile["wf_step"],
-        min_train_days=profile["min_train_days"],
-        calibration_days=profile["calibration_days"],
-        min_calibration_rows=profile["min_calibration_rows"],
-        recency_half_life=profile["recency_half_life"])
-    scores = current_scores(data, feat_cols, final_model)
-    imp = feature_importance(final_model, data, feat_cols)
-    ret_stats = horizon_return_stats(data)
+    with prof.stage("assemble") as rec:
+        base = (layers["base"]() if "base" in layers
+                else assemble_base_dataset(prices, horizon))
+        dense, feat_cols = attach_spot_features(base, spot["features"])
+        del base
+        rec.update(rows=len(dense), features=len(feat_cols))
+    with prof.stage("compact") as rec:
+        # 캐시에는 float32·범주코드 압축본만 남기고, 계산은 그 zero-copy 뷰로 한다.
+        dataset = compact_dataset(dense, feat_cols)
+        del dense
+        data = dataset.frame()
+        rec.update(rows=len(dataset), **dataset.memory_report())
+    with prof.stage("walk_forward") as rec:
+        # 입력·코드가 같으면 재시작·재배포 후에도 저장된 학습 결과를 그대로 쓴다.
+        model_key = model_cache_key(dataset, feat_cols, horizon, profile)
+        cached = load_walk_forward(model_key)
+        if cached is not None:
+            oos, final_model = cached
+        else:
+            oos, final_model = walk_forward(
+                data, feat_cols, horizon, step=profile["wf_step"],
+                min_train_days=profile["min_train_days"],
+                calibration_days=profile["calibration_days"],
+                min_calibration_rows=profile["min_calibration_rows"],
+                recency_half_life=profile["recency_half_life"], profile=prof)
+            save_walk_forward(model_key, oos, final_model, feat_cols)
+        rec.update(rows=len(oos), folds=len(prof.folds), features=len(feat_cols),
+                   cached=cached is not None)
+    with prof.stage("scores") as rec:
+        scores = current_scores(data, feat_cols, final_model)
+        rec["rows"] = len(scores)
+    with prof.stage("metrics") as rec:
+        base_metrics = metrics_base(oos, horizon)
+        rec["rows"] = len(oos)
+    with prof.stage("importance") as rec:
+        imp = feature_importance(final_model, data, feat_cols)
+        rec["features"] = 0 if imp is None else len(imp)
+    with prof.stage("return_stats"):
+        ret_stats = horizon_return_stats(data)
     spot_used = sorted(c for c in feat_cols if c.startswith("spot_"))
     model_info = {
         "weights": dict(getattr(final_model, "blend_weights", {}) or {}),
@@ -2431,12 +4352,456 @@ def run_pipeline(horizon: int, period: str,
         "calibration_rows": int(
             getattr(final_model, "calibration_rows", 0) or 0),
     }
-    return {"prices": prices, "data": data, "feat_cols": feat_cols,
+    return {"prices": prices, "dataset": dataset, "feat_cols": feat_cols,
             "oos": oos, "scores": scores, "importance": imp,
             "missing": missing, "ret_stats": ret_stats,
             "spot_used": spot_used, "spot_data": merged_spot,
             "spot_status": spot_status, "profile": profile,
-            "model_info": model_info}
+            "model_info": model_info, "metrics_base": base_metrics,
+            "model_key": model_key, "timings": prof.to_dict()}
+
+
+# ──────────────────────────────────────────────────────────────
+# 백그라운드 학습 워커 · 버전 아티팩트
+# ──────────────────────────────────────────────────────────────
+def _profile_dir(horizon: int, period: str) -> str:
+    return os.path.join(ARTIFACT_DIR, f"h{int(horizon)}-{period}")
+
+
+@contextmanager
+def _file_lock(path: str, wait: float = 0.0):
+    """프로세스 간 배타 잠금. 이미 잡혀 있으면 최대 wait초 기다린 뒤에도
+    못 잡으면 False를 내준다(기본은 기다리지 않음)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fh = open(path, "a+")
+    acquired = False
+    deadline = time.monotonic() + wait
+    try:
+        while True:
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+            except OSError:
+                acquired = False
+            if acquired or time.monotonic() >= deadline:
+                break
+            time.sleep(0.2)
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            except OSError:
+                pass
+        fh.close()
+
+
+def publish_artifact(out: dict, horizon: int, period: str) -> str:
+    """run_pipeline 결과를 버전 파일로 쓰고 LATEST 포인터를 원자적으로 교체한다."""
+    folder = _profile_dir(horizon, period)
+    os.makedirs(folder, exist_ok=True)
+    created = time.time()
+    name = (time.strftime("%Y%m%dT%H%M%S", time.gmtime(created))
+            + f"{int(created * 1e6) % 1_000_000:06d}Z.pkl")
+    path = os.path.join(folder, name)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as fh:
+        pickle.dump(out, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    pointer = {"file": name, "created_at": created, "version": VERSION,
+               "horizon": int(horizon), "period": period}
+    ptr = os.path.join(folder, "LATEST.json")
+    with open(f"{ptr}.tmp-{os.getpid()}", "w", encoding="utf-8") as fh:
+        json.dump(pointer, fh)
+    os.replace(f"{ptr}.tmp-{os.getpid()}", ptr)
+    for old in sorted(f for f in os.listdir(folder) if f.endswith(".pkl"))[:-ARTIFACT_KEEP]:
+        try:
+            os.remove(os.path.join(folder, old))
+        except OSError:
+            pass
+    return path
+
+
+def latest_artifact_info(horizon: int, period: str,
+                         max_age: float | None = None) -> dict | None:
+    """LATEST 포인터를 읽는다. 버전이 다르거나 max_age보다 오래되면 None."""
+    ptr = os.path.join(_profile_dir(horizon, period), "LATEST.json")
+    try:
+        with open(ptr, encoding="utf-8") as fh:
+            info = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if info.get("version") != VERSION:
+        return None
+    if max_age is not None and time.time() - float(info.get("created_at", 0)) > max_age:
+        return None
+    info["path"] = os.path.join(_profile_dir(horizon, period), info["file"])
+    return info if os.path.exists(info["path"]) else None
+
+
+def load_artifact(path: str) -> dict:
+    with open(path, "rb") as fh:
+        return pickle.load(fh)
+
+
+def train_profiles() -> list[tuple[int, str]]:
+    """MEMORY_TRAIN_PROFILES="20:10y,10:3y" 형식. 비우면 모든 지평×기간."""
+    raw = os.getenv("MEMORY_TRAIN_PROFILES", "").strip()
+    if not raw:
+        return [(h, p) for p in PERIOD_PROFILES for h in HORIZON_OPTIONS]
+    out = []
+    for item in raw.split(","):
+        h, _, p = item.strip().partition(":")
+        if h.isdigit() and p in PERIOD_PROFILES:
+            out.append((int(h), p))
+    return out
+
+
+def train_worker(profiles: list[tuple[int, str]] | None = None,
+                 interval: int = TRAIN_INTERVAL_SEC, once: bool = False,
+                 after_cycle=None) -> None:
+    """요청 경로와 분리된 주기적 재학습 루프.
+
+    프로필마다 파일 잠금을 잡은 워커 하나만 학습하므로 워커를 여러 개 띄워도
+    같은 프로필을 중복 학습하지 않는다. 실패한 프로필은 직전 아티팩트를 유지한다.
+    """
+    profiles = profiles or train_profiles()
+    while True:
+        started = time.time()
+        try:
+            fetch_auto_spot_prices()
+        except Exception as e:  # noqa: BLE001 — 현물가 저장소의 마지막 값으로 학습한다
+            log.warning("[train] 현물가 갱신 실패 (%s) — 저장된 값 사용", e)
+        for horizon, period in profiles:
+            lock = os.path.join(_profile_dir(horizon, period), ".train.lock")
+            with _file_lock(lock) as acquired:
+                if not acquired:
+                    log.info("[train] h%s-%s: 다른 워커가 학습 중 — 건너뜀", horizon, period)
+                    continue
+                t0 = time.time()
+                try:
+                    out = run_pipeline(horizon, period)
+                    path = publish_artifact(out, horizon, period)
+                    log.info("[train] h%s-%s: %.0fs → %s", horizon, period,
+                             time.time() - t0, path)
+                except Exception as e:  # noqa: BLE001
+                    log.warning("[train] h%s-%s: 실패 (%s) — 직전 아티팩트 유지",
+                                horizon, period, e)
+        if after_cycle is not None:
+            try:
+                after_cycle()
+            except Exception as e:  # noqa: BLE001 — 게시 실패로 워커가 멈추지 않게
+                log.warning("[train] 주기 후 작업 실패 (%s)", e)
+        if once:
+            return
+        time.sleep(max(0.0, interval - (time.time() - started)))
+
+
+# ──────────────────────────────────────────────────────────────
+# 게시 번들 (streamlit_app.py 뷰어용 published_data)
+# ──────────────────────────────────────────────────────────────
+def _plain_json(obj):
+    """numpy·Timestamp·NaN을 JSON 표준 값으로 바꾼다 (NaN/inf → null)."""
+    if isinstance(obj, dict):
+        return {str(k): _plain_json(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain_json(v) for v in obj]
+    if isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return None if pd.isna(obj) else pd.Timestamp(obj).isoformat()
+    if isinstance(obj, (np.bool_, bool)):
+        return bool(obj)
+    if isinstance(obj, (np.integer, int)):
+        return int(obj)
+    if isinstance(obj, (np.floating, float)):
+        return float(obj) if np.isfinite(obj) else None
+    return obj
+
+
+def _json_payload(obj) -> bytes:
+    return json.dumps(_plain_json(obj), ensure_ascii=False, indent=1,
+                      sort_keys=True).encode("utf-8")
+
+
+def _csv_payload(df: pd.DataFrame, compress: bool = False) -> bytes:
+    raw = df.to_csv(index=False, float_format="%.10g",
+                    date_format="%Y-%m-%d").encode("utf-8")
+    # mtime=0: 내용이 같으면 gzip 바이트도 같아야 변경 여부를 해시로 판단할 수 있다.
+    return gzip.compress(raw, compresslevel=6, mtime=0) if compress else raw
+
+
+def _arrow_payload(df: pd.DataFrame) -> bytes | None:
+    """Feather v2(Arrow IPC, 비압축) 바이트. 뷰어가 memory_map으로 바로 연다.
+
+    실수는 float32, 날짜는 timestamp, 문자열 범주는 dictionary로 저장해
+    CSV 파싱·to_datetime 변환을 없앤다. pyarrow가 없으면 None.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    frame = df.copy()
+    for col in frame.columns:
+        if pd.api.types.is_float_dtype(frame[col]):
+            frame[col] = frame[col].astype(np.float32)
+        elif frame[col].dtype == object and col != "date":
+            frame[col] = frame[col].astype("category")
+    sink = pa.BufferOutputStream()
+    feather.write_feather(pa.Table.from_pandas(frame, preserve_index=False),
+                          sink, compression="uncompressed")
+    return sink.getvalue().to_pybytes()
+
+
+def _table_file(stem: str, df: pd.DataFrame, csv_name: str
+                ) -> tuple[str, bytes]:
+    """큰 표는 Arrow로, pyarrow가 없으면 기존 CSV 이름 그대로 게시한다."""
+    payload = _arrow_payload(df)
+    if payload is not None:
+        return f"{stem}.arrow", payload
+    return csv_name, _csv_payload(df, compress=csv_name.endswith(".gz"))
+
+
+def _write_if_changed(path: str, payload: bytes) -> bool:
+    try:
+        with open(path, "rb") as fh:
+            if fh.read() == payload:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as fh:
+        fh.write(payload)
+    os.replace(tmp, path)
+    return True
+
+
+def chart_series(bars: pd.DataFrame, score_history: pd.DataFrame | None = None,
+                 window: int = PUBLISH_CHART_BARS) -> pd.DataFrame:
+    """뷰어 technical_figure가 그대로 그리는 차트 시계열.
+
+    이동평균·EMA·RSI를 게시된 전체 가격 이력에서 계산한 뒤 표시 구간만 남기므로
+    창 앞부분도 결측 없이 이어진다. OOS 점수는 같은 날짜에 붙인다.
+    """
+    close = bars["Close"].astype(float)
+    macd = ema(close, 12) - ema(close, 26)
+    signal = ema(macd, 9)
+    frame = bars[["Open", "High", "Low", "Close"]].astype(float).assign(
+        ma20=close.rolling(20).mean(), ma60=close.rolling(60).mean(),
+        ma120=close.rolling(120).mean(), rsi14=rsi(close, 14),
+        macd=macd, signal=signal, hist=macd - signal)
+    frame["score"] = np.nan
+    if score_history is not None and not score_history.empty:
+        sh = score_history.drop_duplicates("date", keep="last").set_index("date")
+        frame["score"] = sh["score"].reindex(frame.index).to_numpy(dtype=float)
+    return frame.tail(window).rename_axis("date").reset_index()
+
+
+def build_publish_files(out: dict, horizon: int, thr: int = 55
+                        ) -> tuple[dict[str, bytes], dict]:
+    """run_pipeline 결과를 뷰어 스키마의 파일 바이트와 manifest 본문으로 변환."""
+    prices, oos, scores = out["prices"], out["oos"], out["scores"]
+    data = out["dataset"].frame()
+    metrics = threshold_metrics(out.get("metrics_base") or metrics_base(oos, horizon),
+                                thr)
+    rel = reliability_summary(metrics)
+    plans: dict[str, dict] = {}
+    board = []
+    if not scores.empty:
+        smap = scores.set_index("ticker")
+        for sym in [s for s in TICKERS if s in smap.index and s in prices]:
+            raw_score = float(smap.loc[sym, "score"])
+            evidence = score_evidence(oos, sym, raw_score, horizon=horizon)
+            p = make_action_plan(
+                prices[sym], raw_score, out["ret_stats"].get(sym), horizon, thr,
+                ticker_currency(sym), quality=rel.get("quality", 0.35),
+                evidence=evidence)
+            plans[sym] = p
+            mine = data[data["ticker"] == sym].sort_values("date")
+            reasons = plain_reasons(sym, mine.iloc[-1]) if len(mine) else []
+            board.append({
+                "종목": TICKERS[sym], "행동": f"{p['emoji']} {p['label']}",
+                "상승확률": p["score"] / 100.0, "실행점수": round(p["decision_score"], 1),
+                "유사점수_실제상승률": evidence.get("rate") if evidence.get("n") else np.nan,
+                "유사점수_표본수": int(evidence.get("n", 0) or 0),
+                "예상수익률": p["er"], "현재가": p["price"], "매수기준": p["buy"],
+                "목표가": p["target"], "예상하단": p["t_lo"], "예상상단": p["t_hi"],
+                "손절가": p["stop"],
+                "핵심근거": " · ".join(reasons) if reasons else p["why_short"],
+                "통화": p["ccy"],
+            })
+
+    files: dict[str, bytes] = {
+        "plans.json": _json_payload(plans),
+        "reliability.json": _json_payload(rel),
+        "model_info.json": _json_payload(out["model_info"]),
+        "spot_status.json": _json_payload(out["spot_status"]),
+        "decision_board.csv": _csv_payload(pd.DataFrame(board)),
+        "scores.csv": _csv_payload(scores),
+        "spot_prices.csv": _csv_payload(out["spot_data"]),
+    }
+    tables: dict[str, str] = {}
+    name, files[name] = _table_file("oos", oos, "oos.csv.gz")
+    tables["oos"] = name
+    summary = {k: v for k, v in (metrics or {}).items()
+               if not isinstance(v, pd.DataFrame)}
+    files["metrics_summary.json"] = _json_payload(summary)
+    if metrics is not None:
+        files["metrics_per_ticker.csv"] = _csv_payload(
+            metrics["per_ticker"].rename_axis("ticker").reset_index())
+        files["calibration.csv"] = _csv_payload(
+            metrics["calibration"].reset_index(drop=True))
+        name, files[name] = _table_file(
+            "rolling_accuracy", metrics["rolling"], "rolling_accuracy.csv")
+        tables["rolling"] = name
+    imp = out["importance"]
+    if imp is not None:
+        files["feature_importance.csv"] = _csv_payload(
+            imp.rename_axis("feature").rename("importance").reset_index())
+
+    curves, equity_stats = equity_grid(oos, horizon, PUBLISH_EQUITY_THRESHOLDS,
+                                       PUBLISH_EQUITY_COSTS)
+    if not curves.empty:
+        name, files[name] = _table_file("equity_curves", curves,
+                                        "equity_curves.csv.gz")
+        tables["equity"] = name
+        name, files[name] = _table_file("equity_stats", equity_stats,
+                                        "equity_stats.csv")
+        tables["equity_stats"] = name
+
+    ticker_files: dict[str, str] = {}
+    chart_files: dict[str, str] = {}
+    quotes: dict[str, dict] = {}
+    for sym in [s for s in TICKERS if s in prices]:
+        tail = prices[sym].tail(PUBLISH_PRICE_BARS)
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", sym)
+        name, files[name] = _table_file(
+            f"prices/{safe}", tail.rename_axis("date").reset_index(),
+            f"prices/{safe}.csv.gz")
+        ticker_files[sym] = name
+        chart = chart_series(tail, oos[oos["ticker"] == sym])
+        name, files[name] = _table_file(f"charts/{safe}", chart,
+                                        f"charts/{safe}.csv.gz")
+        chart_files[sym] = name
+    for sym in [*TICKERS, "KRW=X", "JPY=X"]:
+        if sym in prices and not prices[sym].empty:
+            quotes[sym] = {"close": float(prices[sym]["Close"].iloc[-1]),
+                           "date": prices[sym].index[-1]}
+
+    manifest = {
+        "schema_version": PUBLISH_SCHEMA, "engine_version": VERSION,
+        # 1: gzip CSV, 2: Arrow 표, 3: 세대 디렉터리(data_dir) 아래 게시
+        "format_version": 3,
+        "tables": tables,
+        "latest_market_date": (pd.to_datetime(scores["date"]).max()
+                               if not scores.empty else None),
+        "oos_rows": int(len(oos)), "horizon": int(horizon), "threshold": int(thr),
+        "feature_count": len(out["feat_cols"]),
+        "wf_step": int(out["profile"]["wf_step"]),
+        "ticker_names": dict(TICKERS), "ticker_files": ticker_files,
+        "chart_files": chart_files,
+        "equity_grid": {"thresholds": list(PUBLISH_EQUITY_THRESHOLDS),
+                        "costs": list(PUBLISH_EQUITY_COSTS)},
+        "latest_quotes": quotes,
+    }
+    return files, manifest
+
+
+_GENERATION_RE = re.compile(r"[0-9a-f]{16}")
+
+
+def _publish_generation(out_dir: str, generation: str, files: dict[str, bytes],
+                        manifest: dict) -> list[str]:
+    """세대 디렉터리를 통째로 쓰고 manifest.json 교체로 전환한 뒤 옛 세대를 지운다.
+
+    out_dir/<generation>/은 임시 디렉터리에 모두 쓴 뒤 이름을 바꿔 만들므로
+    반쯤 쓰인 세대가 보이지 않는다. 직전 세대와 바이트가 같은 파일은 하드링크로
+    재사용한다. 전환 전에 중단되면 옛 manifest와 옛 세대가 그대로 남는다.
+    전환 뒤에는 현재·직전 세대(읽는 중인 뷰어용)를 빼고 세대 이름 형식의
+    디렉터리만 지운다. 돌려주는 값은 직전 세대와 내용이 달라진 파일 이름.
+    """
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    try:
+        with open(manifest_path, encoding="utf-8") as fh:
+            previous = json.load(fh)
+    except (OSError, ValueError):
+        previous = {}
+    prev_dir = str(previous.get("data_dir") or "")
+    prev_hashes = previous.get("files", {}) if prev_dir else {}
+    hashes = {name: hashlib.sha256(files[name]).hexdigest()[:16] for name in files}
+
+    gen_dir = os.path.join(out_dir, generation)
+    if not os.path.isdir(gen_dir):
+        tmp = os.path.join(out_dir, f".tmp-{generation}-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        for name, payload in files.items():
+            path = os.path.join(tmp, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if prev_hashes.get(name) == hashes[name]:
+                try:
+                    os.link(os.path.join(out_dir, prev_dir, name), path)
+                    continue
+                except OSError:
+                    pass
+            with open(path, "wb") as fh:
+                fh.write(payload)
+        try:
+            os.replace(tmp, gen_dir)
+        except OSError:
+            if not os.path.isdir(gen_dir):   # 같은 세대를 다른 게시가 먼저 만든 경우만 허용
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    manifest = {**manifest, "generation_id": generation, "data_dir": generation,
+                "files": {name: hashes[name] for name in sorted(files)}}
+    _write_if_changed(manifest_path, _json_payload(manifest))
+
+    keep = {generation, prev_dir}
+    now = time.time()
+    for entry in os.listdir(out_dir):
+        path = os.path.join(out_dir, entry)
+        if entry in keep or not os.path.isdir(path):
+            continue
+        stale_tmp = (entry.startswith(".tmp-")
+                     and now - os.path.getmtime(path) > 3600)
+        if _GENERATION_RE.fullmatch(entry) or stale_tmp:
+            shutil.rmtree(path, ignore_errors=True)
+    return [name for name in sorted(files) if prev_hashes.get(name) != hashes[name]]
+
+
+def publish_bundle(out: dict, horizon: int, period: str, thr: int = 55,
+                   cost_bps: int = DEFAULT_COST_BPS,
+                   out_dir: str = PUBLISH_DIR) -> dict:
+    """published_data에 세대 하나를 원자적으로 게시한다.
+
+    generation_id는 전체 내용의 해시라 같은 결과를 다시 게시하면 같은 세대
+    디렉터리를 재사용하고 뷰어의 load_bundle 캐시도 무효화되지 않는다.
+    세대 쓰기·전환·정리는 _publish_generation 참고.
+    """
+    files, manifest = build_publish_files(out, horizon, thr)
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(name.encode("utf-8") + b"\0" + files[name])
+    digest.update(_json_payload({"period": period, "cost_bps": int(cost_bps)}))
+    generation = digest.hexdigest()[:16]
+    manifest.update({
+        "generated_at_utc": pd.Timestamp.now(tz="UTC"),
+        "period": period, "cost_bps": int(cost_bps),
+    })
+    os.makedirs(out_dir, exist_ok=True)
+    changed = _publish_generation(out_dir, generation, files, manifest)
+    return {"generation_id": generation, "changed": changed, "files": len(files)}
 
 
 # ──────────────────────────────────────────────────────────────
@@ -2498,7 +4863,7 @@ def main():
 
     with st.sidebar:
         st.header("분석 설정")
-        horizon = st.selectbox("예측 지평", [10, 20, 40], index=1,
+        horizon = st.selectbox("예측 지평", list(HORIZON_OPTIONS), index=1,
                                format_func=lambda x: f"{x}거래일")
         thr = st.slider("행동 신호 기준", 52, 70, 55,
                         help="검증력으로 축소한 실행점수가 이 값 이상이면 매수 우위입니다.")
@@ -2526,19 +4891,77 @@ def main():
         st.caption("공개 배포 안전 기본값: 사용자 입력은 세션 격리 · XSRF/CORS 보호 · "
                    "공개 현물가 캐시만 공유")
 
-    run_cached = st.cache_data(
-        ttl=3600, show_spinner="DRAM·NAND 현물가와 워크포워드 모델을 계산 중..."
-    )(run_pipeline)
+    # 계층별 캐시: 현물가 보정은 spot 계층만 무효화하고, 피처 해시(digest)가
+    # 그대로면 모델 계층도 재사용한다. 가격은 즉시 새로고침(토큰)으로만 다시 받는다.
+    prices_cached = st.cache_data(
+        ttl=3600, max_entries=len(PERIOD_PROFILES),
+        show_spinner="주가 데이터를 불러오는 중...")(prices_layer)
+    spot_cached = st.cache_data(
+        ttl=3600, max_entries=16,
+        show_spinner="DRAM·NAND 현물가 피처를 계산 중...")(spot_layer)
+    # 모델 계층·아티팩트는 세션 간 공유 저장소(메모리 예산 LRU, 읽기 전용 공유):
+    # 같은 입력 내용이면 토큰이 달라도 한 번만 계산하고 매 rerun 복사하지 않는다.
+    registry = st.cache_resource(pipeline_registry)()
+
+    def base_shared(price_digest: str, prices_now: dict) -> pd.DataFrame:
+        # 기본 피처(밀집 float64)도 같은 저장소에 읽기 전용으로 둔다. cache_data는
+        # 읽을 때마다 pickle 복사하고, float32 압축본은 ret20 반올림이 현물가
+        # 교차 피처로 번져 워커·CLI와 모델 입력(모델 캐시 키)이 달라진다.
+        return registry.get_or_compute(
+            f"base:h{horizon}-{price_digest}",
+            lambda: freeze_result({"base": base_layer(
+                horizon, price_digest, prices_now)}))["base"]
+    # 현물가는 백그라운드 스레드가 갱신하고, 화면은 마지막 스냅샷을 바로 쓴다.
+    spot_refresher = st.cache_resource(start_spot_refresher)()
+    # 수동 현물가 보정·즉시 새로고침이 없으면 워커가 만든 최신 아티팩트만 읽는다.
+    manual_spot = st.session_state.spot_df.drop(columns="날짜", errors="ignore")
+    artifact = None
+    if st.session_state.refresh_token == 0 and not manual_spot.notna().any().any():
+        artifact = latest_artifact_info(horizon, period,
+                                        max_age=3 * TRAIN_INTERVAL_SEC)
     try:
-        out = run_cached(horizon, period, st.session_state.spot_df,
-                         st.session_state.refresh_token)
+        if artifact is not None:
+            out = registry.get(f"artifact:{artifact['path']}")
+            if out is None:
+                with st.spinner("사전 학습된 결과를 불러오는 중..."):
+                    out = registry.get_or_compute(
+                        f"artifact:{artifact['path']}",
+                        lambda: freeze_result(load_artifact(artifact["path"])))
+        else:
+            token = st.session_state.refresh_token
+            price_pack = prices_cached(period, token)
+            prices_now = price_pack["prices"]
+            auto_spot, auto_status = spot_refresher.snapshot()
+            spot_now = spot_cached(period, price_pack["digest"], token,
+                                   st.session_state.spot_df,
+                                   auto_spot, _prices=prices_now)
+            spot_now["status"] = auto_status
+            key = pipeline_key(horizon, period, price_pack["digest"],
+                               spot_now["digest"])
+            out = registry.get(key)
+            if out is None:
+                with st.spinner("워크포워드 모델을 계산 중..."):
+                    out = registry.get_or_compute(key, lambda: freeze_result(run_pipeline(
+                        horizon, period, layers={
+                            "prices": lambda: prices_now,
+                            "spot": lambda: spot_now,
+                            "base": lambda: base_shared(
+                                price_pack["digest"], prices_now)})))
+            # 피처에 영향 없는 보정이면 모델은 재사용하되 표시용 현물가는 최신 병합본.
+            out = {**out, "spot_data": spot_now["merged"],
+                   "spot_status": spot_now["status"]}
     except Exception as e:
         st.error(f"데이터 준비 실패: {e}")
         st.info("네트워크·티커 상태를 확인한 뒤 사이드바의 새로고침을 눌러보세요.")
         st.stop()
 
     prices, oos, scores = out["prices"], out["oos"], out["scores"]
-    metrics = compute_metrics(oos, thr=thr, horizon=horizon)
+    dataset = out["dataset"]
+    data = dataset.frame()
+    data_mem = dataset.memory_report()
+    base_metrics = (out["metrics_base"] if "metrics_base" in out
+                    else metrics_base(oos, horizon))
+    metrics = threshold_metrics(base_metrics, thr)
     rel = reliability_summary(metrics)
     plans: dict[str, dict] = {}
     avail: list[str] = []
@@ -2570,7 +4993,13 @@ def main():
     st.caption(f"기술·거시·상대강도 포함 {len(out['feat_cols'])}개 유효 피처 · "
                f"완전 OOS 예측 {len(oos):,}건 · "
                f"최근가중 반감기 {out['profile']['recency_half_life']}거래일 · "
-               f"워크포워드 재학습 {out['profile']['wf_step']}거래일 간격")
+               f"워크포워드 재학습 {out['profile']['wf_step']}거래일 간격 · "
+               f"캐시 데이터셋 {data_mem['compact_mb']:.1f}MB "
+               f"(원본 {data_mem['dense_mb']:.1f}MB 대비 {data_mem['saved_mb']:.1f}MB 절감)")
+    if artifact is not None:
+        built = pd.Timestamp(artifact["created_at"], unit="s", tz="UTC")
+        st.caption(f"백그라운드 워커가 {built.strftime('%Y-%m-%d %H:%M')} UTC에 "
+                   "학습한 결과입니다. 현물가를 수동 보정하거나 새로고침하면 즉시 재계산합니다.")
 
     if out["missing"]:
         names = {**TICKERS, **MACRO}
@@ -2592,7 +5021,7 @@ def main():
             board = []
             for sym in avail:
                 p, cc = plans[sym], plans[sym]["ccy"]
-                mine = out["data"][out["data"]["ticker"] == sym].sort_values("date")
+                mine = data[data["ticker"] == sym].sort_values("date")
                 reasons = plain_reasons(sym, mine.iloc[-1]) if len(mine) else []
                 ev = p["evidence"]
                 evidence_text = (f"{ev['rate']:.0%} ({ev['lo']:.0%}~{ev['hi']:.0%}, n={ev['n']})"
@@ -2812,7 +5241,7 @@ def main():
                     unsafe_allow_html=True)
         st.subheader("DRAM·NAND 현물가 자동 수집")
         st.caption(
-            "TrendForce 공개 표의 최신 Session Average를 6시간마다 갱신하고, "
+            "TrendForce 공개 표의 최신 Session Average를 백그라운드에서 6시간마다 갱신하고, "
             "공개 주간 업데이트 기사로 학습 이력을 자동 백필합니다. "
             "현물가는 게시 다음 거래일부터만 모델이 보도록 지연합니다."
         )
@@ -2820,7 +5249,7 @@ def main():
         status_text = spot_status.get("message", "-")
         if spot_status.get("state") in {"live", "cached"}:
             st.success(f"자동 수집 정상 · {status_text}")
-        elif spot_status.get("state") in {"stale", "partial"}:
+        elif spot_status.get("state") in {"stale", "partial", "warming"}:
             st.warning(status_text)
         else:
             st.error(status_text)
@@ -2904,14 +5333,12 @@ def main():
                 st.session_state.spot_df = clean
                 if local_persistence_enabled():
                     save_spot_editor(clean)
-                st.session_state.refresh_token += 1
                 st.rerun()
             if sc2.button("수동 보정 초기화", use_container_width=True):
                 st.session_state.spot_df = _normalise_spot_data(None)
                 if local_persistence_enabled():
                     save_spot_editor(st.session_state.spot_df)
                 st.session_state.spot_editor_version += 1
-                st.session_state.refresh_token += 1
                 st.rerun()
 
             uploaded_spot = st.file_uploader("현물가 CSV 불러오기", type=["csv"],
@@ -2921,7 +5348,6 @@ def main():
                     loaded = pd.read_csv(io.BytesIO(uploaded_spot.getvalue()))
                     st.session_state.spot_df = _normalise_spot_data(loaded)
                     st.session_state.spot_editor_version += 1
-                    st.session_state.refresh_token += 1
                     st.rerun()
                 except Exception as e:
                     st.error(f"현물가 CSV를 읽지 못했습니다: {e}")
@@ -2999,7 +5425,7 @@ def main():
         with st.expander("현재 지표 스냅샷"):
             snap_pick = st.selectbox("종목", [s for s in TICKERS if s in prices],
                                      key="snap_pick", format_func=lambda s: TICKERS[s])
-            mine = out["data"][out["data"]["ticker"] == snap_pick]
+            mine = data[data["ticker"] == snap_pick]
             if not mine.empty:
                 last = mine.sort_values("date").iloc[-1]
                 rows = []
@@ -3010,6 +5436,26 @@ def main():
                                      "현재값": round(feat_display_value(col, last[col]), 5),
                                      "역사적 백분위": f"{(histv < last[col]).mean():.0%}"})
                 st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        timings = out.get("timings")
+        if timings:
+            with st.expander(f"⏱ 실행 계측 · 총 {timings['total_wall_s']:.1f}초"):
+                stage_df = pd.DataFrame(timings["stages"])
+                st.dataframe(stage_df, use_container_width=True, hide_index=True)
+                if timings["models"]:
+                    st.dataframe(pd.DataFrame(timings["models"]).T.rename_axis("모델"),
+                                 use_container_width=True)
+                process_peak = timings.get("process_peak_rss_mb",
+                                           timings.get("peak_rss_mb"))
+                st.caption(f"워크포워드 fold {len(timings['folds'])}개 · 프로세스 최대 RSS "
+                           f"{process_peak or 0:,.0f}MB · 캐시/아티팩트 결과는 "
+                           "계산 당시의 계측입니다.")
+                mem = registry.memory_report()
+                st.caption(f"공유 결과 캐시 {mem['entries']}개 · {mem['mb']:,.0f}/"
+                           f"{mem['budget_mb'] or 0:,.0f}MB · 적중 {mem['hits']} · "
+                           f"대기 공유 {mem['waits']} · 내보냄 {mem['evictions']}")
+                st.download_button("계측 JSON 내려받기", profile_json(timings),
+                                   file_name="pipeline_timings.json",
+                                   mime="application/json")
         st.warning("이 모델은 가격·기술적 지표·거시·자동 DRAM/NAND 현물가를 사용합니다. "
                    "실적 컨센서스 변경, 공급계약, "
                    "CAPEX, 재고, 지정학적 사건을 자동으로 읽지 않으므로 최종 투자결정을 "
@@ -3022,5 +5468,48 @@ def main():
                "책임은 사용자에게 있습니다.")
 
 
+def _cli(argv: list[str]) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="학습 워커 · 뷰어 게시 도구")
+    ap.add_argument("--train-worker", action="store_true")
+    ap.add_argument("--once", action="store_true")
+    ap.add_argument("--publish", action="store_true")
+    ap.add_argument("--horizon", type=int, default=DEFAULT_HORIZON)
+    ap.add_argument("--period", default=DEFAULT_PERIOD, choices=list(PERIOD_PROFILES))
+    ap.add_argument("--threshold", type=int, default=55)
+    ap.add_argument("--cost-bps", type=int, default=DEFAULT_COST_BPS)
+    ap.add_argument("--out", default=PUBLISH_DIR)
+    ap.add_argument("--timings", metavar="PATH",
+                    help="게시에 쓴 파이프라인 계측을 JSON으로 저장")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    def publish(from_artifact: bool = False) -> None:
+        info = latest_artifact_info(args.horizon, args.period) if from_artifact else None
+        if info is None:
+            # 화면과 달리 CLI는 TTL이 지났으면 받고, 다른 갱신이 돌고 있으면 끝나길 기다린다
+            fetch_auto_spot_prices(wait=SPOT_REFRESH_WAIT_SEC)
+        out = (load_artifact(info["path"]) if info is not None
+               else run_pipeline(args.horizon, args.period))
+        res = publish_bundle(out, args.horizon, args.period, args.threshold,
+                             args.cost_bps, args.out)
+        if args.timings and out.get("timings"):
+            with open(args.timings, "w", encoding="utf-8") as fh:
+                fh.write(profile_json(out["timings"]))
+        log.info("[publish] %s · 변경 %d/%d개 → %s", res["generation_id"],
+                 len(res["changed"]), res["files"], args.out)
+
+    if args.train_worker:
+        # 워커와 함께 쓰면 매 주기 끝에 방금 만든 아티팩트를 다시 학습 없이 게시한다.
+        train_worker(once=args.once, after_cycle=(
+            (lambda: publish(from_artifact=True)) if args.publish else None))
+    elif args.publish:
+        publish()
+
+
 if __name__ == "__main__":
-    main()
+    if {"--train-worker", "--publish"} & set(sys.argv[1:]):
+        _cli(sys.argv[1:])
+    else:
+        main()
@@ -21,6 +21,7 @@ from plotly.subplots import make_subplots
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "published_data"
 EXPECTED_SCHEMA = 1
+SUPPORTED_FORMAT = 3  # 1: gzip CSV, 2: Arrow(Feather v2) 표 + CSV 폴백, 3: 세대 디렉터리
 SPOT_NAMES = {
     "DRAM_DDR5_16Gb": "DRAM DDR5 16Gb",
     "DRAM_DDR4_8Gb": "DRAM DDR4 8Gb",
@@ -41,8 +42,14 @@ def read_json(path: Path, default=None):
         return {} if default is None else default
 
 
-def read_csv(name: str, **kwargs) -> pd.DataFrame:
-    path = DATA_DIR / name
+def generation_dir(generation_id: str) -> Path:
+    """manifest가 가리키는 세대 디렉터리. 예전 평면 배치면 DATA_DIR 자체."""
+    path = DATA_DIR / generation_id
+    return path if generation_id and path.is_dir() else DATA_DIR
+
+
+def read_csv(name: str, base: Path = DATA_DIR, **kwargs) -> pd.DataFrame:
+    path = base / name
     if not path.exists():
         return pd.DataFrame()
     try:
@@ -51,6 +58,20 @@ def read_csv(name: str, **kwargs) -> pd.DataFrame:
         return pd.DataFrame()
 
 
+def read_table(name: str, base: Path = DATA_DIR) -> pd.DataFrame:
+    """게시 표 하나를 읽는다. .arrow는 memory_map으로 열어 파싱 없이 변환한다."""
+    path = base / name
+    if not path.exists():
+        return pd.DataFrame()
+    try:
+        if path.suffix == ".arrow":
+            import pyarrow.feather as feather
+            return feather.read_table(path, memory_map=True).to_pandas()
+        return pd.read_csv(path)
+    except Exception:
+        return pd.DataFrame()
+
+
 def parse_date_column(frame: pd.DataFrame, column: str = "date") -> pd.DataFrame:
     if column in frame:
         frame = frame.copy()
@@ -58,37 +79,79 @@ def parse_date_column(frame: pd.DataFrame, column: str = "date") -> pd.DataFrame
     return frame
 
 
+# 섹션별 로더: 모두 generation_id를 캐시 키로 받아 새 게시 때만 다시 읽고,
+# 해당 화면을 처음 열 때만 호출된다. 파일은 그 세대 디렉터리에서만 읽는다.
 @st.cache_data(show_spinner=False)
-def load_bundle(generation_id: str) -> dict:
-    del generation_id  # 캐시 무효화 키
-    manifest = read_json(DATA_DIR / "manifest.json")
-    prices = {}
-    for ticker, relative in manifest.get("ticker_files", {}).items():
-        path = DATA_DIR / relative
-        if not path.exists():
-            continue
-        try:
-            frame = pd.read_csv(path, compression="gzip")
-            frame = parse_date_column(frame)
-            prices[ticker] = frame.dropna(subset=["date"]).sort_values("date")
-        except Exception:
-            continue
+def load_core(generation_id: str) -> dict:
+    base = generation_dir(generation_id)
+    return {
+        "plans": read_json(base / "plans.json"),
+        "metrics": read_json(base / "metrics_summary.json"),
+        "reliability": read_json(base / "reliability.json"),
+        "board": read_csv("decision_board.csv", base),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_price(generation_id: str, relative: str) -> pd.DataFrame:
+    frame = parse_date_column(read_table(relative, generation_dir(generation_id)))
+    if "date" not in frame:
+        return pd.DataFrame()
+    return frame.dropna(subset=["date"]).sort_values("date")
+
+
+@st.cache_data(show_spinner=False)
+def load_oos(generation_id: str, relative: str) -> pd.DataFrame:
+    return parse_date_column(read_table(relative, generation_dir(generation_id)))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_chart(generation_id: str, relative: str) -> pd.DataFrame:
+    return parse_date_column(read_table(relative, generation_dir(generation_id)))
+
+
+@st.cache_data(show_spinner=False)
+def load_equity(generation_id: str, curves: str, stats: str) -> dict:
+    """게시된 백테스트 그리드를 (종목, 기준점수, 비용) 키로 한 번만 나눠 둔다."""
+    base = generation_dir(generation_id)
+    frame = parse_date_column(read_table(curves, base))
+    table = read_table(stats, base)
+    if frame.empty or table.empty:
+        return {}
+    keys = ["ticker", "threshold", "cost_bps"]
+    return {
+        "curves": {(str(t), int(h), int(c)): g.drop(columns=keys).reset_index(drop=True)
+                   for (t, h, c), g in frame.groupby(keys, observed=True, sort=False)},
+        "stats": {(str(r.ticker), int(r.threshold), int(r.cost_bps)): r._asdict()
+                  for r in table.itertuples(index=False)},
+    }
+
+
+@st.cache_data(show_spinner=False)
+def load_validation(generation_id: str, rolling: str) -> dict:
+    base = generation_dir(generation_id)
+    return {
+        "per_ticker": read_csv("metrics_per_ticker.csv", base),
+        "calibration": read_csv("calibration.csv", base),
+        "rolling": parse_date_column(read_table(rolling, base)),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def load_spot(generation_id: str) -> dict:
+    base = generation_dir(generation_id)
+    return {
+        "spot_status": read_json(base / "spot_status.json"),
+        "spot": parse_date_column(read_csv("spot_prices.csv", base), "날짜"),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def load_model(generation_id: str) -> dict:
+    base = generation_dir(generation_id)
     return {
-        "manifest": manifest,
-        "plans": read_json(DATA_DIR / "plans.json"),
-        "metrics": read_json(DATA_DIR / "metrics_summary.json"),
-        "reliability": read_json(DATA_DIR / "reliability.json"),
-        "model_info": read_json(DATA_DIR / "model_info.json"),
-        "spot_status": read_json(DATA_DIR / "spot_status.json"),
-        "board": read_csv("decision_board.csv"),
-        "scores": parse_date_column(read_csv("scores.csv")),
-        "oos": parse_date_column(read_csv("oos.csv.gz", compression="gzip")),
-        "spot": parse_date_column(read_csv("spot_prices.csv"), "날짜"),
-        "importance": read_csv("feature_importance.csv"),
-        "per_ticker": read_csv("metrics_per_ticker.csv"),
-        "calibration": read_csv("calibration.csv"),
-        "rolling": parse_date_column(read_csv("rolling_accuracy.csv")),
-        "prices": prices,
+        "model_info": read_json(base / "model_info.json"),
+        "importance": read_csv("feature_importance.csv", base),
     }
 
 
@@ -132,13 +195,30 @@ def rsi(series: pd.Series, n: int = 14) -> pd.Series:
     return 100 - 100 / (1 + rs)
 
 
-def technical_figure(price: pd.DataFrame, score_history: pd.DataFrame):
-    data = price.tail(756).copy()
+def chart_frame(price: pd.DataFrame, score_history: pd.DataFrame,
+                window: int = 756) -> pd.DataFrame:
+    """게시본에 차트 시계열이 없을 때(이전 형식)만 쓰는 폴백 계산.
+
+    게시기의 chart_series와 같은 식이다: 전체 가격 이력에서 지표를 계산하고
+    표시 구간만 남긴 뒤 같은 날짜의 OOS 점수를 붙인다.
+    """
+    data = price.copy()
     close = pd.to_numeric(data["Close"], errors="coerce")
-    e12, e26 = ema(close, 12), ema(close, 26)
-    macd = e12 - e26
+    macd = ema(close, 12) - ema(close, 26)
     signal = ema(macd, 9)
-    hist = macd - signal
+    data = data.assign(ma20=close.rolling(20).mean(), ma60=close.rolling(60).mean(),
+                       ma120=close.rolling(120).mean(), rsi14=rsi(close, 14),
+                       macd=macd, signal=signal, hist=macd - signal)
+    data["score"] = np.nan
+    if not score_history.empty:
+        scores = score_history.drop_duplicates("date", keep="last").set_index("date")
+        data["score"] = scores["score"].reindex(data["date"]).to_numpy(dtype=float)
+    return data.tail(window).reset_index(drop=True)
+
+
+def technical_figure(data: pd.DataFrame):
+    """게시된(또는 chart_frame으로 만든) 차트 시계열을 그대로 그린다."""
+    close, macd, signal, hist = data["Close"], data["macd"], data["signal"], data["hist"]
     fig = make_subplots(
         rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.035,
         row_heights=[0.56, 0.22, 0.22],
@@ -156,15 +236,15 @@ def technical_figure(price: pd.DataFrame, score_history: pd.DataFrame):
                       row=1, col=1, secondary_y=False)
     for n, color in ((20, "#2563eb"), (60, "#f59e0b"), (120, "#7c3aed")):
         fig.add_trace(go.Scatter(
-            x=data["date"], y=close.rolling(n).mean(), name=f"MA{n}",
+            x=data["date"], y=data[f"ma{n}"], name=f"MA{n}",
             line=dict(width=1.1, color=color)), row=1, col=1, secondary_y=False)
-    if not score_history.empty:
+    scored = data.dropna(subset=["score"])
+    if not scored.empty:
         fig.add_trace(go.Scatter(
-            x=score_history["date"], y=score_history["score"], name="상승확률",
+            x=scored["date"], y=scored["score"], name="상승확률",
             line=dict(width=1.2, color="#db2777"), opacity=0.75),
             row=1, col=1, secondary_y=True)
-    rsi14 = rsi(close, 14)
-    fig.add_trace(go.Scatter(x=data["date"], y=rsi14, name="RSI(14)",
+    fig.add_trace(go.Scatter(x=data["date"], y=data["rsi14"], name="RSI(14)",
                              line=dict(color="#0f766e")), row=2, col=1)
     fig.add_hline(y=70, line_dash="dot", line_color="#ef4444", row=2, col=1)
     fig.add_hline(y=30, line_dash="dot", line_color="#2563eb", row=2, col=1)
@@ -218,22 +298,30 @@ def ladder_figure(plan: dict):
 
 def equity_curve(oos: pd.DataFrame, ticker: str, horizon: int,
                  threshold: int, cost_bps: int):
+    """게시 그리드에 없는 기준점수·비용 조합용 폴백. 엔진 equity_curve와 같은 식.
+
+    예전 뷰어 식과 두 가지가 다르다: 최소 6구간(예전 4)이 있어야 그리고,
+    −99% 하한을 비용 차감 뒤에 적용한다(예전엔 차감 전 수익률에). 그리드
+    값과 폴백 값이 같은 기준점수에서 어긋나지 않게 하려는 의도적 변경이다.
+    """
     group = oos[oos["ticker"] == ticker].dropna(subset=["fwd_ret"]).sort_values("date")
-    group = group.iloc[::max(1, horizon)].copy()
-    if len(group) < 4:
+    group = group.iloc[::max(1, horizon)]
+    if len(group) < 6:
         return None, None
-    returns = pd.to_numeric(group["fwd_ret"], errors="coerce").fillna(0).clip(lower=-0.99)
+    cost = cost_bps / 10_000.0
+    fwd = pd.to_numeric(group["fwd_ret"], errors="coerce").astype(float)
     active = pd.to_numeric(group["score"], errors="coerce") >= threshold
-    strategy = pd.Series(np.where(active, returns - cost_bps / 10_000.0, 0.0))
+    strategy = pd.Series(np.where(active, fwd - cost, 0.0)).clip(lower=-0.99)
+    benchmark = fwd.clip(lower=-0.99).reset_index(drop=True)
     curve = pd.DataFrame({
         "date": group["date"].to_numpy(),
-        "시그널 추종": (1 + strategy).cumprod(),
-        "단순 보유": (1 + returns.reset_index(drop=True)).cumprod(),
+        "시그널 추종": (1 + strategy).cumprod().to_numpy(),
+        "단순 보유": (1 + benchmark).cumprod().to_numpy(),
     })
 
     def perf(series: pd.Series):
         nav = (1 + series).cumprod()
-        total = float(nav.iloc[-1] - 1)
+        total = float(np.prod(1 + series) - 1)
         years = max(len(series) * horizon / 252.0, 1 / 252)
         cagr = (1 + total) ** (1 / years) - 1 if total > -1 else -1
         mdd = float((nav / nav.cummax() - 1).min())
@@ -241,10 +329,22 @@ def equity_curve(oos: pd.DataFrame, ticker: str, horizon: int,
         sharpe = float(series.mean() / vol * np.sqrt(252 / horizon)) if vol > 0 else np.nan
         return {"total": total, "cagr": cagr, "mdd": mdd, "sharpe": sharpe}
 
-    return curve, {"strategy": perf(strategy), "benchmark": perf(returns.reset_index(drop=True)),
+    return curve, {"strategy": perf(strategy), "benchmark": perf(benchmark),
                    "trades": int(active.sum()), "exposure": float(active.mean())}
 
 
+def published_equity(equity: dict, ticker: str, threshold: int, cost_bps: int):
+    """게시된 그리드에서 곡선·성과를 찾는다. 없으면 (None, None)."""
+    key = (ticker, int(threshold), int(cost_bps))
+    if key not in equity.get("curves", {}):
+        return None, None
+    row = equity["stats"][key]
+    stats = {side: {k: row[f"{side}_{k}"] for k in ("total", "cagr", "mdd", "sharpe")}
+             for side in ("strategy", "benchmark")}
+    stats.update(trades=int(row["trades"]), exposure=float(row["exposure"]))
+    return equity["curves"][key], stats
+
+
 def portfolio_view(manifest: dict, plans: dict, ticker_names: dict):
     if "portfolio" not in st.session_state:
         st.session_state.portfolio = pd.DataFrame([
@@ -331,16 +431,23 @@ def main():
 
     manifest = read_json(DATA_DIR / "manifest.json")
     if not manifest:
-        st.error("게시 데이터가 없습니다. 로컬에서 local_train_publish.py를 먼저 실행하세요.")
+        st.error("게시 데이터가 없습니다. 로컬에서 python memory_stock_predict_pro.py --publish를 먼저 실행하세요.")
         st.stop()
     if manifest.get("schema_version") != EXPECTED_SCHEMA:
         st.error("Cloud 앱과 게시 데이터의 스키마 버전이 맞지 않습니다.")
         st.stop()
-    bundle = load_bundle(str(manifest.get("generation_id", "unknown")))
+    if int(manifest.get("format_version", 1)) > SUPPORTED_FORMAT:
+        st.error("게시 데이터 형식이 이 앱보다 새롭습니다. 앱을 업데이트하세요.")
+        st.stop()
+    generation = str(manifest.get("generation_id", "unknown"))
+    tables = manifest.get("tables", {})
+    ticker_files = manifest.get("ticker_files", {})
+    chart_files = manifest.get("chart_files", {})
+    core = load_core(generation)
     ticker_names = manifest.get("ticker_names", {})
-    plans = bundle["plans"]
-    metrics = bundle["metrics"]
-    reliability = bundle["reliability"]
+    plans = core["plans"]
+    metrics = core["metrics"]
+    reliability = core["reliability"]
 
     st.markdown("""
     <div class="hero"><h1>Memory Stock Predict</h1>
@@ -383,15 +490,17 @@ def main():
     h4.metric("ROC-AUC", f"{finite(metrics.get('auc')):.3f}"
               if math.isfinite(finite(metrics.get("auc"))) else "-")
 
-    tab_today, tab_chart, tab_portfolio, tab_validation, tab_spot, tab_model = st.tabs([
-        "① 오늘의 결론", "② 기술적 차트", "③ 내 포트폴리오",
-        "④ 검증·백테스트", "⑤ 현물가", "⑥ 모델",
-    ])
+    # st.tabs는 모든 탭 본문을 매번 실행하므로, 선택된 섹션만 실행하는 내비게이션으로
+    # 바꿔 필요한 파일만 처음 열 때 읽는다.
+    sections = ["① 오늘의 결론", "② 기술적 차트", "③ 내 포트폴리오",
+                "④ 검증·백테스트", "⑤ 현물가", "⑥ 모델"]
+    section = st.radio("화면", sections, horizontal=True, key="section",
+                       label_visibility="collapsed")
 
-    with tab_today:
+    if section == sections[0]:
         st.subheader("오늘 무엇을 할 것인가")
         st.info(f"{reliability.get('emoji', '⚪')} {reliability.get('advice', '-')}")
-        board = bundle["board"].copy()
+        board = core["board"].copy()
         if board.empty:
             st.warning("게시된 의사결정 데이터가 없습니다.")
         else:
@@ -420,30 +529,39 @@ def main():
             c4.metric("ATR 위험폭", fmt_pct(atr_risk))
             st.plotly_chart(ladder_figure(plan), use_container_width=True)
 
-    with tab_chart:
+    elif section == sections[1]:
         st.subheader("가격·기술적 지표·과거 OOS 확률")
-        price_choices = [t for t in ticker_names if t in bundle["prices"]]
+        price_choices = [t for t in ticker_names if t in ticker_files]
         if not price_choices:
             st.info("게시된 가격 데이터가 없습니다.")
         else:
             selected = st.selectbox("차트 종목", price_choices, key="chart_ticker",
                                     format_func=lambda x: ticker_names.get(x, x))
-            history = bundle["oos"]
-            score_history = history[history["ticker"] == selected] \
-                if not history.empty and "ticker" in history else pd.DataFrame()
-            st.plotly_chart(technical_figure(bundle["prices"][selected], score_history),
-                            use_container_width=True)
-
-    with tab_portfolio:
+            chart = (load_chart(generation, chart_files[selected])
+                     if selected in chart_files else pd.DataFrame())
+            if chart.empty:
+                price = load_price(generation, ticker_files[selected])
+                history = load_oos(generation, tables.get("oos", "oos.csv.gz"))
+                score_history = history[history["ticker"] == selected] \
+                    if not history.empty and "ticker" in history else pd.DataFrame()
+                chart = chart_frame(price, score_history) if not price.empty else chart
+            if chart.empty:
+                st.info("게시된 가격 데이터가 없습니다.")
+            else:
+                st.plotly_chart(technical_figure(chart), use_container_width=True)
+
+    elif section == sections[2]:
         st.subheader("내 포트폴리오")
         st.caption("입력값은 현재 브라우저 세션에만 있으며 GitHub에 저장되지 않습니다.")
         portfolio_view(manifest, plans, ticker_names)
 
-    with tab_validation:
+    elif section == sections[3]:
         st.subheader("완전 아웃오브샘플 검증")
         if not metrics:
             st.info("검증 결과가 없습니다.")
         else:
+            validation = load_validation(
+                generation, tables.get("rolling", "rolling_accuracy.csv"))
             lo_hi = metrics.get("accuracy_ci") or [np.nan, np.nan]
             v1, v2, v3, v4, v5 = st.columns(5)
             v1.metric("방향 적중률", f"{finite(metrics.get('overall')):.1%}",
@@ -454,7 +572,7 @@ def main():
             v4.metric("Brier skill", f"{finite(metrics.get('brier_skill')):+.1%}")
             v5.metric("보정오차 ECE", f"{finite(metrics.get('ece')):.1%}")
             left, right = st.columns(2)
-            calibration = bundle["calibration"]
+            calibration = validation["calibration"]
             with left:
                 if not calibration.empty:
                     fig = go.Figure()
@@ -466,12 +584,12 @@ def main():
                                       xaxis_tickformat=".0%", yaxis_tickformat=".0%")
                     st.plotly_chart(fig, use_container_width=True)
             with right:
-                per_ticker = bundle["per_ticker"].copy()
+                per_ticker = validation["per_ticker"].copy()
                 if not per_ticker.empty:
                     per_ticker["ticker"] = per_ticker["ticker"].map(
                         lambda x: ticker_names.get(x, x))
                     st.dataframe(per_ticker, use_container_width=True, hide_index=True)
-            rolling = bundle["rolling"]
+            rolling = validation["rolling"]
             if not rolling.empty:
                 fig = go.Figure()
                 fig.add_scatter(x=rolling["date"], y=rolling["모델 적중률"], name="모델")
@@ -480,14 +598,28 @@ def main():
                 fig.update_layout(title="최근 250개 예측 이동 적중률", height=330,
                                   yaxis_tickformat=".0%")
                 st.plotly_chart(fig, use_container_width=True)
-            oos = bundle["oos"]
-            if not oos.empty:
-                bt_ticker = st.selectbox(
-                    "백테스트 종목", sorted(oos["ticker"].dropna().unique()),
+            grid = manifest.get("equity_grid", {})
+            equity = (load_equity(generation, tables["equity"], tables["equity_stats"])
+                      if {"equity", "equity_stats"} <= set(tables) else {})
+            bt_choices = sorted({key[0] for key in equity.get("curves", {})}) \
+                or [t for t in ticker_names if t in plans]
+            if bt_choices:
+                b_pick, b_thr, b_cost = st.columns([2, 2, 1])
+                bt_ticker = b_pick.selectbox(
+                    "백테스트 종목", bt_choices,
                     format_func=lambda x: ticker_names.get(x, x))
-                curve, stats = equity_curve(
-                    oos, bt_ticker, int(manifest["horizon"]),
-                    int(manifest["threshold"]), int(manifest["cost_bps"]))
+                threshold = b_thr.slider("행동 신호 기준", 52, 70,
+                                         int(manifest.get("threshold", 55)))
+                cost_bps = int(b_cost.number_input(
+                    "왕복 비용(bp)", 0, 200, int(manifest.get("cost_bps", 25)), 5))
+                curve, stats = published_equity(equity, bt_ticker, threshold, cost_bps)
+                if curve is None and not (threshold in grid.get("thresholds", [])
+                                          and cost_bps in grid.get("costs", [])):
+                    # 게시 그리드 밖의 사용자 설정만 OOS 원본으로 다시 계산한다.
+                    oos = load_oos(generation, tables.get("oos", "oos.csv.gz"))
+                    if not oos.empty:
+                        curve, stats = equity_curve(
+                            oos, bt_ticker, int(manifest["horizon"]), threshold, cost_bps)
                 if curve is not None:
                     b1, b2, b3, b4 = st.columns(4)
                     b1.metric("누적수익", fmt_pct(stats["strategy"]["total"]))
@@ -501,11 +633,12 @@ def main():
                     fig.update_layout(height=360, yaxis_title="누적 배수")
                     st.plotly_chart(fig, use_container_width=True)
 
-    with tab_spot:
+    elif section == sections[4]:
         st.subheader("DRAM·NAND 현물가")
-        status = bundle["spot_status"]
+        spot_bundle = load_spot(generation)
+        status = spot_bundle["spot_status"]
         st.caption(status.get("message", "마지막 로컬 계산 결과"))
-        spot = bundle["spot"]
+        spot = spot_bundle["spot"]
         if spot.empty:
             st.info("게시된 현물가가 없습니다.")
         else:
@@ -530,9 +663,10 @@ def main():
                                       yaxis_title="USD", hovermode="x unified")
                     box.plotly_chart(fig, use_container_width=True)
 
-    with tab_model:
+    else:
         st.subheader("최종 앙상블과 변수 중요도")
-        model_info = bundle["model_info"]
+        model_bundle = load_model(generation)
+        model_info = model_bundle["model_info"]
         weights = model_info.get("weights", {})
         losses = model_info.get("validation_losses", {})
         if weights:
@@ -543,7 +677,7 @@ def main():
             ]).sort_values("가중치", ascending=False)
             st.dataframe(model_table, use_container_width=True, hide_index=True)
             st.caption(f"확률 보정 표본 {int(model_info.get('calibration_rows', 0)):,}행")
-        importance = bundle["importance"].head(20).sort_values("importance")
+        importance = model_bundle["importance"].head(20).sort_values("importance")
         if not importance.empty:
             fig = go.Figure(go.Bar(
                 x=importance["importance"], y=importance["feature"], orientation="h"))
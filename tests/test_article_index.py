@@ -0,0 +1,76 @@
+"""공개 기사 색인: 백필 후 증분 수집은 새 기사만 받고, 파서 버전이 바뀌면 gzip 원문으로 다시 파싱한다."""
+import gzip
+import os
+import urllib.parse
+
+import pytest
+
+import memory_stock_predict_pro as m
+
+PAGE2 = urllib.parse.urljoin(m.TREND_NEWS_TAG, "page/2/")
+
+
+def _article_url(day):
+    return f"https://www.trendforce.com/news/2025/03/{day:02d}/memory-spot-price-update-{day}/"
+
+
+def _article_html(dram):
+    return ("<p>The average spot price of mainstream chips (DDR4 1Gx8 3200MT/s) "
+            f"rose to US${dram:.2f}.</p><p>512Gb TLC wafer spot price held at US$3.10.</p>")
+
+
+def _listing(days):
+    return "".join(f'<a href="{_article_url(d)}">update</a>' for d in days)
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "ARTICLE_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setenv("MEMORY_SPOT_NEWS_PAGES", "2")
+    pages = {m.TREND_NEWS_TAG: _listing([17, 10]), PAGE2: _listing([3])}
+    for day, dram in ((3, 1.50), (10, 1.55), (17, 1.60)):
+        pages[_article_url(day)] = _article_html(dram)
+    fetched = []
+
+    def http_text(url, timeout=20):
+        fetched.append(url)
+        return pages[url]
+
+    monkeypatch.setattr(m, "_http_text", http_text)
+    return pages, fetched
+
+
+def test_backfill_then_incremental_crawl(site):
+    pages, fetched = site
+    history, errors = m._trendforce_public_history()
+    assert errors == []
+    assert sorted(history["DRAM_DDR4_8Gb"]) == [1.50, 1.55, 1.60]
+    assert len(fetched) == 5                        # 목록 2쪽 + 기사 3건
+    assert m._load_article_index()["backfill_pages"] == 2
+    with open(m._article_raw_path(_article_url(3)), "rb") as fh:
+        assert gzip.decompress(fh.read()).decode() == pages[_article_url(3)]
+
+    # 새 기사 하나: 첫 목록 쪽에서 이미 본 기사가 나오므로 2쪽은 읽지 않는다
+    pages[_article_url(24)] = _article_html(1.70)
+    pages[m.TREND_NEWS_TAG] = _listing([24, 17, 10])
+    fetched.clear()
+    history, errors = m._trendforce_public_history()
+    assert errors == []
+    assert fetched == [m.TREND_NEWS_TAG, _article_url(24)]
+    assert sorted(history["DRAM_DDR4_8Gb"]) == [1.50, 1.55, 1.60, 1.70]
+
+
+def test_parser_bump_reparses_from_raw_cache(site, monkeypatch):
+    pages, fetched = site
+    m._trendforce_public_history()
+    os.remove(m._article_raw_path(_article_url(10)))   # 원문이 없는 항목 하나
+
+    monkeypatch.setattr(m, "ARTICLE_PARSER_VERSION", m.ARTICLE_PARSER_VERSION + "-next")
+    fetched.clear()
+    history, errors = m._trendforce_public_history()
+    assert errors == []
+    # 원문이 남은 기사는 네트워크 없이, 없는 기사만 다시 받는다
+    assert fetched == [m.TREND_NEWS_TAG, _article_url(10)]
+    assert sorted(history["DRAM_DDR4_8Gb"]) == [1.50, 1.55, 1.60]
+    entries = m._load_article_index()["articles"].values()
+    assert {e["parser"] for e in entries} == {m.ARTICLE_PARSER_VERSION}
@@ -0,0 +1,69 @@
+"""CompactDataset의 float32 피처 블록·메모리 절감·캐시 프레임과 학습 결과 보존을 확인한다."""
+import pickle
+
+import numpy as np
+import pytest
+
+import benchmark_pipeline as bench
+import memory_stock_predict_pro as m
+
+
+@pytest.fixture(scope="module")
+def assembled():
+    prices = bench._slice_period(bench.synthetic_prices(), "1y")
+    return m.assemble_dataset(prices, 5, spot_data=bench.synthetic_spot(),
+                              universe=dict(m.DEFAULT_TICKERS))
+
+
+def _labelled(frame):
+    return frame[frame["label_known_date"].notna() & frame["y"].notna()]
+
+
+def test_feature_block_is_float32_and_about_half_size(assembled):
+    data, feat_cols = assembled
+    dataset = m.compact_dataset(data, feat_cols)
+    assert dataset.values.dtype == np.float32
+    assert dataset.value_cols[:len(feat_cols)] == feat_cols
+    assert dataset.memory_report()["ratio"] >= 1.9
+    np.testing.assert_allclose(
+        dataset.values[:, :len(feat_cols)],
+        data[feat_cols].to_numpy(dtype=float), rtol=1e-6, atol=1e-6)
+
+
+def test_frame_is_cached_and_feature_view_shares_the_block(assembled):
+    data, feat_cols = assembled
+    dataset = m.compact_dataset(data, feat_cols)
+    frame = dataset.frame()
+    assert dataset.frame() is frame
+    assert sorted(frame.columns) == sorted(data.columns)
+    view = m.feature_view(frame, feat_cols)
+    assert list(view.columns) == feat_cols
+    assert (view.dtypes == np.float32).all()
+    assert np.shares_memory(view.to_numpy(), dataset.values)
+    # 행 부분집합에서도 같은 열을 같은 값으로 돌려준다
+    sub = frame[frame["date"] >= frame["date"].median()].sort_values("date")
+    np.testing.assert_allclose(
+        m.feature_view(sub, feat_cols).to_numpy(dtype=float),
+        data.loc[sub.index, feat_cols].to_numpy(dtype=float),
+        rtol=1e-6, atol=1e-6)
+    # 파생 프레임은 pickle에 들어가지 않는다
+    assert pickle.loads(pickle.dumps(dataset))._frame is None
+
+
+def test_training_on_float32_block_matches_dense(assembled, monkeypatch):
+    data, feat_cols = assembled
+    full = m.make_model_family
+
+    def small_family(seed=42):
+        models = full(seed)
+        models["boost_smooth"].set_params(max_iter=40)
+        return {name: models[name] for name in ("boost_smooth", "linear_shrinkage")}
+
+    monkeypatch.setattr(m, "make_model_family", small_family)
+    frame = m.compact_dataset(data, feat_cols).frame()
+    dense = m.fit_probability_model(_labelled(data), feat_cols, horizon=5)
+    compact = m.fit_probability_model(_labelled(frame), feat_cols, horizon=5)
+    p_dense = dense.predict_proba(data[feat_cols])[:, 1]
+    p_compact = compact.predict_proba(m.feature_view(frame, feat_cols))[:, 1]
+    diff = np.abs(p_dense - p_compact)
+    assert diff.mean() < 0.01 and diff.max() < 0.05
@@ -0,0 +1,82 @@
+"""학습 결과 캐시 키가 입력·프로필·모델 코드에 따라 바뀌고, 적중하면 같은 결과를 돌려주는지 확인한다."""
+import numpy as np
+import pandas as pd
+
+import memory_stock_predict_pro as m
+
+
+def _frame(seed=0, rows=300):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=rows // 2).repeat(2)
+    x = rng.normal(size=(rows, 2))
+    fwd = 0.02 * x[:, 0] + rng.normal(0, 0.02, rows)
+    return pd.DataFrame({
+        "date": dates, "ticker": np.tile(["AAA", "BBB"], rows // 2),
+        "f1": x[:, 0], "f2": x[:, 1],
+        "tk_AAA": np.tile([1, 0], rows // 2),
+        "entry_px": 100.0, "exit_px": 100.0 * (1 + fwd), "fwd_ret": fwd,
+        "y": (fwd > 0).astype(float),
+        "label_known_date": dates + pd.offsets.BDay(5),
+    })
+
+
+FEATS = ["f1", "f2", "tk_AAA"]
+PROFILE = m.PERIOD_PROFILES["1y"]
+
+
+def _key(frame=None, profile=PROFILE, horizon=5):
+    data = _frame() if frame is None else frame
+    return m.model_cache_key(m.compact_dataset(data, FEATS), FEATS, horizon, profile)
+
+
+def test_key_is_stable_and_tracks_inputs(monkeypatch):
+    key = _key()
+    assert key == _key()
+    assert _key(horizon=10) != key
+    assert _key(profile={**PROFILE, "wf_step": 5}) != key
+    assert _key(profile={**PROFILE, "label": "다른 이름"}) == key   # 표시 이름만 다름
+    changed = _frame()
+    changed.loc[10, "f1"] += 1.0
+    assert _key(changed) != key
+
+    def make_model_family(seed=42):       # 모델 코드가 바뀐 배포본
+        return {}
+
+    monkeypatch.setattr(m, "make_model_family", make_model_family)
+    assert _key() != key
+
+
+def test_saved_walk_forward_round_trips(tmp_path, monkeypatch):
+    from sklearn.linear_model import LogisticRegression
+
+    monkeypatch.setattr(m, "MODEL_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(m, "make_model_family",
+                        lambda seed=42: {"linear": LogisticRegression(max_iter=200)})
+    data = m.compact_dataset(_frame(), FEATS).frame()
+    model = m.fit_probability_model(data, FEATS, calibration_days=20,
+                                    min_calibration_rows=20, horizon=5)
+    oos = data[["date", "ticker", "y"]].assign(score=np.linspace(0, 100, len(data)))
+    key = _key()
+    assert m.load_walk_forward(key) is None
+    assert m.save_walk_forward(key, oos, model, FEATS)
+
+    loaded_oos, loaded_model = m.load_walk_forward(key)
+    pd.testing.assert_frame_equal(loaded_oos, oos)
+    view = m.feature_view(data, FEATS)
+    np.testing.assert_allclose(loaded_model.predict_proba(view),
+                               model.predict_proba(view))
+    assert m.load_walk_forward(_key(horizon=10)) is None
+
+
+def test_other_version_is_a_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "MODEL_CACHE_DIR", str(tmp_path))
+    assert m.save_walk_forward("k", pd.DataFrame(), None, FEATS)
+    assert m.load_walk_forward("k") is not None
+    monkeypatch.setattr(m, "VERSION", m.VERSION + "-next")
+    assert m.load_walk_forward("k") is None
+
+
+def test_disabled_cache_never_stores(monkeypatch):
+    monkeypatch.setattr(m, "MODEL_CACHE_DIR", "")
+    assert not m.save_walk_forward("k", pd.DataFrame(), None, FEATS)
+    assert m.load_walk_forward("k") is None
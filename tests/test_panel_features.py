@@ -0,0 +1,40 @@
+"""wide 패널 엔진이 종목별 build_ticker_features와 같은 피처를 내는지 확인한다."""
+import numpy as np
+import pandas as pd
+
+import memory_stock_predict_pro as m
+
+
+def _bars(n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2015-01-02", periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    return pd.DataFrame({
+        "Close": close, "Open": close * (1 + rng.normal(0, 0.005, n)),
+        "High": close + spread, "Low": close - spread,
+        "Volume": rng.integers(1_000, 50_000, n).astype(float),
+    }, index=idx)
+
+
+def _assert_same(got: pd.DataFrame, want: pd.DataFrame) -> None:
+    assert list(got.columns) == list(want.columns)
+    assert got.index.equals(want.index)
+    assert np.array_equal(got.isna().to_numpy(), want.isna().to_numpy())
+    np.testing.assert_allclose(got.to_numpy(), want.to_numpy(),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_panel_matches_per_ticker_on_shifted_windows():
+    full = _bars(1600)
+    revised = full.iloc[:1351].copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] *= 1.01   # 장중 미완성 봉
+    prices = {
+        "A": full.iloc[150:1350],      # 기간 창이 밀린 경우
+        "B": full.iloc[-300:],         # 짧은 이력(거래량·ATR 분기 경계 근처)
+        "C": revised,
+        "D": _bars(900, seed=7).drop(columns="Volume"),
+    }
+    panel = m.build_panel_features(prices, chunk_size=2)
+    for sym, bars in prices.items():
+        _assert_same(panel[sym], m.build_ticker_features(bars))
@@ -0,0 +1,86 @@
+"""소급 수정주가로 전체를 다시 받을 때 가격 캐시 구간이 줄지 않는지 확인한다."""
+import json
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+import memory_stock_predict_pro as m
+
+_DAYS = {"1y": 260, "5y": 1300, "max": 3000}
+
+
+def _history(rows, scale=1.0):
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=rows)
+    close = np.linspace(10, 20, rows) * scale
+    return pd.DataFrame({"Open": close, "High": close, "Low": close,
+                         "Close": close, "Volume": 1e6}, index=idx)
+
+
+def _fake_yfinance(calls):
+    def download(symbols, start=None, period=None, **kwargs):
+        calls.append(period or f"start:{start}")
+        # 배당 소급 반영: 새로 받은 종가가 모두 1% 낮다
+        bars = _history(_DAYS[period] if period else _DAYS["max"], scale=0.99)
+        if start is not None:
+            bars = bars[bars.index >= pd.Timestamp(start)]
+        return pd.concat({sym: bars for sym in symbols}, axis=1)
+    return types.SimpleNamespace(download=download)
+
+
+def test_revision_refetches_the_cached_span(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setitem(sys.modules, "yfinance", _fake_yfinance(calls))
+    monkeypatch.setattr(m, "PRICE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(m, "MACRO", {})
+    m._write_price_cache("AAA", _history(_DAYS["max"]), "max")
+    _, meta_path = m._price_cache_paths("AAA")
+    with open(meta_path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    meta["fetched_at"] = 0            # TTL 만료 → 꼬리 다운로드
+    with open(meta_path, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+
+    out = m.download_prices("1y", universe={"AAA": "A"})
+
+    assert calls[0].startswith("start:")
+    assert calls[1:] == ["max"]
+    bars, meta = m._read_price_cache("AAA")
+    assert meta["span"] == "max" and len(bars) == _DAYS["max"]
+    assert np.isclose(bars["Close"].iloc[0], 10 * 0.99)
+    assert len(out["AAA"]) < len(bars)      # 반환은 여전히 요청 기간만
+
+
+def test_tail_downloads_start_at_each_symbols_own_overlap(tmp_path, monkeypatch):
+    calls = []
+    full = _history(_DAYS["max"])
+
+    def download(symbols, start=None, period=None, **kwargs):
+        calls.append((tuple(symbols), start))
+        bars = full[full.index >= pd.Timestamp(start)]
+        return pd.concat({sym: bars for sym in symbols}, axis=1)
+
+    monkeypatch.setitem(sys.modules, "yfinance", types.SimpleNamespace(download=download))
+    monkeypatch.setattr(m, "PRICE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(m, "MACRO", {})
+    m._write_price_cache("NEW", full.iloc[:-2], "max")
+    m._write_price_cache("OLD", full.iloc[:-40], "max")
+    m._write_price_cache("OLD2", full.iloc[:-40], "max")
+    for sym in ("NEW", "OLD", "OLD2"):
+        _, meta_path = m._price_cache_paths(sym)
+        with open(meta_path, encoding="utf-8") as fh:
+            meta = json.load(fh)
+        meta["fetched_at"] = 0
+        with open(meta_path, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+
+    m.download_prices("1y", universe={"NEW": "N", "OLD": "O", "OLD2": "O"})
+
+    overlap = m.PRICE_OVERLAP_BARS
+    want = {("NEW",): full.index[-2 - overlap].strftime("%Y-%m-%d"),
+            ("OLD", "OLD2"): full.index[-40 - overlap].strftime("%Y-%m-%d")}
+    assert dict(calls) == want
+    for sym in ("NEW", "OLD", "OLD2"):
+        bars, _ = m._read_price_cache(sym)
+        pd.testing.assert_index_equal(bars.index, full.index, check_names=False)
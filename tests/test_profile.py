@@ -0,0 +1,24 @@
+"""PipelineProfile 단계 메모리 계측이 단계별 값인지 확인한다."""
+import numpy as np
+import pytest
+
+import memory_stock_predict_pro as m
+
+
+def test_stage_memory_is_per_stage():
+    if m._current_rss_mb() is None:
+        pytest.skip("현재 RSS를 읽을 수 없는 플랫폼")
+    prof = m.PipelineProfile()
+    with prof.stage("big"):
+        big = np.ones(40_000_000)
+        big += 1
+    del big
+    with prof.stage("small"):
+        small = np.ones(1_000)
+        small += 1
+    stages = {r["stage"]: r for r in prof.to_dict()["stages"]}
+    assert stages["big"]["rss_delta_mb"] > 200
+    assert stages["small"]["rss_delta_mb"] < 50
+    assert stages["small"]["new_peak_rss_mb"] is None
+    # statm과 ru_maxrss는 집계 방식이 조금 달라 여유를 둔다
+    assert prof.to_dict()["process_peak_rss_mb"] >= stages["big"]["rss_mb"] - 8
@@ -0,0 +1,54 @@
+"""게시 세대 디렉터리 전환·정리가 원자적인지 확인한다."""
+import json
+import os
+
+import pytest
+
+import memory_stock_predict_pro as m
+
+
+def _manifest(out_dir):
+    with open(os.path.join(out_dir, "manifest.json"), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _publish(out_dir, generation, files):
+    return m._publish_generation(str(out_dir), generation, files, {"schema_version": 1})
+
+
+def test_generation_swap_and_gc(tmp_path):
+    (tmp_path / "spot_prices.csv").write_text("user file")   # 세대 밖 파일
+    first = {"oos.arrow": b"a1", "prices/MU.arrow": b"p"}
+    assert _publish(tmp_path, "0" * 16, first) == sorted(first)
+    assert _manifest(tmp_path)["data_dir"] == "0" * 16
+
+    second = {"oos.csv.gz": b"a2", "prices/MU.arrow": b"p"}
+    changed = _publish(tmp_path, "1" * 16, second)
+    assert changed == ["oos.csv.gz"]
+    manifest = _manifest(tmp_path)
+    assert manifest["data_dir"] == "1" * 16
+    for name in manifest["files"]:
+        assert (tmp_path / manifest["data_dir"] / name).exists()
+    assert (tmp_path / ("0" * 16) / "oos.arrow").exists()   # 직전 세대는 유지
+    # 바뀌지 않은 파일은 직전 세대와 하드링크로 공유
+    assert os.path.samefile(tmp_path / ("0" * 16) / "prices/MU.arrow",
+                            tmp_path / ("1" * 16) / "prices/MU.arrow")
+
+    _publish(tmp_path, "2" * 16, {"oos.csv.gz": b"a3"})
+    assert not (tmp_path / ("0" * 16)).exists()
+    assert (tmp_path / ("1" * 16)).exists()
+    assert (tmp_path / "spot_prices.csv").read_text() == "user file"
+
+
+def test_crash_before_swap_keeps_previous_generation(tmp_path, monkeypatch):
+    _publish(tmp_path, "a" * 16, {"oos.arrow": b"old"})
+
+    def boom(path, payload):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(m, "_write_if_changed", boom)
+    with pytest.raises(OSError):
+        _publish(tmp_path, "b" * 16, {"oos.arrow": b"new"})
+    manifest = _manifest(tmp_path)
+    assert manifest["data_dir"] == "a" * 16
+    assert (tmp_path / ("a" * 16) / "oos.arrow").read_bytes() == b"old"
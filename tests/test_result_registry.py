@@ -0,0 +1,119 @@
+"""공유 결과 저장소의 single-flight·메모리 예산 LRU와 읽기 전용 공유를 확인한다."""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import memory_stock_predict_pro as m
+
+
+def test_concurrent_requests_compute_once():
+    registry = m.ResultRegistry()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)        # 나머지 요청이 대기열에 붙을 시간
+        return {"value": np.arange(10)}
+
+    results = [None] * 8
+
+    def request(i):
+        results[i] = registry.get_or_compute("k", compute)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert registry.stats["computes"] == 1 and registry.stats["waits"] == 7
+    assert registry.get_or_compute("k", compute) is results[0]
+    assert registry.stats["hits"] == 1
+
+
+def test_failure_reaches_waiters_and_is_not_stored():
+    registry = m.ResultRegistry()
+    release = threading.Event()
+    errors = []
+
+    def compute():
+        release.wait()
+        raise RuntimeError("boom")
+
+    def request():
+        try:
+            registry.get_or_compute("k", compute)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3 and registry.get("k") is None
+    assert registry.get_or_compute("k", lambda: "ok") == "ok"
+
+
+def test_lru_eviction_under_byte_budget():
+    item = np.zeros(1000)                       # 8000 bytes
+    size = m.result_nbytes({"a": item})
+    registry = m.ResultRegistry(max_entries=100, max_bytes=3 * size + 100)
+    for key in "abc":
+        registry.get_or_compute(key, lambda: {"a": np.zeros(1000)})
+    registry.get("a")                           # a를 최근 사용으로
+    registry.get_or_compute("d", lambda: {"a": np.zeros(1000)})
+    assert registry.get("b") is None            # 가장 오래 안 쓴 항목
+    assert all(registry.get(k) is not None for k in "acd")
+    assert registry.nbytes == 3 * size
+    assert registry.stats["evictions"] == 1
+
+    big = registry.get_or_compute("big", lambda: {"a": np.zeros(10_000)})
+    assert big["a"].shape == (10_000,)          # 요청한 쪽은 받는다
+    assert registry.get("big") is None          # 혼자 예산을 넘으면 보관하지 않는다
+    assert registry.nbytes == 3 * size
+
+
+def test_freeze_result_blocks_in_place_edits():
+    out = m.freeze_result({
+        "oos": pd.DataFrame({"date": pd.date_range("2024-01-01", periods=3),
+                             "ticker": ["MU"] * 3, "score": [50.0, 60.0, 70.0]}),
+        "prices": {"MU": pd.DataFrame({"Close": [1.0, 2.0, 3.0]})},
+        "series": pd.Series([1.0, 2.0]),
+        "weights": np.ones(3),
+    })
+    with pytest.raises(ValueError):
+        out["oos"].loc[0, "score"] = 0.0
+    with pytest.raises(ValueError):
+        out["prices"]["MU"].iloc[0, 0] = 0.0
+    with pytest.raises(ValueError):
+        out["oos"]["date"].to_numpy()[0] = np.datetime64("2000-01-01")
+    with pytest.raises(ValueError):
+        out["series"].to_numpy()[0] = 0.0
+    with pytest.raises(ValueError):
+        out["weights"][0] = 0.0
+    # 읽기·복사본 가공은 그대로 된다
+    assert out["oos"].sort_values("score", ascending=False)["score"].iloc[0] == 70.0
+    copy = out["oos"].copy()
+    copy.loc[0, "score"] = 0.0
+    assert out["oos"]["score"].iloc[0] == 50.0
+
+
+def test_frozen_result_with_text_columns_can_be_measured_and_stored():
+    frame = pd.DataFrame({"ticker": ["MU", "SNDK"], "score": [50.0, 60.0]})
+    registry = m.ResultRegistry(max_bytes=2**20)
+    out = registry.get_or_compute("k", lambda: m.freeze_result({"scores": frame}))
+    assert registry.get("k") is out and registry.nbytes > 0
+    assert out["scores"].memory_usage(deep=True).sum() > 0
+    with pytest.raises(ValueError):
+        out["scores"].loc[0, "score"] = 0.0
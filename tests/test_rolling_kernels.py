@@ -0,0 +1,77 @@
+"""벡터화 rolling 커널이 rolling().apply 기준 구현과 같은 값을 내는지 확인한다."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import memory_stock_predict_pro as m
+
+
+def _reference_mad(s, n):
+    return s.rolling(n).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True)
+
+
+def _reference_trend(close, n):
+    xc = np.arange(n, dtype=float) - (n - 1) / 2.0
+    xx = float(np.dot(xc, xc))
+    lp = np.log(close.where(close > 0))
+
+    def slope(y):
+        return float(np.dot(xc, y - y.mean()) / xx) if np.isfinite(y).all() else np.nan
+
+    def r2(y):
+        if not np.isfinite(y).all():
+            return np.nan
+        yc = y - y.mean()
+        yy = float(np.dot(yc, yc))
+        if yy <= 1e-16:
+            return 0.0
+        cov = float(np.dot(xc, yc))
+        return float(np.clip(cov * cov / (xx * yy), 0.0, 1.0))
+
+    return (np.expm1((lp.rolling(n).apply(slope, raw=True) * n).clip(-2, 2)),
+            lp.rolling(n).apply(r2, raw=True))
+
+
+def _close(length, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2015-01-01", periods=length)
+    s = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, length))), index=idx)
+    if length > 40:
+        s.iloc[30:33] = np.nan          # 결측 구간
+        s.iloc[37] = -1.0               # 로그를 취할 수 없는 값
+        s.iloc[-25:] = s.iloc[-26]      # 평평한 구간(R² 분모 0)
+    return s
+
+
+# _WINDOW_BLOCK(2048)을 넘는 길이로 블록 경계도 지난다.
+@pytest.mark.parametrize("length", [5, 19, 20, 300, 2_200])
+@pytest.mark.parametrize("n", [1, 20])
+def test_mean_abs_dev_matches_reference(length, n):
+    s = _close(length)
+    pd.testing.assert_series_equal(m.rolling_mean_abs_dev(s, n), _reference_mad(s, n),
+                                   check_exact=False, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("length", [5, 19, 20, 300, 2_200])
+@pytest.mark.parametrize("n", [2, 20, 60])
+def test_log_trend_matches_reference(length, n):
+    s = _close(length)
+    got, want = m.rolling_log_trend(s, n), _reference_trend(s, n)
+    for g, w in zip(got, want):
+        pd.testing.assert_series_equal(g, w, check_exact=False, rtol=1e-9, atol=1e-12)
+
+
+def test_wide_frame_matches_per_column():
+    wide = pd.DataFrame({f"T{i}": _close(300, seed=i) for i in range(3)})
+    wide.iloc[100:140, 1] = np.nan
+    mad = m.rolling_mean_abs_dev(wide, 20)
+    slope, r2 = m.rolling_log_trend(wide, 20)
+    assert isinstance(mad, pd.DataFrame) and list(mad.columns) == list(wide.columns)
+    for col in wide:
+        want_slope, want_r2 = _reference_trend(wide[col], 20)
+        pd.testing.assert_series_equal(mad[col], _reference_mad(wide[col], 20),
+                                       check_exact=False, rtol=1e-9, atol=1e-12)
+        pd.testing.assert_series_equal(slope[col], want_slope,
+                                       check_exact=False, rtol=1e-9, atol=1e-12)
+        pd.testing.assert_series_equal(r2[col], want_r2,
+                                       check_exact=False, rtol=1e-9, atol=1e-12)
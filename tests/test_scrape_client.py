@@ -0,0 +1,133 @@
+"""ScrapeClient를 로컬 HTTP 서버에 붙여 연결 재사용·조건부 요청·재시도를 확인한다."""
+import gzip
+import http.server
+import threading
+import urllib.error
+
+import pytest
+
+import memory_stock_predict_pro as m
+
+_BIG_TEXT = "".join(f"{i:08x}" for i in range(50_000))   # 400KB, 잘 안 눌리는 본문
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits.append((self.path, self.client_address[1]))
+            hits = sum(path == self.path for path, _ in server.hits)
+        if self.path == "/page":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self._send(304, headers=[("ETag", '"v1"')])
+            else:
+                self._send(200, "메모리 현물가".encode(),
+                           [("ETag", '"v1"'), ("Content-Type", "text/html; charset=utf-8")])
+        elif self.path == "/moved":
+            self._send(302, headers=[("Location", "/page")])
+        elif self.path == "/gzip":
+            self._send(200, gzip.compress(b"compressed body"),
+                       [("Content-Encoding", "gzip"), ("Content-Type", "text/plain")])
+        elif self.path == "/big-gzip":
+            self._send(200, gzip.compress(_BIG_TEXT.encode()),
+                       [("ETag", '"big"'), ("Content-Encoding", "gzip"),
+                        ("Content-Type", "text/plain")])
+        elif self.path.startswith("/item/"):
+            self._send(200, self.path.encode().ljust(100, b"."),
+                       [("ETag", f'"{self.path}"'), ("Content-Type", "text/plain")])
+        elif self.path == "/flaky":
+            if hits == 1:
+                self._send(503, b"busy", [("Retry-After", "0")])
+            else:
+                self._send(200, b"recovered", [("Content-Type", "text/plain")])
+        else:
+            self._send(404, b"missing")
+
+
+@pytest.fixture
+def server():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.hits = []
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def client():
+    c = m.ScrapeClient(concurrency=2, host_interval=0.0, retries=1)
+    yield c
+    c.close()
+
+
+def test_keep_alive_and_not_modified(server, client):
+    srv, base = server
+    assert client.get_text(f"{base}/page") == "메모리 현물가"
+    assert client.get_text(f"{base}/page") == "메모리 현물가"
+    assert client.stats == {"requests": 2, "not_modified": 1, "connections": 1}
+    assert len({port for _, port in srv.hits}) == 1
+
+
+def test_redirect_and_gzip(server, client):
+    _, base = server
+    assert client.get_text(f"{base}/moved") == "메모리 현물가"
+    assert client.get_text(f"{base}/gzip") == "compressed body"
+    assert client.stats["requests"] == 3
+    assert client.stats["connections"] == 1
+
+
+def test_retries_server_busy(server, client):
+    srv, base = server
+    assert client.get_text(f"{base}/flaky") == "recovered"
+    assert [path for path, _ in srv.hits] == ["/flaky", "/flaky"]
+
+
+def test_client_error_raises(server, client):
+    _, base = server
+    with pytest.raises(urllib.error.HTTPError) as info:
+        client.get_text(f"{base}/nope")
+    assert info.value.code == 404
+
+
+def test_truncated_gzip_body_returns_prefix_and_is_not_remembered(server, client,
+                                                                  monkeypatch):
+    _, base = server
+    monkeypatch.setattr(m, "SCRAPE_MAX_BYTES", 20_000)
+    text = client.get_text(f"{base}/big-gzip")
+    assert 0 < len(text) <= 20_000 and _BIG_TEXT.startswith(text)
+    assert f"{base}/big-gzip" not in client._validators
+
+
+def test_remembered_bodies_stay_under_byte_budget(server):
+    _, base = server
+    client = m.ScrapeClient(concurrency=1, host_interval=0.0,
+                            max_validator_bytes=250)
+    try:
+        for i in range(4):
+            client.get_text(f"{base}/item/{i}")
+        assert list(client._validators) == [f"{base}/item/2", f"{base}/item/3"]
+        assert client._validator_bytes == 200
+        client.get_text(f"{base}/item/2")            # 최근 사용으로 올라간다
+        client.get_text(f"{base}/item/4")
+        assert list(client._validators) == [f"{base}/item/2", f"{base}/item/4"]
+    finally:
+        client.close()
@@ -0,0 +1,56 @@
+"""merge_spot_data: 날짜 합집합 격자와 '뒤 입력이 같은 날짜·품목만 덮어씀' 규칙을 확인한다."""
+import numpy as np
+import pandas as pd
+
+import memory_stock_predict_pro as m
+
+DRAM, NAND = "DRAM_DDR4_8Gb", "NAND_TLC_512Gb"
+
+
+def _day(text):
+    return pd.Timestamp(text)
+
+
+def test_manual_overrides_auto_only_on_same_date_and_item():
+    auto = pd.DataFrame({"날짜": ["2025-01-06", "2025-01-13"],
+                         DRAM: [1.50, 1.55], NAND: [3.00, 3.05]})
+    manual = pd.DataFrame({"날짜": ["2025-01-13 15:30", "2025-01-20"],
+                           DRAM: [1.70, np.nan], "HBM_custom": [np.nan, 9.0]})
+    merged = m.merge_spot_data(auto, manual).set_index("날짜")
+
+    assert list(merged.index) == [_day("2025-01-06"), _day("2025-01-13"),
+                                  _day("2025-01-20")]
+    assert merged.loc["2025-01-13", DRAM] == 1.70       # 같은 날짜·품목: 수동값
+    assert merged.loc["2025-01-13", NAND] == 3.05       # 다른 품목은 자동값 유지
+    assert merged.loc["2025-01-06", DRAM] == 1.50       # 다른 날짜는 그대로
+    assert np.isnan(merged.loc["2025-01-20", DRAM])     # 빈 값은 새로 채우지 않는다
+    assert merged.loc["2025-01-20", "HBM_custom"] == 9.0
+    # 순서를 바꾸면 자동값이 이긴다
+    flipped = m.merge_spot_data(manual, auto).set_index("날짜")
+    assert flipped.loc["2025-01-13", DRAM] == 1.55
+
+
+def test_matches_combine_first_chain():
+    rng = np.random.default_rng(3)
+    frames = []
+    for k in range(3):
+        dates = pd.bdate_range("2025-01-01", periods=40)[rng.choice(40, 25, replace=False)]
+        cols = [DRAM, NAND, f"extra_{k}"]
+        values = rng.normal(2, 0.1, (25, 3))
+        values[rng.random((25, 3)) < 0.3] = np.nan
+        frames.append(pd.DataFrame(values, columns=cols).assign(날짜=dates))
+    want = None
+    for frame in frames:
+        clean = m._normalise_spot_data(frame).set_index("날짜")
+        want = clean if want is None else clean.combine_first(want)
+    got = m.merge_spot_data(*frames).set_index("날짜")
+    pd.testing.assert_frame_equal(got, want[got.columns], check_names=False,
+                                  check_freq=False)
+    assert sorted(got.columns) == sorted(want.columns)
+
+
+def test_empty_inputs_are_skipped():
+    auto = pd.DataFrame({"날짜": ["2025-01-06"], DRAM: [1.5]})
+    merged = m.merge_spot_data(None, pd.DataFrame(), auto)
+    assert len(merged) == 1 and merged[DRAM].iloc[0] == 1.5
+    assert m.merge_spot_data(None, None).empty
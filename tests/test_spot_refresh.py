@@ -0,0 +1,97 @@
+"""현물가 갱신 잠금이 잡혀 있을 때 강제 갱신이 기다리거나 상태로 알리고,
+상태 확인이 잠금을 건드리지 않는지 확인한다."""
+import json
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import memory_stock_predict_pro as m
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "SPOT_STORE", str(tmp_path / "spot_store.sqlite"))
+    monkeypatch.setattr(m, "AUTO_SPOT_CACHE", str(tmp_path / "legacy.csv"))
+    calls = []
+    monkeypatch.setattr(m, "_refresh_spot_store",
+                        lambda force: calls.append(force) or True)
+    return calls
+
+
+def _hold_lock(seconds):
+    held = threading.Event()
+
+    def run():
+        with m._spot_refresh_guard() as acquired:
+            assert acquired
+            held.set()
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    held.wait()
+    return thread
+
+
+def test_unlocked_refresh_runs_immediately(store):
+    assert m.refresh_auto_spot_prices(force=True)
+    assert store == [True]
+
+
+def test_plain_refresh_does_not_wait(store):
+    thread = _hold_lock(0.5)
+    t0 = time.monotonic()
+    assert not m.refresh_auto_spot_prices()
+    assert time.monotonic() - t0 < 0.3
+    thread.join()
+    assert store == []
+
+
+def test_forced_refresh_waits_for_running_refresh(store):
+    thread = _hold_lock(0.5)
+    assert m.refresh_auto_spot_prices(force=True, wait=5)
+    thread.join()
+    # 방금 끝난 갱신이 있으므로 TTL 기준으로만 다시 판단한다
+    assert store == [False]
+
+
+def test_timeout_is_reported_in_snapshot(store):
+    thread = _hold_lock(1.0)
+    _, status = m.fetch_auto_spot_prices(force=True, wait=0.2)
+    assert status["refreshing"]
+    assert status["state"] == "warming"
+    thread.join()
+    assert store == []
+    assert not m.read_auto_spot_snapshot()[1]["refreshing"]
+
+
+def test_busy_probe_does_not_take_the_lock(store, monkeypatch):
+    thread = _hold_lock(0.5)
+    assert m._spot_refresh_busy()
+    thread.join()
+    assert not m._spot_refresh_busy()
+
+    # 화면이 상태를 읽는 동안에도 백그라운드의 wait=0 갱신은 잠금을 얻는다
+    taken = []
+    real_lock = m._file_lock
+
+    def spy(path, wait=0.0):
+        taken.append(path)
+        return real_lock(path, wait)
+
+    monkeypatch.setattr(m, "_file_lock", spy)
+    m.read_auto_spot_snapshot()
+    assert taken == []
+    assert m.refresh_auto_spot_prices()
+    assert store == [False]
+
+
+def test_stale_owner_file_is_ignored(store):
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                          capture_output=True, text=True, check=True)
+    with open(m._spot_refresh_owner(), "w", encoding="utf-8") as fh:
+        json.dump({"pid": int(dead.stdout), "at": 0}, fh)
+    assert not m._spot_refresh_busy()
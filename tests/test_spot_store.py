@@ -0,0 +1,67 @@
+"""원격 CSV 출처 행이 다시 받을 때 교체되고, URL이 없으면 쓰이지 않는지 확인한다."""
+import time
+
+import pandas as pd
+import pytest
+
+import memory_stock_predict_pro as m
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "SPOT_STORE", str(tmp_path / "spot_store.sqlite"))
+    monkeypatch.setattr(m, "AUTO_SPOT_CACHE", str(tmp_path / "legacy.csv"))
+    monkeypatch.setenv("MEMORY_SPOT_CSV_URL", "https://example.invalid/spot.csv")
+
+
+def _spot(values):
+    return pd.DataFrame({"날짜": pd.to_datetime(list(values)),
+                         "DRAM_DDR4_8Gb": list(values.values())})
+
+
+def _remote_rows():
+    _, _, picked = m.read_spot_store(with_sources=True)
+    picked = picked[picked["source"] == "remote"]
+    return dict(zip(picked["date"], picked["value"]))
+
+
+def test_refetch_replaces_remote_rows(store, monkeypatch):
+    m.save_spot_sources({"article": _spot({"2024-01-02": 1.0}),
+                         "remote": _spot({"2024-01-02": 2.0, "2024-01-03": 2.1})},
+                        {"refreshed_at": str(time.time())})
+    assert _remote_rows() == {"2024-01-02": 2.0, "2024-01-03": 2.1}
+
+    # 원격 CSV에서 한 날짜가 빠지고 값이 고쳐졌다 — TrendForce TTL은 아직 유효
+    monkeypatch.setattr(m, "_remote_spot_csv",
+                        lambda: (m._normalise_spot_data(_spot({"2024-01-02": 2.5})), None))
+    assert m._refresh_spot_store(False)
+    assert _remote_rows() == {"2024-01-02": 2.5}
+    wide, meta = m.read_spot_store()
+    assert wide["DRAM_DDR4_8Gb"].tolist() == [2.5]
+    assert "remote_fetched_at" in meta
+
+
+def test_failed_refetch_keeps_previous_rows(store, monkeypatch):
+    m.save_spot_sources({"remote": _spot({"2024-01-02": 2.0})},
+                        {"refreshed_at": str(time.time())})
+    monkeypatch.setattr(m, "_remote_spot_csv",
+                        lambda: (m._normalise_spot_data(None), "원격 CSV: URLError"))
+    m._refresh_spot_store(False)
+    assert _remote_rows() == {"2024-01-02": 2.0}
+
+
+def test_remote_rows_ignored_without_url(store, monkeypatch):
+    m.save_spot_sources({"article": _spot({"2024-01-02": 1.0}),
+                         "remote": _spot({"2024-01-02": 2.0, "2024-01-03": 2.1})})
+    monkeypatch.delenv("MEMORY_SPOT_CSV_URL")
+    wide, _ = m.read_spot_store()
+    assert wide["DRAM_DDR4_8Gb"].tolist() == [1.0]
+
+    m.save_spot_sources({}, {"refreshed_at": "0"})
+    monkeypatch.setattr(m, "_trendforce_public_history",
+                        lambda: (m._normalise_spot_data(None), []))
+    monkeypatch.setattr(m, "_current_trendforce_spot",
+                        lambda: (m._normalise_spot_data(None), {}, []))
+    m._refresh_spot_store(False)
+    monkeypatch.setenv("MEMORY_SPOT_CSV_URL", "https://example.invalid/spot.csv")
+    assert _remote_rows() == {}
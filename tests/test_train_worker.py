@@ -0,0 +1,24 @@
+"""학습 워커가 현물가 갱신·게시 실패에도 멈추지 않는지 확인한다."""
+import logging
+
+import memory_stock_predict_pro as m
+
+
+def test_worker_survives_spot_and_publish_failures(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(m, "ARTIFACT_DIR", str(tmp_path))
+
+    def broken(*args, **kwargs):
+        raise OSError("store unavailable")
+
+    published = []
+    monkeypatch.setattr(m, "fetch_auto_spot_prices", broken)
+    monkeypatch.setattr(m, "run_pipeline", lambda horizon, period: {"h": horizon})
+    monkeypatch.setattr(m, "publish_artifact",
+                        lambda out, horizon, period: published.append(out) or "v1")
+    with caplog.at_level(logging.INFO, logger=m.log.name):
+        m.train_worker(profiles=[(5, "1y")], once=True, after_cycle=broken)
+    assert published == [{"h": 5}]
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("현물가 갱신 실패" in msg for msg in messages)
+    assert any("h5-1y" in msg and "v1" in msg for msg in messages)
+    assert any("주기 후 작업 실패" in msg for msg in messages)
@@ -0,0 +1,40 @@
+"""TrendForce 표 파서: 기준일 탐색과 script 안 가짜 표."""
+import memory_stock_predict_pro as m
+
+HEADER = ("<tr><th>Item</th><th>Session High</th><th>Session Low</th>"
+          "<th>Session Average</th><th>Session Change</th></tr>")
+PRICE_TABLE = ("<table>" + HEADER
+               + "<tr><td>DDR4 8Gb (1Gx8) 3200</td><td>2</td><td>1</td>"
+                 "<td>1.875</td><td>▼ 0.50 %</td></tr></table>")
+ITEM = r"DDR4\s+8Gb\s+\(1Gx8\)\s+3200"
+
+
+def _quote(page):
+    return m._quote_from_table(m._page_tables(page), ITEM)
+
+
+def test_label_and_date_in_separate_cells():
+    page = ("<table><tr><td>Last Update</td><td>2024-05-01</td></tr></table>"
+            + PRICE_TABLE)
+    quote = _quote(page)
+    assert quote is not None
+    assert str(quote["date"].date()) == "2024-05-01"
+    assert quote["value"] == 1.875 and quote["change_pct"] == -0.5
+
+
+def test_table_inside_script_is_ignored():
+    page = ("<script>var t='<table>Last Update: 1999-01-01';</script>"
+            "<div>Last Update <b>:</b> 2025-10-14</div>" + PRICE_TABLE)
+    assert str(_quote(page)["date"].date()) == "2025-10-14"
+
+
+def test_date_far_before_table_is_not_used():
+    page = ("<div>Last Update: 2020-01-01</div>" + "<p>filler</p>" * 5000
+            + PRICE_TABLE)
+    assert _quote(page) is None
+
+
+def test_nested_tables_in_document_order():
+    tables = m._page_tables(
+        "<table><tr><td>a<table><tr><td>in</td></tr></table></td></tr></table>")
+    assert [t["rows"] for t in tables] == [[["a"]], [["in"]]]